@@ -0,0 +1,116 @@
+"""
+Daily-job benchmark on a synthetic full day (benchmarks.synthetic_day).
+
+The dataset is generated once into <workdir>/template and copied fresh for every
+run, since the job archives and deletes the raw chunks. Each run executes
+process_symbol_day in a new process against the local storage stand-in, so
+peak RSS is per run. Reports wall time, peak RSS and the job's own per-stage
+timings (list, download, parse, aggregate, candles, footprint, archive, delete).
+
+    python -m benchmarks.bench_daily_job --trades 3000000 --format csv --repeat 3
+    python -m benchmarks.bench_daily_job --workdir /tmp/daybench --json new.json --baseline base.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.bench_ingest import compare
+from benchmarks.synthetic_day import add_dataset_arguments, dataset_options, write_synthetic_day
+
+REGRESSION_CHECKS = {"wall_seconds": "higher", "peak_rss_mb": "higher"}
+
+
+def _run_job(root: str, bucket: str, symbol: str, date_str: str, download_workers: int, results) -> None:
+    # Fresh process: settings are read from the environment on first use
+    os.environ["LOCAL_STORAGE_ROOT"] = root
+    from orderflow_recorder.process import daily_job
+
+    timer = daily_job.StageTimer()
+    target = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    started = time.perf_counter()
+    daily_job.process_symbol_day(bucket, symbol, target, download_workers, timer=timer)
+    wall = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        "wall_seconds": wall,
+        "peak_rss_mb": (peak if sys.platform == "darwin" else peak * 1024) / 2**20,
+        **{f"stage_{name}_seconds": seconds for name, seconds in timer.seconds.items()},
+    })
+
+
+def run_once(template: Path, work: Path, args) -> dict:
+    if work.exists():
+        shutil.rmtree(work)
+    shutil.copytree(template, work)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run_job, args=(str(work), args.bucket, args.symbol, args.date, args.download_workers, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument("--workdir", help="keep the generated dataset here and reuse it (default: temp dir)")
+    parser.add_argument("--download-workers", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="write results (best run) to this file")
+    parser.add_argument("--baseline", help="previous --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="daybench-"))
+    template = workdir / "template"
+    marker = template / "dataset.json"
+    options = dataset_options(args)
+    if marker.exists() and json.loads(marker.read_text()).get("options") == options:
+        dataset = json.loads(marker.read_text())["dataset"]
+        print(f"Reusing dataset in {template}")
+    else:
+        shutil.rmtree(template, ignore_errors=True)
+        dataset = write_synthetic_day(str(template), **options)
+        marker.write_text(json.dumps({"options": options, "dataset": dataset}))
+    print(
+        f"{args.symbol} {args.date}: {dataset['trades']:,} trades, {dataset['depth_snapshots']:,} depth snapshots, "
+        f"{dataset['chunks']:,} {args.format} chunks, {dataset['raw_mb']:,.1f} MB"
+    )
+
+    runs = []
+    try:
+        for i in range(args.repeat):
+            runs.append(run_once(template, workdir / "run", args))
+            print(f"  run {i + 1}: {runs[-1]['wall_seconds']:.2f}s, peak RSS {runs[-1]['peak_rss_mb']:.0f} MB")
+    finally:
+        shutil.rmtree(workdir / "run", ignore_errors=True)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    best = min(runs, key=lambda r: r["wall_seconds"])
+    for key, value in best.items():
+        print(f"  {key:<28} {value:>10,.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "dataset": dataset, **best}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(best, json.load(f), args.tolerance, REGRESSION_CHECKS)
+        if failures:
+            print("REGRESSION:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print(f"No regression beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
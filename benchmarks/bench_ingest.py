@@ -0,0 +1,212 @@
+"""
+End-to-end ingest benchmark: fake Binance WS server -> FuturesWSClient ->
+RecorderCallbacks -> GcsCsvSink (local storage stand-in).
+
+The server (benchmarks.fake_binance) runs in separate processes and stamps
+each frame with its send time; the recorder path is the production one, with
+the sink subclassed only to record per-event latency (send -> buffered).
+
+Reports sustained events/s, per-event latency percentiles, event-loop lag,
+RSS and upload volume. --json writes the results; --baseline compares against
+a previous --json file and exits 1 on a regression beyond --tolerance.
+
+    python -m benchmarks.bench_ingest --symbols 50 --speed 20 --seconds 30
+    python -m benchmarks.bench_ingest --symbols 50 --profile bursty --speed 10 --json out.json --baseline base.json
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import tempfile
+import time
+from array import array
+from typing import Dict, Union
+
+import numpy as np
+
+from benchmarks import fake_binance
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.binance.ws_client import FuturesWSClient, RecorderCallbacks, shard_symbols
+from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.storage.gcs_sinks import GcsCsvSink
+from orderflow_recorder.utils import metrics
+
+
+class MeasuringSink(GcsCsvSink):
+    """GcsCsvSink that records send -> write latency (ms) of every event once recording is on."""
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self.latencies = array("f")
+        self.recording = False
+
+    def _observe(self, event: Union[dict, TradeRecord, DepthRecord]) -> None:
+        if not self.recording:
+            return
+        if isinstance(event, (TradeRecord, DepthRecord)):
+            event_ms = event.event_time
+        else:
+            event_ms = event["event_time"].timestamp() * 1000
+        self.latencies.append(time.time() * 1000 - event_ms)
+
+    async def write_trade(self, trade) -> None:
+        await super().write_trade(trade)
+        self._observe(trade)
+
+    async def write_orderbook(self, depth) -> None:
+        await super().write_orderbook(depth)
+        self._observe(depth)
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def sample_loop_lag(samples: array, interval: float = 0.05) -> None:
+    clock = time.perf_counter
+    while True:
+        start = clock()
+        await asyncio.sleep(interval)
+        samples.append((clock() - start - interval) * 1000)
+
+
+async def run_benchmark(args, root: str) -> Dict[str, float]:
+    settings = Settings(
+        binance_ws_futures_base_url=f"ws://127.0.0.1:{args.port}/stream",
+        symbols_futures=[f"sym{i}usdt" for i in range(args.symbols)],
+        ws_decoder=args.decoder,
+        ws_shards=args.shards,
+        ingest_queue_size=args.queue_size,
+        ingest_overflow=args.overflow,
+        ingest_stats_interval=0,
+        local_storage_root=root,
+        gcs_bucket_name="bench",
+        buffer_seconds=args.buffer_seconds,
+        raw_format=args.raw_format,
+    )
+    sink = MeasuringSink(settings)
+    await sink.start()
+    callbacks = RecorderCallbacks(sink, sink)
+    clients = [
+        FuturesWSClient(settings, callbacks.on_depth_update, callbacks.on_trade, symbols=group, name=f"shard-{i}")
+        for i, group in enumerate(shard_symbols(settings.symbols_futures, settings.ws_shards, settings.ws_max_streams_per_connection))
+    ]
+    tasks = [asyncio.create_task(client.run_forever()) for client in clients]
+    lag = array("f")
+    lag_task = asyncio.create_task(sample_loop_lag(lag))
+
+    def received() -> int:
+        return sum(client.stats.received for client in clients)
+
+    await asyncio.sleep(args.warmup)
+    sink.recording = True
+    del lag[:]
+    rss_start = rss_bytes()
+    start_events = received()
+    start_bytes = metrics.UPLOAD_BYTES.value()
+    started = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    elapsed = time.perf_counter() - started
+    events = received() - start_events
+    sink.recording = False
+    rss_end = rss_bytes()
+
+    lag_task.cancel()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, lag_task, return_exceptions=True)
+    await sink.stop()
+
+    latencies = np.frombuffer(sink.latencies, dtype=np.float32) if len(sink.latencies) else np.zeros(1, np.float32)
+    loop_lag = np.frombuffer(lag, dtype=np.float32) if len(lag) else np.zeros(1, np.float32)
+    return {
+        "events_per_sec": events / elapsed,
+        "events": events,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+        "latency_max_ms": float(latencies.max()),
+        "loop_lag_p99_ms": float(np.percentile(loop_lag, 99)),
+        "loop_lag_max_ms": float(loop_lag.max()),
+        "rss_start_mb": rss_start / 2**20,
+        "rss_end_mb": rss_end / 2**20,
+        "rss_peak_mb": peak_rss_bytes() / 2**20,
+        "dropped_depth": sum(client.stats.dropped_depth for client in clients),
+        "uploaded_mb": (metrics.UPLOAD_BYTES.value() - start_bytes) / 2**20,
+    }
+
+
+# metric -> direction that counts as a regression
+REGRESSION_CHECKS = {"events_per_sec": "lower", "latency_p99_ms": "higher", "loop_lag_p99_ms": "higher", "rss_peak_mb": "higher"}
+
+
+def compare(result: Dict[str, float], baseline: Dict[str, float], tolerance: float, checks: Dict[str, str] = REGRESSION_CHECKS) -> list:
+    """Regressions beyond tolerance (relative) for the checked metrics, as printable lines."""
+    failures = []
+    for key, worse in checks.items():
+        if key not in baseline or not baseline[key]:
+            continue
+        change = (result[key] - baseline[key]) / baseline[key]
+        if (worse == "lower" and change < -tolerance) or (worse == "higher" and change > tolerance):
+            failures.append(f"{key}: {baseline[key]:,.2f} -> {result[key]:,.2f} ({change:+.0%})")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=9002)
+    parser.add_argument("--server-workers", type=int, default=2)
+    fake_binance.add_server_arguments(parser)
+    parser.add_argument("--decoder", choices=["dict", "typed"], default="typed")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    parser.add_argument("--overflow", choices=["block", "drop_depth"], default="block")
+    parser.add_argument("--buffer-seconds", type=int, default=5)
+    parser.add_argument("--raw-format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="previous --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+    if args.speed is None and args.rate is None:
+        args.speed = 10.0
+
+    servers = fake_binance.start_in_process(port=args.port, workers=args.server_workers, **fake_binance.server_options(args))
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            result = asyncio.run(run_benchmark(args, root))
+    finally:
+        for proc in servers:
+            proc.terminate()
+
+    pace = f"{args.speed}x real time" if args.speed else f"{args.rate:,.0f} msg/s per connection"
+    print(f"{args.symbols} symbols, {pace}, profile={args.profile}, decoder={args.decoder}, shards={args.shards}")
+    for key, value in result.items():
+        print(f"  {key:<18} {value:>14,.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), **result}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(result, json.load(f), args.tolerance)
+        if failures:
+            print("REGRESSION:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print(f"No regression beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Ingest throughput for one WS connection vs sharded connections vs worker processes.
+
+Starts benchmarks.fake_binance (unthrottled, several server processes sharing
+the port so the server is not the bottleneck) and counts decoded messages per
+second delivered to the callbacks for each layout.
+
+    python -m benchmarks.bench_ingest_shards --symbols 100 --shards 4 --seconds 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+
+from benchmarks import fake_binance
+from orderflow_recorder.binance.ws_client import FuturesWSClient, shard_symbols
+from orderflow_recorder.config.settings import Settings
+
+
+def _settings(port: int) -> Settings:
+    return Settings(binance_ws_futures_base_url=f"ws://127.0.0.1:{port}/stream", ws_decoder="typed")
+
+
+async def _consume(port: int, groups, seconds: float, counter=None) -> int:
+    count = 0
+
+    async def on_event(_event) -> None:
+        nonlocal count
+        count += 1
+
+    settings = _settings(port)
+    clients = [FuturesWSClient(settings, on_event, on_event, symbols=g, name=f"shard-{i}") for i, g in enumerate(groups)]
+    tasks = [asyncio.create_task(c.run_forever()) for c in clients]
+    # Let the connections come up before measuring
+    await asyncio.sleep(1.0)
+    start_count = count
+    await asyncio.sleep(seconds)
+    measured = count - start_count
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if counter is not None:
+        counter.value = measured
+    return measured
+
+
+def _process_main(port: int, groups, seconds: float, counter) -> None:
+    asyncio.run(_consume(port, groups, seconds, counter))
+
+
+def run_processes(port: int, symbols, processes: int, seconds: float) -> int:
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    counters = []
+    for group in shard_symbols(symbols, processes):
+        counter = ctx.Value("q", 0)
+        proc = ctx.Process(target=_process_main, args=(port, [group], seconds, counter))
+        proc.start()
+        procs.append(proc)
+        counters.append(counter)
+    for proc in procs:
+        proc.join()
+    return sum(c.value for c in counters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--server-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    symbols = [f"sym{i}usdt" for i in range(args.symbols)]
+    servers = fake_binance.start_in_process(port=args.port, workers=args.server_workers)
+    try:
+        print(f"{args.symbols} symbols, {args.seconds:.0f}s per case")
+        print(f"{'layout':<24} {'msg/s':>12}")
+        cases = [
+            ("1 connection", lambda: asyncio.run(_consume(args.port, [symbols], args.seconds))),
+            (f"{args.shards} connections", lambda: asyncio.run(_consume(args.port, shard_symbols(symbols, args.shards), args.seconds))),
+            (f"{args.shards} processes", lambda: run_processes(args.port, symbols, args.shards, args.seconds)),
+        ]
+        for label, case in cases:
+            print(f"{label:<24} {case() / args.seconds:>12,.0f}")
+    finally:
+        for proc in servers:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Replay throughput on a synthetic day (benchmarks.synthetic_day).
+
+Generates one or more symbols' raw chunks into a temp LOCAL_STORAGE_ROOT,
+optionally zips them like the daily job (--archive), then replays the whole
+day through analysis.replay.Replay and reports records/s and the speed-up over
+real time.
+
+    python -m benchmarks.bench_replay --symbols 2 --trades 500000 --format parquet
+    python -m benchmarks.bench_replay --symbols 2 --trades 500000 --archive --levels 5
+"""
+import argparse
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.synthetic_day import add_dataset_arguments, dataset_options, write_synthetic_day
+from orderflow_recorder.analysis.replay import Replay
+from orderflow_recorder.binance.records import TradeRecord
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+
+
+def archive_day(bucket, symbol: str, date_str: str) -> None:
+    """Zip the day's raw chunks to archive/{symbol}/{date}_raw.zip and drop them, as the daily job does."""
+    with tempfile.TemporaryFile() as spool:
+        with zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED) as zf:
+            for blob in list(bucket.list_blobs(prefix=f"raw/{symbol}/{date_str}/")):
+                compress = zipfile.ZIP_STORED if blob.name.endswith(".parquet") else zipfile.ZIP_DEFLATED
+                zf.writestr(blob.name.rsplit("/", 1)[-1], blob.download_as_bytes(), compress_type=compress)
+                blob.delete()
+        bucket.blob(f"archive/{symbol}/{date_str}_raw.zip").upload_from_file(spool, rewind=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument("--symbols", type=int, default=1, help="symbols to generate and merge")
+    parser.add_argument("--archive", action="store_true", help="replay from the archive zip instead of raw chunks")
+    parser.add_argument("--levels", type=int, default=None, help="depth levels per side to materialize")
+    parser.add_argument("--kinds", default="trades,depth")
+    parser.add_argument("--prefetch", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    options = dataset_options(args)
+    symbols = [f"{args.symbol}{i}" if args.symbols > 1 else args.symbol for i in range(args.symbols)]
+    with tempfile.TemporaryDirectory() as root:
+        bucket = LocalStorageClient(root).bucket(args.bucket)
+        for i, symbol in enumerate(symbols):
+            stats = write_synthetic_day(root, **{**options, "symbol": symbol, "seed": args.seed + i})
+            print(f"{symbol}: {stats['trades']:,} trades, {stats['depth_snapshots']:,} snapshots, {stats['raw_mb']:,.1f} MB")
+            if args.archive:
+                archive_day(bucket, symbol, args.date)
+
+        day = datetime.strptime(args.date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        trades = depth = 0
+        started = time.perf_counter()
+        with Replay(
+            bucket, symbols, day, day + timedelta(days=1), kinds=args.kinds.split(","), levels=args.levels,
+            prefetch=args.prefetch, workers=args.workers,
+        ) as replay:
+            for record in replay:
+                if type(record) is TradeRecord:
+                    trades += 1
+                else:
+                    depth += 1
+        elapsed = time.perf_counter() - started
+
+    total = trades + depth
+    print(f"replayed {trades:,} trades + {depth:,} depth snapshots in {elapsed:,.2f}s")
+    print(f"  records/s        {total / elapsed:>14,.0f}")
+    print(f"  x real time      {86_400 / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
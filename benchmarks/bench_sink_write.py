@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for the GcsCsvSink write path.
+
+Compares the lock-free single-writer path against the previous behaviour of
+taking an asyncio.Lock per event, for dict and typed-record inputs.
+
+    python -m benchmarks.bench_sink_write --events 300000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.storage.gcs_sinks import GcsCsvSink
+
+
+class LockedSink(GcsCsvSink):
+    """Baseline: the pre-double-buffering write path (one lock acquisition per event)."""
+
+    def __init__(self, settings: Settings) -> None:
+        super().__init__(settings)
+        self._lock = asyncio.Lock()
+
+    async def write_trade(self, trade) -> None:
+        async with self._lock:
+            await super().write_trade(trade)
+
+    async def write_orderbook(self, depth) -> None:
+        async with self._lock:
+            await super().write_orderbook(depth)
+
+
+def make_events(n: int, symbols: int, depth_every: int):
+    bids = [[f"{35000 - i * 0.1:.1f}", "1.250"] for i in range(20)]
+    asks = [[f"{35000.1 + i * 0.1:.1f}", "0.750"] for i in range(20)]
+    names = [f"SYM{i}USDT" for i in range(symbols)]
+    events = []
+    ts = 1700000000000
+    for i in range(n):
+        symbol = names[i % symbols]
+        ts += 1
+        if i % depth_every == 0:
+            events.append(DepthRecord(symbol, ts, i, i + 1, bids, asks))
+        else:
+            events.append(TradeRecord(symbol, ts, ts, 35000.0 + (i % 50) * 0.1, 0.01, bool(i & 1), i))
+    return events
+
+
+async def run_case(sink: GcsCsvSink, events, as_dicts: bool) -> float:
+    if as_dicts:
+        events = [e.to_dict() for e in events]
+    write_trade = sink.write_trade
+    write_orderbook = sink.write_orderbook
+    start = time.perf_counter()
+    for event in events:
+        kind = event["type"] if as_dicts else None
+        if kind == "orderbook" or isinstance(event, DepthRecord):
+            await write_orderbook(event)
+        else:
+            await write_trade(event)
+    elapsed = time.perf_counter() - start
+    return len(events) / elapsed
+
+
+async def main_async(args) -> None:
+    events = make_events(args.events, args.symbols, args.depth_every)
+    with tempfile.TemporaryDirectory() as root:
+        settings = Settings(local_storage_root=root, gcs_bucket_name="bench")
+        print(f"{args.events} events, {args.symbols} symbols, 1 depth per {args.depth_every} events")
+        print(f"{'input':<8} {'locked ev/s':>14} {'lock-free ev/s':>16} {'speedup':>9}")
+        for as_dicts in (True, False):
+            results = {}
+            for name, cls in (("locked", LockedSink), ("lock-free", GcsCsvSink)):
+                best = 0.0
+                for _ in range(args.repeat):
+                    best = max(best, await run_case(cls(settings), events, as_dicts))
+                results[name] = best
+            label = "dict" if as_dicts else "typed"
+            print(
+                f"{label:<8} {results['locked']:>14,.0f} {results['lock-free']:>16,.0f} "
+                f"{results['lock-free'] / results['locked']:>8.2f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--depth-every", type=int, default=4, help="one depth snapshot per N events")
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Local stand-in for the Binance Futures combined-stream endpoint.
+
+Serves `/stream?streams=btcusdt@depth20@100ms/btcusdt@aggTrade/...` from a
+pre-encoded cycle of depth20 and aggTrade frames (price random walk, 20-level
+books). `E`/`T` are stamped with the send time, so receivers can measure
+end-to-end latency on the same host.
+
+Pacing:
+- default: unthrottled, as fast as the connection drains;
+- --rate N: N messages/s per connection;
+- --speed X: real-time model, per symbol 10 depth snapshots/s (100ms stream)
+  plus --trades-per-symbol aggTrades/s, all multiplied by X and by the
+  --profile factor (steady, bursty, ramp).
+
+Point the recorder at it with BINANCE_WS_FUTURES_BASE_URL=ws://127.0.0.1:9001/stream.
+
+    python -m benchmarks.fake_binance --port 9001 [--speed 10 --profile bursty] [--workers 4]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+
+DEPTH_PER_SECOND = 10  # depth20@100ms
+TS_MARKER = "__TS__"
+
+# Rate multiplier over time since connect (seconds)
+PROFILES: Dict[str, Callable[[float], float]] = {
+    "steady": lambda t: 1.0,
+    # 1s bursts at 10x every 10s, half rate in between (mean 1.45x)
+    "bursty": lambda t: 10.0 if t % 10 < 1 else 0.5,
+    # Linear growth, to find the saturation point
+    "ramp": lambda t: 1.0 + t / 10,
+}
+
+
+def make_templates(streams: List[str], trades_per_symbol: float = 20.0, cycle: int = 5_000, seed: int = 7) -> List[List[str]]:
+    """
+    Pre-encoded frames split on the timestamp placeholder: TS.join(parts) gives
+    the frame. Depth and trades are interleaved in the real-time ratio.
+    """
+    trade_streams = [s for s in streams if s.endswith("@aggTrade")]
+    depth_streams = [s for s in streams if "@depth" in s]
+    if not trade_streams and not depth_streams:
+        return []
+    rng = random.Random(seed)
+    depth_share = DEPTH_PER_SECOND / (DEPTH_PER_SECOND + trades_per_symbol) if trade_streams else 1.0
+    if not depth_streams:
+        depth_share = 0.0
+
+    price = 35_000.0
+    templates = []
+    credit = 0.0
+    d = t = 0
+    for i in range(cycle):
+        price = max(1.0, price + rng.gauss(0, 2.0))
+        credit += depth_share
+        if credit >= 1.0:
+            credit -= 1.0
+            stream = depth_streams[d % len(depth_streams)]
+            d += 1
+            bids = [[f"{price - 0.1 * (k + 1):.1f}", f"{rng.uniform(0.01, 5):.3f}"] for k in range(20)]
+            asks = [[f"{price + 0.1 * (k + 1):.1f}", f"{rng.uniform(0.01, 5):.3f}"] for k in range(20)]
+            data = {
+                "e": "depthUpdate", "E": TS_MARKER, "T": TS_MARKER, "s": stream.split("@", 1)[0].upper(),
+                "U": i, "u": i + 1, "pu": i - 1, "b": bids, "a": asks,
+            }
+        else:
+            stream = trade_streams[t % len(trade_streams)]
+            t += 1
+            data = {
+                "e": "aggTrade", "E": TS_MARKER, "a": i, "s": stream.split("@", 1)[0].upper(), "p": f"{price:.1f}",
+                "q": f"{rng.expovariate(20):.3f}", "f": i, "l": i, "T": TS_MARKER, "m": rng.random() < 0.5,
+            }
+        # The marker is emitted as a JSON string; strip its quotes so the timestamp is a number
+        templates.append(json.dumps({"stream": stream, "data": data}).split(f'"{TS_MARKER}"'))
+    return templates
+
+
+async def stream_handler(request: web.Request) -> web.WebSocketResponse:
+    ws = web.WebSocketResponse(heartbeat=20, max_msg_size=0)
+    await ws.prepare(request)
+    config = request.app["config"]
+    streams = [s for s in request.query.get("streams", "").split("/") if s]
+    templates = make_templates(streams, config["trades_per_symbol"])
+    if not templates:
+        await ws.close()
+        return ws
+
+    symbols = len({s.split("@", 1)[0] for s in streams})
+    if config["speed"]:
+        base_rate = symbols * (DEPTH_PER_SECOND + config["trades_per_symbol"]) * config["speed"]
+    else:
+        base_rate = config["rate"]
+    profile = PROFILES[config["profile"]]
+
+    tick = 0.01
+    i = 0
+    sent = 0
+    due = 0.0
+    started = time.perf_counter()
+    last = started
+    try:
+        while not ws.closed:
+            if base_rate:
+                now = time.perf_counter()
+                due += base_rate * profile(now - started) * (now - last)
+                last = now
+                batch = int(due - sent)
+                if batch <= 0:
+                    await asyncio.sleep(tick)
+                    continue
+            else:
+                batch = 100
+            ts = str(int(time.time() * 1000))
+            for _ in range(batch):
+                await ws.send_str(ts.join(templates[i]))
+                i += 1
+                if i == len(templates):
+                    i = 0
+            sent += batch
+            # Yield so pings and close frames are handled
+            await asyncio.sleep(0)
+    except (ConnectionError, RuntimeError):
+        pass
+    return ws
+
+
+def make_app(
+    rate: Optional[float] = None, speed: Optional[float] = None, trades_per_symbol: float = 20.0, profile: str = "steady"
+) -> web.Application:
+    if profile not in PROFILES:
+        raise ValueError(f"profile must be one of {', '.join(PROFILES)}")
+    app = web.Application()
+    app["config"] = {"rate": rate, "speed": speed, "trades_per_symbol": trades_per_symbol, "profile": profile}
+    app.router.add_get("/stream", stream_handler)
+    return app
+
+
+async def serve(host: str = "127.0.0.1", port: int = 9001, reuse_port: bool = False, **options) -> web.AppRunner:
+    """Start the server on the running loop and return its runner (call runner.cleanup() to stop)."""
+    runner = web.AppRunner(make_app(**options))
+    await runner.setup()
+    await web.TCPSite(runner, host, port, reuse_port=reuse_port or None).start()
+    return runner
+
+
+def _serve_forever(host: str, port: int, reuse_port: bool, options: dict) -> None:
+    async def _main() -> None:
+        await serve(host, port, reuse_port, **options)
+        await asyncio.Event().wait()
+
+    asyncio.run(_main())
+
+
+def start_in_process(host: str = "127.0.0.1", port: int = 9001, workers: int = 1, **options) -> List[multiprocessing.Process]:
+    """
+    Run the server in background process(es) and wait until it accepts
+    connections; with workers > 1 they share the port (SO_REUSEPORT).
+    options: rate, speed, trades_per_symbol, profile (see make_app).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    for _ in range(workers):
+        proc = ctx.Process(target=_serve_forever, args=(host, port, workers > 1, options), daemon=True)
+        proc.start()
+        procs.append(proc)
+    wait_for_port(host, port)
+    return procs
+
+
+def wait_for_port(host: str, port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rate", type=float, default=None, help="messages/s per connection (default: unthrottled)")
+    parser.add_argument("--speed", type=float, default=None, help="N x real time (overrides --rate)")
+    parser.add_argument("--trades-per-symbol", type=float, default=20.0, help="aggTrades/s per symbol at 1x")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="steady")
+
+
+def server_options(args) -> dict:
+    return {"rate": args.rate, "speed": args.speed, "trades_per_symbol": args.trades_per_symbol, "profile": args.profile}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--workers", type=int, default=1, help="server processes sharing the port")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    if args.workers > 1:
+        for proc in start_in_process(args.host, args.port, args.workers, **server_options(args)):
+            proc.join()
+    else:
+        _serve_forever(args.host, args.port, False, server_options(args))
+
+
+if __name__ == "__main__":
+    main()
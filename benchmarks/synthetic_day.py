@@ -0,0 +1,175 @@
+"""
+Synthetic full-day raw dataset in the recorder's exact layout.
+
+Writes raw/{SYMBOL}/{date}/{HH-MM-SS}_trades.{csv,parquet} and _depth chunks
+(one pair per flush interval, named by flush time like GcsCsvSink) into a
+LOCAL_STORAGE_ROOT-style directory, using the sink's own encoders. Trade
+intensity varies over the day (busy and quiet stretches), prices follow a
+random walk and depth20 snapshots arrive every 100ms around the current price.
+
+    python -m benchmarks.synthetic_day /tmp/lake --bucket bench --symbol BTCUSDT --date 2025-01-02 --trades 3000000
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict
+
+import numpy as np
+
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+from orderflow_recorder.storage.raw_format import chunk_blob_name, encode_depth_columns, encode_trade_columns
+
+DAY_MS = 86_400_000
+
+
+class _Columns:
+    """Duck-typed stand-in for TradeColumns/DepthColumns: the encoders only call arrays()."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self._arrays = arrays
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return self._arrays
+
+
+def chunk_trade_counts(rng: np.random.Generator, trades: int, chunks: int) -> np.ndarray:
+    """Per-chunk trade counts summing to `trades`, with a smooth intraday cycle and bursts."""
+    hours = np.linspace(0, 24, chunks, endpoint=False)
+    # Busier around the EU and US sessions, plus random bursts
+    intensity = 1 + 0.8 * np.exp(-((hours - 9) ** 2) / 4) + 1.5 * np.exp(-((hours - 15.5) ** 2) / 3)
+    intensity *= rng.gamma(2.0, 0.5, chunks)
+    return rng.multinomial(trades, intensity / intensity.sum())
+
+
+def make_trades(rng, start_ms: int, end_ms: int, count: int, price_from: float, price_to: float, first_id: int) -> _Columns:
+    times = np.sort(rng.integers(start_ms, end_ms, count))
+    # Drift along the chunk's price path plus ~1bp noise, in ticks of 0.1
+    prices = np.round(np.linspace(price_from, price_to, count) + rng.normal(0, price_from * 1e-4, count), 1)
+    return _Columns({
+        "event_time": times,
+        "trade_time": times,
+        "price": prices,
+        "quantity": np.round(rng.lognormal(-4, 1.5, count), 3),
+        "is_buyer_maker": rng.random(count) < 0.5,
+        "agg_trade_id": np.arange(first_id, first_id + count, dtype=np.int64),
+    })
+
+
+def make_depth(rng, start_ms: int, end_ms: int, price_from: float, price_to: float, first_id: int, interval_ms: int, levels: int):
+    times = np.arange(start_ms, end_ms, interval_ms, dtype=np.int64)
+    rows = len(times)
+    mids = np.linspace(price_from, price_to, rows)
+    offsets = 0.1 * np.arange(1, levels + 1)
+    ids = np.arange(first_id, first_id + rows, dtype=np.int64)
+    arrays = {
+        "event_time": times,
+        "first_update_id": ids,
+        "final_update_id": ids + 1,
+        "bid_px": np.round(mids[:, None] - offsets, 1),
+        "bid_qty": np.round(rng.exponential(2.0, (rows, levels)), 3),
+        "ask_px": np.round(mids[:, None] + offsets, 1),
+        "ask_qty": np.round(rng.exponential(2.0, (rows, levels)), 3),
+    }
+    return _Columns(arrays)
+
+
+def _write_chunks(root: str, bucket_name: str, symbol: str, date_str: str, day_ms: int, chunk_ms: int,
+                  indexes, counts, prices, fmt: str, depth_interval_ms: int, levels: int, seed: int) -> int:
+    bucket = LocalStorageClient(root).bucket(bucket_name)
+    written = 0
+    for index, count, (price_from, price_to) in zip(indexes, counts, prices):
+        rng = np.random.default_rng((seed, index))
+        start = day_ms + index * chunk_ms
+        end = start + chunk_ms
+        # Named by flush time (end of the buffered interval), as the sink does
+        flush = datetime.fromtimestamp(min(end, day_ms + DAY_MS - 1000) / 1000, tz=timezone.utc)
+        time_str = flush.strftime("%H-%M-%S")
+        trades = make_trades(rng, start, end, int(count), price_from, price_to, index * 10_000_000)
+        payload = encode_trade_columns(trades, symbol, fmt)
+        bucket.blob(chunk_blob_name(symbol, date_str, time_str, "trades", fmt)).upload_from_string(payload)
+        written += len(payload)
+        depth = make_depth(rng, start, end, price_from, price_to, index * 1_000_000, depth_interval_ms, levels)
+        payload = encode_depth_columns(depth, symbol, fmt)
+        bucket.blob(chunk_blob_name(symbol, date_str, time_str, "depth", fmt)).upload_from_string(payload)
+        written += len(payload)
+    return written
+
+
+def write_synthetic_day(
+    root: str,
+    bucket_name: str = "bench",
+    symbol: str = "BTCUSDT",
+    date_str: str = "2025-01-02",
+    trades: int = 3_000_000,
+    chunk_seconds: int = 60,
+    fmt: str = "csv",
+    depth_interval_ms: int = 100,
+    levels: int = 20,
+    seed: int = 0,
+    workers: int = 0,
+) -> Dict[str, float]:
+    """Generate the day (chunks in parallel across processes); returns counts and bytes written."""
+    day_ms = int(datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+    chunk_ms = chunk_seconds * 1000
+    chunks = DAY_MS // chunk_ms
+    rng = np.random.default_rng(seed)
+    counts = chunk_trade_counts(rng, trades, chunks)
+    # Chunk-level price path (start/end price per chunk) so parallel chunks stay continuous
+    path = 35_000.0 * np.exp(np.cumsum(np.r_[0.0, rng.normal(0, 0.002, chunks)]))
+    prices = list(zip(path[:-1], path[1:]))
+
+    workers = workers or os.cpu_count() or 1
+    groups = [list(range(i, chunks, workers)) for i in range(workers)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _write_chunks, root, bucket_name, symbol, date_str, day_ms, chunk_ms,
+                group, counts[group], [prices[i] for i in group], fmt, depth_interval_ms, levels, seed,
+            )
+            for group in groups if group
+        ]
+        written = sum(f.result() for f in futures)
+    return {
+        "chunks": int(chunks) * 2,
+        "trades": int(counts.sum()),
+        "depth_snapshots": int(chunks * (chunk_ms // depth_interval_ms)),
+        "raw_mb": written / 2**20,
+        "generate_seconds": time.perf_counter() - started,
+    }
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--bucket", default="bench")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--date", default="2025-01-02")
+    parser.add_argument("--trades", type=int, default=3_000_000)
+    parser.add_argument("--chunk-seconds", type=int, default=60, help="sink flush interval (BUFFER_SECONDS)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--depth-interval-ms", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def dataset_options(args) -> dict:
+    return {
+        "bucket_name": args.bucket, "symbol": args.symbol, "date_str": args.date, "trades": args.trades,
+        "chunk_seconds": args.chunk_seconds, "fmt": args.format, "depth_interval_ms": args.depth_interval_ms,
+        "seed": args.seed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="LOCAL_STORAGE_ROOT directory")
+    add_dataset_arguments(parser)
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+    stats = write_synthetic_day(args.root, workers=args.workers, **dataset_options(args))
+    for key, value in stats.items():
+        print(f"{key:<16} {value:>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ API_KEY = "orderflow123go"
 SYMBOL = "btcusdt"
 DATE = "2025-12-11"
 RESOLUTION = "1m"
+# Server-side downsampling (OHLC-preserving); more points than this aren't visible anyway
+MAX_POINTS = int(os.environ.get("MAX_POINTS", 2000))
 
 if not API_KEY:
     raise ValueError("API_KEY not found in .env file or environment variables")
@@ -25,7 +27,8 @@ def fetch_data():
     params = {
         "symbol": SYMBOL,
         "date": DATE,
-        "resolution": RESOLUTION
+        "resolution": RESOLUTION,
+        "max_points": MAX_POINTS
     }
     
     try:
@@ -0,0 +1,91 @@
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from orderflow_recorder.config.settings import get_settings, Settings
+from orderflow_recorder.utils.profiling import MEMORY, PROFILER, SLOW_CALLBACKS, ProfilerBusy, task_summary
+
+
+async def verify_admin_token(
+    x_admin_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+):
+    """
+    Admin endpoints exist only if ADMIN_TOKEN is configured (404 otherwise),
+    and require it in the X-Admin-Token header.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(verify_admin_token)], include_in_schema=False)
+
+
+def _run(action, *args):
+    try:
+        return action(*args)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format_: str = Query("top", alias="format", pattern="^(top|collapsed)$"),
+    settings: Settings = Depends(get_settings),
+):
+    """Sampling CPU profile of all threads for `seconds`; 'collapsed' is flamegraph input."""
+    if seconds > settings.admin_profile_max_seconds:
+        raise HTTPException(status_code=400, detail=f"seconds must be <= {settings.admin_profile_max_seconds}")
+    result = await asyncio.to_thread(_run, PROFILER.run, seconds, interval_ms / 1000)
+    if format_ == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return result.top()
+
+
+@router.post("/tracemalloc/start")
+async def tracemalloc_start(frames: int = Query(10, ge=1, le=100)):
+    return _run(MEMORY.start, frames)
+
+
+@router.get("/tracemalloc")
+async def tracemalloc_diff(
+    top: int = Query(25, ge=1, le=1000),
+    key: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    rebase: bool = False,
+):
+    """Top allocation growth since tracemalloc was started (or last rebase)."""
+    return await asyncio.to_thread(_run, MEMORY.diff, top, key, rebase)
+
+
+@router.post("/tracemalloc/stop")
+async def tracemalloc_stop():
+    return MEMORY.stop()
+
+
+@router.get("/tasks")
+async def tasks():
+    return task_summary()
+
+
+@router.post("/slow-callbacks/start")
+async def slow_callbacks_start(threshold_ms: float = Query(50.0, gt=0)):
+    return _run(SLOW_CALLBACKS.start, threshold_ms / 1000)
+
+
+@router.get("/slow-callbacks")
+async def slow_callbacks():
+    return SLOW_CALLBACKS.report()
+
+
+@router.post("/slow-callbacks/stop")
+async def slow_callbacks_stop():
+    return SLOW_CALLBACKS.stop()
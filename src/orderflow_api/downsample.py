@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+DOWNSAMPLE_METHODS = ("ohlc", "lttb")
+
+_SUM_COLUMNS = ["vol_total", "vol_buy", "vol_sell", "vol_delta", "trade_count"]
+# Unweighted: the candle CSVs have no snapshot counts to weight by
+_MEAN_COLUMNS = ["avg_spread", "imbalance_l20"]
+
+
+def downsample(frame: pd.DataFrame, max_points: int, method: str = "ohlc") -> pd.DataFrame:
+    if len(frame) <= max_points:
+        return frame
+    if method == "lttb":
+        return frame.iloc[lttb_indices(frame["time"].to_numpy(), frame["close"].to_numpy(), max_points)]
+    return ohlc_buckets(frame, max_points)
+
+
+def ohlc_buckets(frame: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Merge runs of consecutive candles into at most max_points candles, keeping
+    the true extremes (open first, high max, low min, close last, volumes summed,
+    vwap volume-weighted). time is the bucket's first candle.
+
+    avg_spread / imbalance_l20 are plain means over the bucket's candles. The
+    stored candles carry no depth snapshot counts, so unlike the daily job's
+    pyramid (which weights by snapshot count) this is an unweighted approximation.
+    """
+    n = len(frame)
+    size = -(-n // max_points)
+    starts = np.arange(0, n, size)
+    ends = np.r_[starts[1:], n] - 1
+
+    def col(name: str) -> np.ndarray:
+        return frame[name].to_numpy()
+
+    out = {
+        "time": col("time")[starts],
+        "open": col("open")[starts],
+        "high": np.maximum.reduceat(col("high"), starts),
+        "low": np.minimum.reduceat(col("low"), starts),
+        "close": col("close")[ends],
+    }
+    for name in _SUM_COLUMNS:
+        out[name] = np.add.reduceat(col(name), starts)
+
+    # NaN-aware means: sums and counts of the present values only
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = col("vwap").astype(np.float64)
+        vol = col("vol_total").astype(np.float64)
+        has_vwap = ~np.isnan(vwap)
+        notional = np.add.reduceat(np.where(has_vwap, vwap * vol, 0.0), starts)
+        weight = np.add.reduceat(np.where(has_vwap, vol, 0.0), starts)
+        out["vwap"] = np.where(weight > 0, notional / weight, np.nan)
+        for name in _MEAN_COLUMNS:
+            values = col(name).astype(np.float64)
+            present = ~np.isnan(values)
+            total = np.add.reduceat(np.where(present, values, 0.0), starts)
+            count = np.add.reduceat(present.astype(np.int64), starts)
+            out[name] = np.where(count > 0, total / count, np.nan)
+
+    return pd.DataFrame(out)[list(frame.columns)]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the
+    visual shape of (x, y). First and last points are always kept; per bucket the
+    triangle areas are computed vectorized, so the Python loop is per output point.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = hi
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
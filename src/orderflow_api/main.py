@@ -1,11 +1,18 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Header, status
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
 from fastapi import FastAPI
 from pydantic import BaseModel
 
 from orderflow_recorder.config.settings import get_settings, Settings
-from orderflow_api.service import get_candle_data
+from orderflow_recorder.process.aggregate import CANDLE_RESOLUTIONS
+from orderflow_api.encoding import (
+    FORMATS, MEDIA_JSON, MEDIA_NDJSON, STREAMABLE, encode_candles, negotiate, stream_candles,
+)
+from orderflow_api.admin import router as admin_router
+from orderflow_api.downsample import DOWNSAMPLE_METHODS, downsample
+from orderflow_api.service import FOOTPRINT, get_candle_range, iter_candle_blocks
 
 app = FastAPI(title="Orderflow Data API", version="0.1.0")
 
@@ -44,10 +51,16 @@ class Candle(BaseModel):
     vol_sell: float
     vol_delta: float
     trade_count: int
+    # Only present in files aggregated with depth data; None for empty seconds
+    vwap: Optional[float] = None
+    avg_spread: Optional[float] = None
+    imbalance_l20: Optional[float] = None
 
 class CandleResponse(BaseModel):
     symbol: str
-    date: str
+    date: Optional[str] = None  # set for single-day requests
+    start: int  # Unix timestamp, inclusive
+    end: int  # Unix timestamp, exclusive
     resolution: str
     count: int
     data: List[Candle]
@@ -55,48 +68,167 @@ class CandleResponse(BaseModel):
 # --- Routes ---
 router = APIRouter(prefix="/api/v1", dependencies=[Depends(verify_api_key)])
 
-@router.get("/candles", response_model=CandleResponse)
+def parse_time_param(value: str, name: str) -> int:
+    """Unix seconds ('1702252800') or ISO 8601 ('2025-12-11T14:00:00Z'; naive = UTC)."""
+    try:
+        if value.lstrip("-").replace(".", "", 1).isdigit():
+            return int(float(value))
+        ts = pd.Timestamp(value)
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+        return int(ts.timestamp())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}': use unix seconds or ISO 8601")
+
+
+def resolve_range(date: Optional[str], from_: Optional[str], to: Optional[str], max_days: int):
+    """[start, end) in unix seconds from either a date or from/to (to defaults to now)."""
+    if from_ is None:
+        if date is None:
+            raise HTTPException(status_code=400, detail="Provide either 'date' or 'from' (and optionally 'to')")
+        try:
+            day = pd.Timestamp(date, tz="UTC")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid 'date': use YYYY-MM-DD")
+        start = int(day.timestamp())
+        return start, start + 86_400
+
+    start = parse_time_param(from_, "from")
+    end = parse_time_param(to, "to") if to is not None else int(pd.Timestamp.now(tz="UTC").timestamp())
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > max_days * 86_400:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {max_days} days)")
+    return start, end
+
+
+@router.get(
+    "/candles",
+    response_model=CandleResponse,
+    responses={200: {"content": {media_type: {} for media_type in FORMATS.values()}}},
+)
 async def get_candles(
     symbol: str, 
-    date: str, 
+    date: Optional[str] = None,
     resolution: str = "1m",
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    format_: Optional[str] = Query(None, alias="format"),
+    stream: bool = False,
+    max_points: Optional[int] = Query(None, ge=3),
+    method: str = "ohlc",
+    accept: Optional[str] = Header(None),
     settings: Settings = Depends(get_settings)
 ):
     """
-    Fetch aggregated candle data for a specific day.
+    Fetch aggregated candle data for a specific day or a time range.
     
     - **symbol**: e.g. 'btcusdt'
-    - **date**: Format 'YYYY-MM-DD'
-    - **resolution**: '1m' or '1s'
+    - **date**: Format 'YYYY-MM-DD' (whole day)
+    - **from** / **to**: unix seconds or ISO 8601, candles with from <= time < to; may span days
+    - **resolution**: one of '1s', '5s', '15s', '1m', '5m', '15m', '1h', '1d'
+    - **format** (or Accept header): 'json' (rows, default), 'columns' (one array per
+      field), 'arrow' (Arrow IPC stream) or 'msgpack' (columns, msgpack-encoded)
+    - **stream**: send the response in blocks while day files are read, with bounded
+      memory (NDJSON rows, or Arrow record batches with format=arrow); 'ndjson' always streams
+    - **max_points**: reduce the series server-side to at most this many candles, with
+      **method** 'ohlc' (merge neighbouring candles, extremes preserved) or 'lttb'
+      (Largest-Triangle-Three-Buckets on close, picks representative candles)
     """
+    media_type = negotiate(accept, format_)
+    if stream and media_type == MEDIA_JSON:
+        media_type = MEDIA_NDJSON
+    stream = stream or media_type == MEDIA_NDJSON
+    if stream and media_type not in STREAMABLE:
+        raise HTTPException(status_code=400, detail="Streaming supports format=ndjson or format=arrow")
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    if stream and max_points is not None:
+        raise HTTPException(status_code=400, detail="max_points cannot be combined with streaming")
+
     # Validate resolution
-    if resolution not in ["1m", "1s"]:
-        raise HTTPException(status_code=400, detail="Resolution must be '1m' or '1s'")
+    if resolution not in CANDLE_RESOLUTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"Resolution must be one of {', '.join(CANDLE_RESOLUTIONS)}"
+        )
+    max_days = settings.api_max_stream_days if stream else settings.api_max_range_days
+    start, end = resolve_range(date, from_, to, max_days)
+    meta = {
+        "symbol": symbol.upper(),
+        "date": date if from_ is None else None,
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+    }
+
+    if stream:
+        blocks = iter_candle_blocks(settings.gcs_bucket_name, symbol.upper(), resolution, start, end)
+        first = await anext(blocks, None)
+        if first is None:
+            raise HTTPException(status_code=404, detail=f"No data found for {symbol} in the requested range")
+        return stream_candles(media_type, meta, first, blocks)
 
     try:
-        data = await get_candle_data(
+        frame = await get_candle_range(
             bucket_name=settings.gcs_bucket_name,
             symbol=symbol.upper(),
-            date_str=date,
-            resolution=resolution
-        )
-        
-        if not data:
-            raise HTTPException(status_code=404, detail=f"No data found for {symbol} on {date}")
-            
-        return CandleResponse(
-            symbol=symbol.upper(),
-            date=date,
             resolution=resolution,
-            count=len(data),
-            data=data
+            start=start,
+            end=end,
         )
     except Exception as e:
         # Log error here in real app
         print(f"Error fetching data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if not len(frame):
+        raise HTTPException(status_code=404, detail=f"No data found for {symbol} in the requested range")
+
+    if max_points is not None:
+        frame = downsample(frame, max_points, method)
+
+    # Serialized straight from the columns; no per-row Candle models
+    return encode_candles(media_type, meta, frame)
+
+@router.get("/footprint", responses={200: {"content": {media_type: {} for media_type in FORMATS.values()}}})
+async def get_footprint(
+    symbol: str,
+    date: Optional[str] = None,
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    format_: Optional[str] = Query(None, alias="format"),
+    accept: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Volume-at-price per 1m candle (footprint), precomputed by the daily job.
+    Sparse rows: time (minute start), price (bin lower edge), tick (bin size),
+    vol_buy, vol_sell, trade_count. Same date / from / to and format options as /candles.
+    """
+    media_type = negotiate(accept, format_)
+    if media_type == MEDIA_NDJSON:
+        raise HTTPException(status_code=400, detail="Streaming is only available for /candles")
+    start, end = resolve_range(date, from_, to, settings.api_max_range_days)
+
+    try:
+        frame = await get_candle_range(settings.gcs_bucket_name, symbol.upper(), FOOTPRINT, start, end)
+    except Exception as e:
+        print(f"Error fetching footprint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not len(frame):
+        raise HTTPException(status_code=404, detail=f"No footprint data for {symbol} in the requested range")
+
+    meta = {
+        "symbol": symbol.upper(),
+        "date": date if from_ is None else None,
+        "start": start,
+        "end": end,
+        "resolution": "1m",
+    }
+    return encode_candles(media_type, meta, frame)
+
 app.include_router(router)
+app.include_router(admin_router)
 
 @app.get("/health")
 def health_check():
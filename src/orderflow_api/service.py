@@ -1,10 +1,14 @@
 import asyncio
 import io
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
-from google.cloud import storage
-import os
-from pathlib import Path
+
+from orderflow_recorder.config.settings import get_settings
+from orderflow_recorder.storage.clients import get_storage_client
 
 # Cache GCS client to reuse connection pool
 _gcs_client = None
@@ -12,56 +16,245 @@ _gcs_client = None
 def get_gcs_client():
     global _gcs_client
     if _gcs_client is None:
-        # Helper to get client with credentials if local
-        key_path = Path("gcp-key.json")
-        if key_path.exists() and not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(key_path.absolute())
-        _gcs_client = storage.Client()
+        # Helper to get client with credentials if local (or the LOCAL_STORAGE_ROOT stand-in)
+        _gcs_client = get_storage_client(get_settings())
     return _gcs_client
 
+
+CacheKey = Tuple[str, str, str, str]  # (bucket, symbol, date, resolution)
+
+# Columns returned by the API; the optional ones are NaN (-> null) where missing
+CANDLE_FIELDS = [
+    'time', 'open', 'high', 'low', 'close',
+    'vol_total', 'vol_buy', 'vol_sell', 'vol_delta', 'trade_count',
+]
+OPTIONAL_FIELDS = ['vwap', 'avg_spread', 'imbalance_l20']
+
+# Sparse volume-at-price rows (daily job: aggregated/{SYMBOL}/{date}_footprint_1m.csv)
+FOOTPRINT = 'footprint_1m'
+FOOTPRINT_FIELDS = ['time', 'price', 'tick', 'vol_buy', 'vol_sell', 'trade_count']
+
+
+class CandleCache:
+    """
+    Parsed candle days keyed by (bucket, symbol, date, resolution), bounded by
+    their in-memory size with LRU eviction. Entries remember the object
+    generation they were parsed from, so a hit only costs a metadata lookup;
+    rewritten files (intraday runs) are picked up by the generation change.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey, generation: Any) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: CacheKey, generation: Any, frame: pd.DataFrame) -> None:
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._discard(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (generation, frame, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def discard(self, key: CacheKey) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+
+
+_cache: Optional[CandleCache] = None
+# Concurrent misses for the same key share one fetch
+_inflight: Dict[CacheKey, "asyncio.Future"] = {}
+
+
+def get_candle_cache() -> CandleCache:
+    global _cache
+    if _cache is None:
+        _cache = CandleCache(get_settings().api_cache_max_bytes)
+    return _cache
+
+
 async def get_candle_data(bucket_name: str, symbol: str, date_str: str, resolution: str) -> List[Dict[str, Any]]:
     """
     Downloads the CSV from GCS and converts it to a list of dicts for the API response.
     Non-blocking (runs in thread pool).
     """
-    return await asyncio.to_thread(_fetch_and_parse, bucket_name, symbol, date_str, resolution)
+    frame = await get_candle_frame(bucket_name, symbol, date_str, resolution)
+    return frame_to_records(frame) if frame is not None else []
+
+
+async def get_candle_frame(
+    bucket_name: str, symbol: str, date_str: str, resolution: str, populate: bool = True
+) -> Optional[pd.DataFrame]:
+    """
+    One day of candles as a frame sorted by 'time' (unix seconds), or None.
+    Served from the parsed-day cache when the object generation is unchanged.
+    The frame is shared with the cache: callers must not modify it.
+    With populate=False a miss is loaded without being cached (bulk reads).
+    """
+    if not populate:
+        return await asyncio.to_thread(_fetch_and_parse, bucket_name, symbol, date_str, resolution, False)
+    key = (bucket_name, symbol, date_str, resolution)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(_fetch_and_parse, bucket_name, symbol, date_str, resolution))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: one cancelled request must not cancel the fetch other requests wait on
+    return await asyncio.shield(task)
+
 
-def _fetch_and_parse(bucket_name: str, symbol: str, date_str: str, resolution: str) -> List[Dict[str, Any]]:
+async def get_candle_range(
+    bucket_name: str, symbol: str, resolution: str, start: int, end: int
+) -> pd.DataFrame:
+    """
+    Candles with start <= time < end (unix seconds) across day files. The days
+    are fetched concurrently, each is sliced by binary search on its sorted time
+    column, and the slices are stitched in order.
+    """
+    dates = _range_dates(start, end)
+    frames = await asyncio.gather(*[get_candle_frame(bucket_name, symbol, d, resolution) for d in dates])
+    slices = [s for s in (_slice(frame, start, end) for frame in frames) if s is not None]
+    if not slices:
+        return _empty_frame()
+    return pd.concat(slices, ignore_index=True) if len(slices) > 1 else slices[0]
+
+
+async def iter_candle_blocks(
+    bucket_name: str, symbol: str, resolution: str, start: int, end: int, block_rows: int = 10_000
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    Like get_candle_range, but yields blocks of at most block_rows rows day by
+    day, with only the next day prefetched. Memory per request is bounded by
+    two day files regardless of how long the range is. Days already cached are
+    reused, but misses are not cached, so a long export doesn't evict hot days.
+    """
+    dates = _range_dates(start, end)
+    pending = asyncio.ensure_future(get_candle_frame(bucket_name, symbol, dates[0], resolution, populate=False))
+    try:
+        for i in range(len(dates)):
+            frame = await pending
+            pending = None
+            if i + 1 < len(dates):
+                pending = asyncio.ensure_future(
+                    get_candle_frame(bucket_name, symbol, dates[i + 1], resolution, populate=False)
+                )
+            day = _slice(frame, start, end)
+            if day is None:
+                continue
+            for offset in range(0, len(day), block_rows):
+                yield day.iloc[offset:offset + block_rows]
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def _range_dates(start: int, end: int) -> List[str]:
+    first_day = pd.Timestamp(start, unit="s", tz="UTC").normalize()
+    last_day = pd.Timestamp(end - 1, unit="s", tz="UTC").normalize()
+    return [d.strftime("%Y-%m-%d") for d in pd.date_range(first_day, last_day, freq="D")]
+
+
+def _slice(frame: Optional[pd.DataFrame], start: int, end: int) -> Optional[pd.DataFrame]:
+    if frame is None:
+        return None
+    times = frame["time"].to_numpy()
+    lo = np.searchsorted(times, start, side="left")
+    hi = np.searchsorted(times, end, side="left")
+    return frame.iloc[lo:hi] if hi > lo else None
+
+
+def frame_to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Row dicts for the JSON response; missing optional values become None."""
+    out = frame.astype(object)
+    for col in OPTIONAL_FIELDS:
+        out[col] = out[col].where(frame[col].notna(), None)
+    return out.to_dict(orient='records')
+
+
+def _empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({col: pd.Series(dtype="float64") for col in CANDLE_FIELDS + OPTIONAL_FIELDS})
+
+
+def _fetch_and_parse(
+    bucket_name: str, symbol: str, date_str: str, resolution: str, populate: bool = True
+) -> Optional[pd.DataFrame]:
     client = get_gcs_client()
     bucket = client.bucket(bucket_name)
+    cache = get_candle_cache()
+    key = (bucket_name, symbol, date_str, resolution)
     
     # Path format: aggregated/BTCUSDT/2024-12-11_1m.csv
     blob_path = f"aggregated/{symbol}/{date_str}_{resolution}.csv"
-    blob = bucket.blob(blob_path)
+    # Metadata only (no download); None if the object doesn't exist
+    blob = bucket.get_blob(blob_path)
     
-    if not blob.exists():
-        return []
+    if blob is None:
+        cache.discard(key)
+        return None
+
+    generation = blob.generation
+    frame = cache.get(key, generation)
+    if frame is not None:
+        return frame
         
     content = blob.download_as_text()
     if not content.strip():
-        return []
+        return None
+
+    frame = _parse_footprint(content) if resolution == FOOTPRINT else _parse_candles(content)
+    if populate:
+        cache.put(key, generation, frame)
+    return frame
+
 
+def _parse_candles(content: str) -> pd.DataFrame:
     # Parse with Pandas
     df = pd.read_csv(io.StringIO(content))
     
-    # Transform to API format (list of dicts)
+    # Transform to API format
     # 1. Convert timestamp to Unix int (seconds) or millis
     # TradingView charts usually like Unix seconds
     df['time'] = pd.to_datetime(df['timestamp']).astype(int) // 10**9
     
-    # Select columns we want
-    cols = [
-        'time', 'open', 'high', 'low', 'close', 
-        'vol_total', 'vol_buy', 'vol_sell', 'vol_delta', 'trade_count'
-    ]
-    
     # Ensure all columns exist (in case CSV schema drifts)
-    # If missing, fill with 0
-    for col in cols:
+    # If missing, fill with 0 (optional depth/VWAP columns: NaN, i.e. null)
+    for col in CANDLE_FIELDS:
         if col not in df.columns:
             df[col] = 0
-            
-    # Convert to list of dicts
-    records = df[cols].to_dict(orient='records')
-    return records
+    for col in OPTIONAL_FIELDS:
+        if col not in df.columns:
+            df[col] = np.nan
+    
+    # Sorted by time: range queries slice with binary search
+    return df[CANDLE_FIELDS + OPTIONAL_FIELDS].sort_values('time', kind='stable', ignore_index=True)
 
+
+def _parse_footprint(content: str) -> pd.DataFrame:
+    df = pd.read_csv(io.StringIO(content))
+    df['time'] = pd.to_datetime(df['timestamp']).astype(int) // 10**9
+    return df[FOOTPRINT_FIELDS].sort_values(['time', 'price'], kind='stable', ignore_index=True)
@@ -0,0 +1 @@
+# Offline analysis over recorded data (see ANALYSIS_ROADMAP.md)
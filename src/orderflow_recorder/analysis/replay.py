@@ -0,0 +1,377 @@
+"""
+Historical replay of recorded orderflow.
+
+Streams raw chunks (raw/{SYMBOL}/{date}/...) or, once the daily job has run,
+the archived day (archive/{SYMBOL}/{date}_raw.zip), and merges trades and depth
+snapshots of all requested symbols into one event-time ordered stream of
+TradeRecord / DepthRecord, the shapes RecorderCallbacks receives from the typed
+decoder. Chunks are downloaded and decoded ahead of the merge on a thread pool.
+
+    replay = Replay(bucket, ["BTCUSDT", "ETHUSDT"], start, end)
+    for record in replay:                  # or: async for record in replay
+        ...
+    await replay.feed(strategy_callbacks)  # on_trade / on_depth_update
+
+Depth levels are replayed as [[price, qty], ...] floats rather than the strings
+Binance sends. Within one symbol and kind, records are sorted by event time per
+chunk and chunks follow flush order, i.e. the order the recorder received them.
+"""
+import asyncio
+import heapq
+import logging
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from itertools import islice, repeat
+from operator import itemgetter
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.storage.raw_format import chunk_kind, read_depth_chunk, read_trade_arrays
+
+log = logging.getLogger("replay")
+
+REPLAY_SOURCES = ("auto", "raw", "archive")
+REPLAY_KINDS = ("trades", "depth")
+
+# Chunks are named by flush time and hold what arrived since the previous flush;
+# keep reading this long past `end` so slightly late events are not lost.
+LATE_EVENT_MS = 5_000
+
+# event_time is field 1 of both TradeRecord and DepthRecord
+_event_time = itemgetter(1)
+
+Record = Union[TradeRecord, DepthRecord]
+
+
+def _to_ms(value: Union[datetime, int]) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def _flush_ms(date_str: str, file_name: str) -> Optional[int]:
+    """Flush time of a chunk from its HH-MM-SS_ prefix (None if the name doesn't carry one)."""
+    try:
+        flushed = datetime.strptime(f"{date_str} {file_name[:8]}", "%Y-%m-%d %H-%M-%S")
+    except ValueError:
+        return None
+    return _to_ms(flushed)
+
+
+class _ArchiveDay:
+    """archive/{SYMBOL}/{date}_raw.zip, spooled to a temp file once and read member by member."""
+
+    def __init__(self, blob) -> None:
+        self._blob = blob
+        self._lock = threading.Lock()
+        self._zip: Optional[zipfile.ZipFile] = None
+
+    def _open(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            spool = tempfile.TemporaryFile()
+            self._blob.download_to_file(spool)
+            spool.seek(0)
+            self._zip = zipfile.ZipFile(spool)
+        return self._zip
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return self._open().namelist()
+
+    def read(self, member: str) -> bytes:
+        with self._lock:
+            return self._open().read(member)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._zip is not None:
+                spool = self._zip.fp
+                self._zip.close()
+                spool.close()
+                self._zip = None
+
+
+class _Day:
+    """Chunks of one symbol-day, shared by its trades and depth streams."""
+
+    def __init__(self, chunks: Dict[str, List[Tuple[str, Optional[int], Callable[[], bytes]]]],
+                 archive: Optional[_ArchiveDay], users: int) -> None:
+        self.chunks = chunks
+        self._archive = archive
+        self._users = users
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Called by each stream when done with the day; the archive is dropped after the last one."""
+        with self._lock:
+            self._users -= 1
+            done = self._users <= 0
+        if done:
+            self.close()
+
+    def close(self) -> None:
+        if self._archive is not None:
+            self._archive.close()
+
+
+def list_day(bucket, symbol: str, date_str: str, source: str = "auto", users: int = 1) -> _Day:
+    """
+    Chunks of one symbol-day by kind, in flush order, as (label, flush_ms, load).
+    'auto' reads the raw chunks if any are left, else the daily job's archive.
+    """
+    chunks: Dict[str, list] = {kind: [] for kind in REPLAY_KINDS}
+    if source in ("auto", "raw"):
+        blobs = sorted((b for b in bucket.list_blobs(prefix=f"raw/{symbol}/{date_str}/") if chunk_kind(b.name)), key=lambda b: b.name)
+        for blob in blobs:
+            file_name = blob.name.rsplit("/", 1)[-1]
+            chunks[chunk_kind(blob.name)].append((blob.name, _flush_ms(date_str, file_name), blob.download_as_bytes))
+        if blobs or source == "raw":
+            return _Day(chunks, None, users)
+
+    blob = bucket.blob(f"archive/{symbol}/{date_str}_raw.zip")
+    if not blob.exists():
+        return _Day(chunks, None, users)
+    archive = _ArchiveDay(blob)
+    for member in sorted(n for n in archive.names() if chunk_kind(n)):
+        label = f"{blob.name}:{member}"
+        chunks[chunk_kind(member)].append((label, _flush_ms(date_str, member), partial(archive.read, member)))
+    return _Day(chunks, archive, users)
+
+
+def _window(event_time: np.ndarray, start_ms: int, end_ms: int) -> np.ndarray:
+    """Row indexes inside [start_ms, end_ms), in event-time order (missing times sort out as -1)."""
+    order = np.argsort(event_time, kind="stable")
+    lo, hi = np.searchsorted(event_time[order], [start_ms, end_ms])
+    return order[lo:hi]
+
+
+def _optional_ints(values: np.ndarray) -> list:
+    out = values.tolist()
+    if len(values) and values.min() < 0:
+        out = [v if v >= 0 else None for v in out]
+    return out
+
+
+def _levels(px: np.ndarray, qty: np.ndarray) -> list:
+    # (rows, levels, 2) -> nested [[price, qty], ...] lists in one tolist() call
+    rows = np.stack([px, qty], axis=2).tolist()
+    missing = np.isnan(px)
+    if missing.any():
+        # Books shallower than the chunk's width are NaN-padded at the end
+        depth = (~missing).sum(axis=1).tolist()
+        rows = [row[:n] for row, n in zip(rows, depth)]
+    return rows
+
+
+def trade_records(symbol: str, arrays: Dict[str, np.ndarray], start_ms: int, end_ms: int) -> List[TradeRecord]:
+    """TradeRecords from read_trade_arrays() output, limited to [start_ms, end_ms) and sorted."""
+    idx = _window(arrays["event_time"], start_ms, end_ms)
+    return list(map(
+        TradeRecord,
+        repeat(symbol, len(idx)),
+        arrays["event_time"][idx].tolist(),
+        _optional_ints(arrays["trade_time"][idx]),
+        arrays["price"][idx].tolist(),
+        arrays["quantity"][idx].tolist(),
+        arrays["is_buyer_maker"][idx].tolist(),
+        _optional_ints(arrays["agg_trade_id"][idx]),
+    ))
+
+
+def depth_records(
+    symbol: str, arrays: Dict[str, np.ndarray], start_ms: int, end_ms: int, levels: Optional[int] = None
+) -> List[DepthRecord]:
+    """DepthRecords from read_depth_chunk(with_ids=True) output, limited to [start_ms, end_ms) and sorted."""
+    idx = _window(arrays["event_time"], start_ms, end_ms)
+    width = slice(None, levels)
+    return list(map(
+        DepthRecord,
+        repeat(symbol, len(idx)),
+        arrays["event_time"][idx].tolist(),
+        _optional_ints(arrays["first_update_id"][idx]),
+        _optional_ints(arrays["final_update_id"][idx]),
+        _levels(arrays["bid_px"][idx, width], arrays["bid_qty"][idx, width]),
+        _levels(arrays["ask_px"][idx, width], arrays["ask_qty"][idx, width]),
+    ))
+
+
+class Replay:
+    """
+    Event-time ordered replay of trades and depth for `symbols` over [start, end).
+
+    start/end are datetimes (naive = UTC) or epoch ms. kinds limits the streams
+    ("trades", "depth"), levels caps the depth levels per side, as_dicts yields
+    to_dict() shapes (parse_*_message output) instead of records. Each stream
+    keeps `prefetch` chunks downloading/decoding ahead on `workers` threads.
+    """
+
+    def __init__(
+        self,
+        bucket,
+        symbols: Sequence[str],
+        start: Union[datetime, int],
+        end: Union[datetime, int],
+        kinds: Sequence[str] = REPLAY_KINDS,
+        source: str = "auto",
+        levels: Optional[int] = None,
+        as_dicts: bool = False,
+        prefetch: int = 4,
+        workers: int = 8,
+        batch_size: int = 10_000,
+    ) -> None:
+        if source not in REPLAY_SOURCES:
+            raise ValueError(f"source must be one of {', '.join(REPLAY_SOURCES)}")
+        unknown = set(kinds) - set(REPLAY_KINDS)
+        if unknown or not kinds:
+            raise ValueError(f"kinds must be a non-empty subset of {', '.join(REPLAY_KINDS)}")
+        self.bucket = bucket
+        self.symbols = [s.upper() for s in symbols]
+        self.start_ms = _to_ms(start)
+        self.end_ms = _to_ms(end)
+        self.kinds = list(kinds)
+        self.source = source
+        self.levels = levels
+        self.as_dicts = as_dicts
+        self.prefetch = max(1, prefetch)
+        self.batch_size = batch_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replay")
+
+        # Late events of the last day can sit in the first chunks of the next one
+        first = datetime.fromtimestamp(self.start_ms / 1000, tz=timezone.utc).date()
+        last = datetime.fromtimestamp((self.end_ms + LATE_EVENT_MS - 1) / 1000, tz=timezone.utc).date()
+        self.dates = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+    def __iter__(self) -> Iterator[Union[Record, dict]]:
+        days: Dict[Tuple[str, str], Future] = {}
+        lock = threading.Lock()
+        streams = [self._stream(symbol, kind, days, lock) for symbol in self.symbols for kind in self.kinds]
+        try:
+            merged = heapq.merge(*streams, key=_event_time)
+            if self.as_dicts:
+                for record in merged:
+                    yield record.to_dict()
+            else:
+                yield from merged
+        finally:
+            for stream in streams:
+                stream.close()
+            for future in days.values():
+                future.add_done_callback(_close_day)
+
+    def _day(self, symbol: str, index: int, days: Dict, lock: threading.Lock) -> Optional[Future]:
+        """Listing of the index-th day for symbol, started once and shared across kinds."""
+        if index >= len(self.dates):
+            return None
+        key = (symbol, self.dates[index])
+        with lock:
+            if key not in days:
+                days[key] = self._pool.submit(list_day, self.bucket, symbol, key[1], self.source, len(self.kinds))
+            return days[key]
+
+    def _chunk_tasks(self, symbol: str, kind: str, days: Dict, lock: threading.Lock) -> Iterator[Union[Callable[[], list], _Day]]:
+        """Decode tasks in chunk order, each day followed by the _Day itself once its chunks are queued."""
+        for index in range(len(self.dates)):
+            day = self._day(symbol, index, days, lock).result()
+            # List the next day in the background while this one is replayed
+            self._day(symbol, index + 1, days, lock)
+            past_end = False
+            for label, flush_ms, load in day.chunks[kind]:
+                if flush_ms is not None and flush_ms < self.start_ms:
+                    continue
+                yield partial(self._decode, symbol, kind, label, load)
+                if flush_ms is not None and flush_ms >= self.end_ms + LATE_EVENT_MS:
+                    past_end = True
+                    break
+            yield day
+            if past_end:
+                return
+
+    def _decode(self, symbol: str, kind: str, label: str, load: Callable[[], bytes]) -> list:
+        data = load()
+        if not data or data.isspace():
+            return []
+        try:
+            if kind == "trades":
+                return trade_records(symbol, read_trade_arrays(label, data), self.start_ms, self.end_ms)
+            return depth_records(symbol, read_depth_chunk(label, data, with_ids=True), self.start_ms, self.end_ms, self.levels)
+        except Exception as e:
+            log.warning(f"Skipping unreadable chunk {label}: {e}")
+            return []
+
+    def _schedule(self, tasks: Iterable) -> Iterator:
+        for task in tasks:
+            yield task if isinstance(task, _Day) else self._pool.submit(task)
+
+    def _stream(self, symbol: str, kind: str, days: Dict, lock: threading.Lock) -> Iterator[Record]:
+        tasks = self._chunk_tasks(symbol, kind, days, lock)
+        pending = deque(self._schedule(islice(tasks, self.prefetch)))
+        try:
+            while pending:
+                item = pending.popleft()
+                pending.extend(self._schedule(islice(tasks, 1)))
+                if isinstance(item, _Day):
+                    # Every chunk of the day before it has been consumed
+                    item.release()
+                    continue
+                yield from item.result()
+        finally:
+            for item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+            tasks.close()
+
+    async def batches(self) -> AsyncIterator[list]:
+        """Async iteration in lists of up to batch_size, each pulled on a worker thread."""
+        records = iter(self)
+        try:
+            while True:
+                batch = await asyncio.to_thread(lambda: list(islice(records, self.batch_size)))
+                if not batch:
+                    return
+                yield batch
+        finally:
+            records.close()
+
+    async def __aiter__(self) -> AsyncIterator[Union[Record, dict]]:
+        async for batch in self.batches():
+            for record in batch:
+                yield record
+
+    async def feed(self, callbacks) -> int:
+        """
+        Drive anything with RecorderCallbacks' interface (on_trade /
+        on_depth_update coroutines) in event order; returns the number of events.
+        """
+        on_trade, on_depth = callbacks.on_trade, callbacks.on_depth_update
+        count = 0
+        async for batch in self.batches():
+            for record in batch:
+                if isinstance(record, TradeRecord) or (self.as_dicts and record["type"] == "trade"):
+                    await on_trade(record)
+                else:
+                    await on_depth(record)
+            count += len(batch)
+        return count
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "Replay":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _close_day(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
@@ -0,0 +1,301 @@
+"""
+Phase 1 of ANALYSIS_ROADMAP.md: how often and how far does price move?
+
+Loads the daily job's aggregated candles (aggregated/{SYMBOL}/{date}_{res}.csv)
+for a date range, computes rolling N-minute returns for several windows at once,
+and turns every run of returns beyond the threshold into one event (its peak
+return). Events are bucketed by size, pumps and dumps separately:
+
+    python -m orderflow_recorder.analysis.volatility_report --days 7 --windows 5,15 --threshold 0.5
+    python -m orderflow_recorder.analysis.volatility_report --start 2025-01-01 --end 2025-01-31 \\
+        --symbols BTCUSDT,ETHUSDT --resolution 1m --processes 4 --out report/
+
+Symbols are scanned in parallel processes; within a symbol the days are
+downloaded and parsed on a thread pool.
+"""
+import argparse
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from orderflow_recorder.config.settings import get_settings
+from orderflow_recorder.process.aggregate import CANDLE_RESOLUTIONS
+from orderflow_recorder.storage.clients import get_storage_client
+
+log = logging.getLogger("volatility_report")
+
+DEFAULT_WINDOWS = (5, 15)  # minutes
+DEFAULT_THRESHOLD = 0.005
+DEFAULT_STEP = 0.001
+DEFAULT_CAP = 0.02
+
+EVENT_COLUMNS = ["symbol", "window", "direction", "start", "peak_time", "end", "bars", "peak_return"]
+HISTOGRAM_COLUMNS = ["symbol", "window", "direction", "bucket", "low", "high", "events"]
+
+
+def get_gcs_client():
+    return get_storage_client(get_settings())
+
+
+class ScanResult(NamedTuple):
+    events: pd.DataFrame     # EVENT_COLUMNS, one row per pump/dump
+    histogram: pd.DataFrame  # HISTOGRAM_COLUMNS, event counts per size bucket
+
+
+def date_range(start: date, end: date) -> List[str]:
+    """Inclusive list of YYYY-MM-DD strings."""
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def bar_seconds(resolution: str) -> int:
+    return to_offset(CANDLE_RESOLUTIONS[resolution]).nanos // 10**9
+
+
+def _load_day(bucket, symbol: str, date_str: str, resolution: str) -> Optional[pd.Series]:
+    blob = bucket.get_blob(f"aggregated/{symbol}/{date_str}_{resolution}.csv")
+    if blob is None:
+        return None
+    content = blob.download_as_bytes()
+    if not content.strip():
+        return None
+    df = pd.read_csv(io.BytesIO(content), usecols=["timestamp", "close"])
+    seconds = pd.to_datetime(df["timestamp"], utc=True).astype("int64") // 10**9
+    return pd.Series(df["close"].to_numpy(dtype=np.float64), index=seconds.to_numpy())
+
+
+def load_closes(bucket, symbol: str, dates: Sequence[str], resolution: str = "1m", workers: int = 8) -> pd.Series:
+    """
+    Close prices of all days on one regular grid (index: epoch seconds). Days
+    are fetched concurrently; missing days stay NaN so no return spans a gap.
+    """
+    step = bar_seconds(resolution)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(dates)))) as pool:
+        days = [s for s in pool.map(lambda d: _load_day(bucket, symbol, d, resolution), dates) if s is not None and len(s)]
+    if not days:
+        return pd.Series(dtype=np.float64)
+    closes = pd.concat(days)
+    # Intraday rewrites can overlap the nightly file at a day boundary: keep the last
+    closes = closes[~closes.index.duplicated(keep="last")].sort_index()
+    grid = np.arange(closes.index[0], closes.index[-1] + step, step, dtype=np.int64)
+    return closes.reindex(grid)
+
+
+def rolling_returns(close: np.ndarray, bars: Sequence[int]) -> np.ndarray:
+    """
+    close / close.shift(n) - 1 for every n in bars at once: a (len(bars), len(close))
+    matrix, NaN where the lookback runs off the start or hits a NaN close.
+    """
+    bars = np.asarray(bars, dtype=np.int64)
+    n = len(close)
+    if not n:
+        return np.empty((len(bars), 0))
+    lookback = int(bars.max())
+    padded = np.concatenate([np.full(lookback, np.nan), close])
+    past = padded[lookback + np.arange(n)[None, :] - bars[:, None]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return close[None, :] / past - 1
+
+
+def find_events(returns: np.ndarray, threshold: float) -> List[np.ndarray]:
+    """
+    Collapse runs of consecutive bars beyond +/-threshold (same sign) into events.
+    Per row of `returns`: an (events, 4) int array of start, peak, end (inclusive)
+    bar and sign (+1 pump, -1 dump).
+    """
+    out = []
+    for row in returns:
+        with np.errstate(invalid="ignore"):
+            sign = np.where(row >= threshold, 1, np.where(row <= -threshold, -1, 0))
+        # A run starts where the sign changes to non-zero
+        change = np.flatnonzero(np.diff(sign, prepend=0))
+        starts = change[sign[change] != 0]
+        if not len(starts):
+            out.append(np.empty((0, 4), dtype=np.int64))
+            continue
+        ends = np.r_[change, len(sign)]
+        ends = ends[np.searchsorted(ends, starts, side="right")] - 1
+        magnitude = np.where(np.isnan(row), 0.0, np.abs(row))
+        peaks = np.array([s + int(np.argmax(magnitude[s:e + 1])) for s, e in zip(starts, ends)], dtype=np.int64)
+        out.append(np.column_stack([starts, peaks, ends, sign[starts]]))
+    return out
+
+
+def bucket_edges(threshold: float = DEFAULT_THRESHOLD, step: float = DEFAULT_STEP, cap: float = DEFAULT_CAP) -> np.ndarray:
+    """threshold, threshold + step, ..., cap; the last bucket is open-ended (> cap)."""
+    count = int(round((cap - threshold) / step))
+    return np.round(threshold + step * np.arange(count + 1), 10)
+
+
+def bucket_labels(edges: np.ndarray) -> List[str]:
+    labels = [f"{lo:.1%} - {hi:.1%}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return labels + [f"> {edges[-1]:.1%}"]
+
+
+def scan_closes(
+    symbol: str,
+    closes: pd.Series,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    threshold: float = DEFAULT_THRESHOLD,
+    step: float = DEFAULT_STEP,
+    cap: float = DEFAULT_CAP,
+    resolution: str = "1m",
+) -> ScanResult:
+    """Events and histogram for one symbol's close series (as returned by load_closes)."""
+    seconds = bar_seconds(resolution)
+    bars = []
+    for minutes in windows:
+        if (minutes * 60) % seconds:
+            raise ValueError(f"window {minutes}m is not a multiple of the {resolution} resolution")
+        bars.append(minutes * 60 // seconds)
+
+    close = closes.to_numpy(dtype=np.float64)
+    times = closes.index.to_numpy(dtype=np.int64)
+    returns = rolling_returns(close, bars)
+    edges = bucket_edges(threshold, step, cap)
+    labels = bucket_labels(edges)
+
+    events, histogram = [], []
+    for minutes, row, found in zip(windows, returns, find_events(returns, threshold)):
+        start, peak, end, sign = found.T
+        peak_return = row[peak]
+        events.append(pd.DataFrame({
+            "symbol": symbol,
+            "window": minutes,
+            "direction": np.where(sign > 0, "pump", "dump"),
+            # Bars (closes) at which the rolling return was first / last beyond the threshold
+            "start": pd.to_datetime(times[start], unit="s", utc=True),
+            "peak_time": pd.to_datetime(times[peak], unit="s", utc=True),
+            "end": pd.to_datetime(times[end], unit="s", utc=True),
+            "bars": end - start + 1,
+            "peak_return": peak_return,
+        }, columns=EVENT_COLUMNS))
+        for direction, selected in (("pump", sign > 0), ("dump", sign < 0)):
+            # Bucket i holds [edges[i], edges[i+1]); the last one everything above cap
+            index = np.searchsorted(edges, np.abs(peak_return[selected]), side="right") - 1
+            counts = np.bincount(np.clip(index, 0, len(labels) - 1), minlength=len(labels))
+            histogram.append(pd.DataFrame({
+                "symbol": symbol,
+                "window": minutes,
+                "direction": direction,
+                "bucket": labels,
+                "low": edges,
+                "high": np.r_[edges[1:], np.inf],
+                "events": counts,
+            }, columns=HISTOGRAM_COLUMNS))
+
+    return ScanResult(
+        pd.concat(events, ignore_index=True).sort_values(["window", "peak_time"], ignore_index=True),
+        pd.concat(histogram, ignore_index=True),
+    )
+
+
+def scan_symbol(
+    bucket_name: str,
+    symbol: str,
+    dates: Sequence[str],
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    threshold: float = DEFAULT_THRESHOLD,
+    step: float = DEFAULT_STEP,
+    cap: float = DEFAULT_CAP,
+    resolution: str = "1m",
+    load_workers: int = 8,
+) -> ScanResult:
+    """Load and scan one symbol (runs in a worker process in scan())."""
+    bucket = get_gcs_client().bucket(bucket_name)
+    closes = load_closes(bucket, symbol, dates, resolution, load_workers)
+    log.info(f"{symbol}: {closes.notna().sum()} {resolution} closes over {len(dates)} days")
+    return scan_closes(symbol, closes, windows, threshold, step, cap, resolution)
+
+
+def scan(
+    bucket_name: str,
+    symbols: Sequence[str],
+    dates: Sequence[str],
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    threshold: float = DEFAULT_THRESHOLD,
+    step: float = DEFAULT_STEP,
+    cap: float = DEFAULT_CAP,
+    resolution: str = "1m",
+    processes: int = 1,
+    load_workers: int = 8,
+) -> ScanResult:
+    """All symbols, in parallel processes when processes > 1 (same pattern as the daily job)."""
+    args = (dates, windows, threshold, step, cap, resolution, load_workers)
+    processes = min(processes, len(symbols))
+    if processes <= 1:
+        results = [scan_symbol(bucket_name, symbol.upper(), *args) for symbol in symbols]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(scan_symbol, bucket_name, symbol.upper(), *args) for symbol in symbols]
+            results = [future.result() for future in futures]
+    if not results:
+        return ScanResult(pd.DataFrame(columns=EVENT_COLUMNS), pd.DataFrame(columns=HISTOGRAM_COLUMNS))
+    return ScanResult(
+        pd.concat([r.events for r in results], ignore_index=True),
+        pd.concat([r.histogram for r in results], ignore_index=True),
+    )
+
+
+def format_report(result: ScanResult) -> str:
+    """Per window: event counts per bucket, pumps and dumps side by side, one column per symbol."""
+    lines = []
+    histogram = result.histogram
+    for minutes in histogram["window"].unique():
+        rows = histogram[histogram["window"] == minutes]
+        table = rows.pivot_table(
+            index=["low", "bucket"], columns=["direction", "symbol"], values="events", aggfunc="sum", sort=False
+        ).droplevel("low")
+        symbols = rows["symbol"].unique()
+        table = table[[(direction, symbol) for direction in ("pump", "dump") for symbol in symbols]]
+        table.index.name = None
+        lines.append(f"=== {minutes}m returns ===")
+        lines.append(table.to_string())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", default=",".join(settings.symbols_futures), help="comma separated (default: SYMBOLS_FUTURES)")
+    parser.add_argument("--start", help="YYYY-MM-DD (default: --days before --end)")
+    parser.add_argument("--end", help="YYYY-MM-DD, inclusive (default: yesterday)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--windows", default=",".join(map(str, DEFAULT_WINDOWS)), help="return windows in minutes")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD * 100, help="minimum move in percent")
+    parser.add_argument("--step", type=float, default=DEFAULT_STEP * 100, help="bucket width in percent")
+    parser.add_argument("--cap", type=float, default=DEFAULT_CAP * 100, help="last bucket is everything above (percent)")
+    parser.add_argument("--resolution", choices=list(CANDLE_RESOLUTIONS), default="1m")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--load-workers", type=int, default=8, help="days downloaded concurrently per symbol")
+    parser.add_argument("--out", help="directory for events.csv and histogram.csv")
+    args = parser.parse_args()
+
+    end = date.fromisoformat(args.end) if args.end else datetime.now(timezone.utc).date() - timedelta(days=1)
+    start = date.fromisoformat(args.start) if args.start else end - timedelta(days=args.days - 1)
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    result = scan(
+        settings.gcs_bucket_name, symbols, date_range(start, end),
+        windows=[int(w) for w in args.windows.split(",")],
+        threshold=args.threshold / 100, step=args.step / 100, cap=args.cap / 100,
+        resolution=args.resolution, processes=args.processes, load_workers=args.load_workers,
+    )
+
+    print(f"{', '.join(symbols)} {start} .. {end}: {len(result.events)} events")
+    print(format_report(result))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        result.events.to_csv(os.path.join(args.out, "events.csv"), index=False)
+        result.histogram.to_csv(os.path.join(args.out, "histogram.csv"), index=False)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    main()
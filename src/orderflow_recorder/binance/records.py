@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class TradeRecord(NamedTuple):
+	"""
+	Compact typed aggTrade. Timestamps stay as Binance epoch milliseconds.
+	"""
+	symbol: str
+	event_time: int
+	trade_time: int
+	price: float
+	quantity: float
+	is_buyer_maker: bool
+	agg_trade_id: Optional[int]
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""Same shape as parse_trade_message() output."""
+		return {
+			"source": "binance-futures",
+			"type": "trade",
+			"symbol": self.symbol,
+			"event_time": _ms_to_datetime(self.event_time),
+			"trade_time": _ms_to_datetime(self.trade_time),
+			"price": self.price,
+			"quantity": self.quantity,
+			"is_buyer_maker": self.is_buyer_maker,
+			"agg_trade_id": self.agg_trade_id,
+		}
+
+
+class DepthRecord(NamedTuple):
+	"""
+	Compact typed partial-depth snapshot. bids/asks are kept as the raw
+	[[price, qty], ...] string lists; they are converted column-wise at flush time.
+	"""
+	symbol: str
+	event_time: int
+	first_update_id: Optional[int]
+	final_update_id: Optional[int]
+	bids: List[List[str]]
+	asks: List[List[str]]
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""Same shape as parse_depth_message() output."""
+		return {
+			"source": "binance-futures",
+			"type": "orderbook",
+			"symbol": self.symbol,
+			"event_time": _ms_to_datetime(self.event_time),
+			"first_update_id": self.first_update_id,
+			"final_update_id": self.final_update_id,
+			"bids": self.bids,
+			"asks": self.asks,
+		}
+
+
+def _ms_to_datetime(ts_ms: Optional[int]) -> Optional[datetime]:
+	if ts_ms is None:
+		return None
+	return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
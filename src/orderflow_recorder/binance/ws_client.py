@@ -1,37 +1,147 @@
 import asyncio
 import json
+import math
+import time
 from datetime import datetime, timezone
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 import websockets
 from websockets import WebSocketClientProtocol
 
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
 from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.utils import metrics
 from orderflow_recorder.utils.logging import get_logger
 from orderflow_recorder.storage.sinks import OrderbookSink, TradeSink
 
 
+# Route kinds for the pre-resolved stream table
+_DEPTH = 0
+_TRADE = 1
+
+# 1 in N frames/events gets its parse/dispatch time recorded (keeps perf_counter off the hot path)
+TIMING_SAMPLE_MASK = 63
+
+# Binance caps the number of streams per (combined stream) connection
+BINANCE_MAX_STREAMS_PER_CONNECTION = 200
+STREAMS_PER_SYMBOL = 2
+
+
+def shard_symbols(symbols: List[str], shards: int = 1, max_streams: int = BINANCE_MAX_STREAMS_PER_CONNECTION) -> List[List[str]]:
+	"""
+	Split symbols round-robin into at least `shards` groups, adding groups until
+	none exceeds max_streams streams (depth + trade per symbol). Empty groups are dropped.
+	"""
+	per_group = max(1, max_streams // STREAMS_PER_SYMBOL)
+	count = max(1, shards, math.ceil(len(symbols) / per_group))
+	groups = [symbols[i::count] for i in range(count)]
+	return [g for g in groups if g]
+
+
+class IngestStats:
+	"""
+	Per-connection ingest counters. Feed lag is local receive time minus the
+	Binance event time `E` (includes clock skew); lag and queue high-water are
+	windowed and reset by take_window().
+	"""
+
+	__slots__ = (
+		"received_by_kind", "processed", "dropped_depth", "errors", "reconnects",
+		"lag_count", "lag_sum_ms", "lag_max_ms", "queue_max",
+	)
+
+	def __init__(self) -> None:
+		# Indexed by route kind (_DEPTH, _TRADE)
+		self.received_by_kind = [0, 0]
+		self.processed = 0
+		self.reconnects = 0
+		self.dropped_depth = 0
+		self.errors = 0
+		self.lag_count = 0
+		self.lag_sum_ms = 0.0
+		self.lag_max_ms = 0.0
+		self.queue_max = 0
+
+	@property
+	def received(self) -> int:
+		return self.received_by_kind[_DEPTH] + self.received_by_kind[_TRADE]
+
+	def observe_lag(self, lag_ms: float) -> None:
+		self.lag_count += 1
+		self.lag_sum_ms += lag_ms
+		if lag_ms > self.lag_max_ms:
+			self.lag_max_ms = lag_ms
+
+	def take_window(self) -> Dict[str, float]:
+		"""Snapshot of the counters plus lag/queue stats since the previous call."""
+		window = {
+			"received": self.received,
+			"processed": self.processed,
+			"dropped_depth": self.dropped_depth,
+			"errors": self.errors,
+			"lag_avg_ms": self.lag_sum_ms / self.lag_count if self.lag_count else 0.0,
+			"lag_max_ms": self.lag_max_ms,
+			"queue_max": self.queue_max,
+		}
+		self.lag_count = 0
+		self.lag_sum_ms = 0.0
+		self.lag_max_ms = 0.0
+		self.queue_max = 0
+		return window
+
+
 class FuturesWSClient:
 	def __init__(
 		self,
 		settings: Settings,
-		on_depth_update: Callable[[dict], Awaitable[None]],
-		on_trade: Callable[[dict], Awaitable[None]],
+		on_depth_update: Callable[[Any], Awaitable[None]],
+		on_trade: Callable[[Any], Awaitable[None]],
+		symbols: Optional[List[str]] = None,
+		name: str = "",
 	) -> None:
 		self._settings = settings
 		self._on_depth_update = on_depth_update
 		self._on_trade = on_trade
 		self._log = get_logger()
 		self._base_url = self._settings.binance_ws_futures_base_url.rstrip("/")
-		self._symbols = [s.lower() for s in self._settings.symbols_futures]
+		# Subset of symbols for this connection (sharded ingest); default: all configured
+		self._symbols = [s.lower() for s in (symbols if symbols is not None else self._settings.symbols_futures)]
+		# Log prefix to tell shards apart
+		self._name = f"[{name}] " if name else ""
 		self._depth_suffix = self._settings.futures_streams_depth
 		self._trade_suffix = self._settings.futures_streams_trades
 
+		# "dict" keeps the normalized dict output, "typed" emits TradeRecord/DepthRecord
+		if self._settings.ws_decoder == "typed":
+			self._decode_depth = decode_depth_record
+			self._decode_trade = decode_trade_record
+		else:
+			self._decode_depth = _parse_depth_dict
+			self._decode_trade = _parse_trade_dict
+
+		# stream name -> (kind, SYMBOL), filled by _build_streams_query
+		self._routes: Dict[str, Tuple[int, str]] = {}
+
+		# Bounded hand-off between the socket reader and the callbacks, so a slow
+		# sink does not stall reading (and get us disconnected). None = inline.
+		queue_size = self._settings.ingest_queue_size
+		self._queue: Optional[asyncio.Queue] = asyncio.Queue(maxsize=queue_size) if queue_size > 0 else None
+		self._drop_depth = self._settings.ingest_overflow == "drop_depth"
+		self.stats = IngestStats()
+		self._label = name or "main"
+		self._metric_sources = self._build_metric_sources()
+
 	def _build_streams_query(self) -> str:
 		streams: List[str] = []
+		routes: Dict[str, Tuple[int, str]] = {}
 		for sym in self._symbols:
-			streams.append(f"{sym}@{self._depth_suffix}")
-			streams.append(f"{sym}@{self._trade_suffix}")
+			depth_stream = f"{sym}@{self._depth_suffix}"
+			trade_stream = f"{sym}@{self._trade_suffix}"
+			streams.append(depth_stream)
+			streams.append(trade_stream)
+			routes[depth_stream] = (_DEPTH, sym.upper())
+			routes[trade_stream] = (_TRADE, sym.upper())
+		self._routes = routes
 		return "/".join(streams)
 
 	async def run_forever(self) -> None:
@@ -44,31 +154,96 @@ class FuturesWSClient:
 		streams_query = self._build_streams_query()
 		uri = f"{self._base_url}?streams={streams_query}"
 
-		self._log.info(f"Connecting to Binance Futures WS: {uri}")
+		self._log.info(f"{self._name}Connecting to Binance Futures WS ({len(self._symbols)} symbols): {uri}")
 
-		while True:
-			try:
-				async with websockets.connect(
-					uri,
-					ping_interval=20,
-					ping_timeout=20,
-					max_size=10 * 1024 * 1024,
-				) as ws:
-					backoff_seconds = 1
-					await self._read_loop(ws)
-			except asyncio.CancelledError:
-				self._log.warning("WS client cancelled, shutting down.")
-				raise
-			except Exception as exc:
-				self._log.error(f"WS connection error: {exc!r}")
-				self._log.info(f"Reconnecting in {backoff_seconds} seconds...")
-				await asyncio.sleep(backoff_seconds)
-				backoff_seconds = min(backoff_seconds * 2, max_backoff)
+		# Consumer and stats reporter live across reconnects; queued events are not lost
+		background = []
+		if self._queue is not None:
+			background.append(asyncio.create_task(self._consume_loop()))
+		if self._settings.ingest_stats_interval > 0:
+			background.append(asyncio.create_task(self._stats_loop(self._settings.ingest_stats_interval)))
+		for metric, source in self._metric_sources:
+			metric.add_source(source)
+
+		try:
+			while True:
+				try:
+					async with websockets.connect(
+						uri,
+						ping_interval=20,
+						ping_timeout=20,
+						max_size=10 * 1024 * 1024,
+					) as ws:
+						backoff_seconds = 1
+						await self._read_loop(ws)
+				except asyncio.CancelledError:
+					self._log.warning(f"{self._name}WS client cancelled, shutting down.")
+					raise
+				except Exception as exc:
+					self.stats.reconnects += 1
+					self._log.error(f"{self._name}WS connection error: {exc!r}")
+					self._log.info(f"{self._name}Reconnecting in {backoff_seconds} seconds...")
+					await asyncio.sleep(backoff_seconds)
+					backoff_seconds = min(backoff_seconds * 2, max_backoff)
+		finally:
+			# The reader has stopped; hand what is already queued to the sink before the consumer goes
+			if self._queue is not None:
+				await self._drain_queue(self._settings.ingest_drain_timeout)
+			for task in background:
+				task.cancel()
+			for metric, source in self._metric_sources:
+				metric.remove_source(source)
+
+	async def _drain_queue(self, timeout: float) -> None:
+		pending = self._queue.qsize()
+		try:
+			# join() also waits for the event the consumer is dispatching right now
+			await asyncio.wait_for(self._queue.join(), timeout)
+			if pending:
+				self._log.info(f"{self._name}Drained {pending} queued events on shutdown")
+		except asyncio.TimeoutError:
+			self._log.error(f"{self._name}Shutdown drain timed out; {self._queue.qsize()} queued events lost")
+
+	def _build_metric_sources(self):
+		"""(callback metric, source) pairs exposing this connection's IngestStats on /metrics."""
+		label = self._label
+		stats = self.stats
+		queue = self._queue
+		return [
+			(metrics.WS_MESSAGES, lambda: [
+				({"shard": label, "kind": "depth"}, stats.received_by_kind[_DEPTH]),
+				({"shard": label, "kind": "trade"}, stats.received_by_kind[_TRADE]),
+			]),
+			(metrics.WS_DROPPED, lambda: [({"shard": label}, stats.dropped_depth)]),
+			(metrics.WS_RECONNECTS, lambda: [({"shard": label}, stats.reconnects)]),
+			(metrics.WS_QUEUE, lambda: [({"shard": label}, queue.qsize() if queue is not None else 0)]),
+		]
 
 	async def _read_loop(self, ws: WebSocketClientProtocol) -> None:
+		# Bind hot-path lookups once per connection
+		loads = json.loads
+		now = time.time
+		perf = time.perf_counter
+		observe_parse = metrics.WS_PARSE.observe
+		routes = self._routes
+		stats = self.stats
+		received_by_kind = stats.received_by_kind
+		queue = self._queue
+		drop_depth = self._drop_depth
+		dispatch = self._dispatch
+		seq = 0
+
 		async for msg in ws:
+			recv_ms = now() * 1000.0
+			seq += 1
+			sampled = not seq & TIMING_SAMPLE_MASK
 			try:
-				payload = json.loads(msg)
+				if sampled:
+					started = perf()
+					payload = loads(msg)
+					observe_parse(perf() - started)
+				else:
+					payload = loads(msg)
 			except json.JSONDecodeError:
 				self._log.warning("Received non-JSON message, ignoring.")
 				continue
@@ -79,26 +254,77 @@ class FuturesWSClient:
 				self._log.debug("Message missing 'stream' or 'data', ignoring.")
 				continue
 
-			if self._is_depth_stream(stream):
-				try:
-					normalized = parse_depth_message(data)
-					await self._on_depth_update(normalized)
-				except Exception as exc:
-					self._log.error(f"Error processing depth message: {exc!r}")
-			elif self._is_trade_stream(stream):
-				try:
-					normalized = parse_trade_message(data)
-					await self._on_trade(normalized)
-				except Exception as exc:
-					self._log.error(f"Error processing trade message: {exc!r}")
-			else:
+			route = routes.get(stream)
+			if route is None:
 				self._log.debug(f"Ignoring stream '{stream}' not matching depth/trade.")
+				continue
 
-	def _is_depth_stream(self, stream: str) -> bool:
-		return stream.endswith(f"@{self._depth_suffix}")
+			kind, symbol = route
+			received_by_kind[kind] += 1
+			event_ms = data.get("E")
+			if event_ms is not None:
+				stats.observe_lag(recv_ms - event_ms)
+
+			if queue is None:
+				await dispatch(kind, data, symbol)
+				continue
+
+			size = queue.qsize()
+			if size > stats.queue_max:
+				stats.queue_max = size
+			if size < queue.maxsize:
+				queue.put_nowait((kind, data, symbol))
+			elif drop_depth and kind == _DEPTH:
+				# Depth snapshots are superseded by the next one; trades are never dropped
+				stats.dropped_depth += 1
+			else:
+				await queue.put((kind, data, symbol))
+
+	async def _consume_loop(self) -> None:
+		queue = self._queue
+		dispatch = self._dispatch
+		while True:
+			kind, data, symbol = await queue.get()
+			try:
+				await dispatch(kind, data, symbol)
+			finally:
+				queue.task_done()
+
+	async def _dispatch(self, kind: int, data: Dict[str, Any], symbol: str) -> None:
+		stats = self.stats
+		sampled = not stats.processed & TIMING_SAMPLE_MASK
+		if sampled:
+			started = time.perf_counter()
+		if kind == _DEPTH:
+			try:
+				await self._on_depth_update(self._decode_depth(data, symbol))
+			except Exception as exc:
+				self.stats.errors += 1
+				self._log.error(f"Error processing depth message: {exc!r}")
+		else:
+			try:
+				await self._on_trade(self._decode_trade(data, symbol))
+			except Exception as exc:
+				self.stats.errors += 1
+				self._log.error(f"Error processing trade message: {exc!r}")
+		stats.processed += 1
+		if sampled:
+			metrics.WS_DISPATCH.observe(time.perf_counter() - started, "depth" if kind == _DEPTH else "trade")
 
-	def _is_trade_stream(self, stream: str) -> bool:
-		return stream.endswith(f"@{self._trade_suffix}")
+	async def _stats_loop(self, interval: float) -> None:
+		warn_ms = self._settings.ingest_lag_warn_ms
+		while True:
+			await asyncio.sleep(interval)
+			w = self.stats.take_window()
+			line = (
+				f"{self._name}ingest: received={w['received']} processed={w['processed']} "
+				f"dropped_depth={w['dropped_depth']} queue_max={w['queue_max']} "
+				f"lag_avg={w['lag_avg_ms']:.0f}ms lag_max={w['lag_max_ms']:.0f}ms"
+			)
+			if w["lag_max_ms"] > warn_ms:
+				self._log.warning(f"{line} (falling behind the feed)")
+			else:
+				self._log.info(line)
 
 
 def _ts_ms_to_datetime(ts_ms: Optional[int]) -> Optional[datetime]:
@@ -174,15 +400,57 @@ def parse_trade_message(raw: Dict[str, Any]) -> Dict[str, Any]:
 	}
 
 
+def decode_depth_record(raw: Dict[str, Any], symbol: str) -> DepthRecord:
+	"""
+	Fast-path depth decode into a DepthRecord. symbol comes from the pre-resolved
+	stream route, so no per-message string handling is needed.
+	"""
+	return DepthRecord(
+		symbol,
+		raw.get("E"),
+		raw.get("U"),
+		raw.get("u"),
+		raw.get("b") or [],
+		raw.get("a") or [],
+	)
+
+
+def decode_trade_record(raw: Dict[str, Any], symbol: str) -> TradeRecord:
+	"""
+	Fast-path aggTrade decode into a TradeRecord (timestamps stay in ms).
+	"""
+	return TradeRecord(
+		symbol,
+		raw.get("E"),
+		raw.get("T"),
+		float(raw.get("p") or 0),
+		float(raw.get("q") or 0),
+		raw.get("m") is True,
+		raw.get("a"),
+	)
+
+
+def _parse_depth_dict(raw: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+	return parse_depth_message(raw)
+
+
+def _parse_trade_dict(raw: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+	return parse_trade_message(raw)
+
+
 class RecorderCallbacks:
-	def __init__(self, trade_sink: TradeSink, orderbook_sink: OrderbookSink) -> None:
+	def __init__(self, trade_sink: TradeSink, orderbook_sink: OrderbookSink, live=None) -> None:
 		self._trade_sink = trade_sink
 		self._orderbook_sink = orderbook_sink
+		# Optional ingest.live.LiveCandles fed from the same trade stream
+		self._live = live
 
-	async def on_trade(self, trade: dict) -> None:
+	async def on_trade(self, trade: Union[dict, TradeRecord]) -> None:
+		if self._live is not None:
+			self._live.on_trade(trade)
 		await self._trade_sink.write_trade(trade)
 
-	async def on_depth_update(self, depth: dict) -> None:
+	async def on_depth_update(self, depth: Union[dict, DepthRecord]) -> None:
 		await self._orderbook_sink.write_orderbook(depth)
 
 
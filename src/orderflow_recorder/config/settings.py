@@ -25,6 +25,58 @@ class Settings(BaseSettings):
     futures_streams_depth: str = "depth20@100ms"
     futures_streams_trades: str = "aggTrade"
 
+    ws_decoder: str = Field(
+        default="dict",
+        validation_alias=AliasChoices("WS_DECODER", "ws_decoder"),
+        description="'dict' (normalized dicts) or 'typed' (compact TradeRecord/DepthRecord fast path)"
+    )
+
+    ws_shards: int = Field(
+        default=1,
+        validation_alias=AliasChoices("WS_SHARDS", "ws_shards"),
+        description="Minimum number of WS connections the symbols are spread over (more are added above the per-connection stream cap)"
+    )
+
+    ws_max_streams_per_connection: int = Field(
+        default=200,
+        validation_alias=AliasChoices("WS_MAX_STREAMS_PER_CONNECTION", "ws_max_streams_per_connection"),
+    )
+
+    ingest_queue_size: int = Field(
+        default=10_000,
+        validation_alias=AliasChoices("INGEST_QUEUE_SIZE", "ingest_queue_size"),
+        description="Bounded queue between the socket reader and the sink callbacks per connection (0 = process inline)"
+    )
+
+    ingest_overflow: str = Field(
+        default="block",
+        validation_alias=AliasChoices("INGEST_OVERFLOW", "ingest_overflow"),
+        description="'block' (reader waits for the queue) or 'drop_depth' (depth snapshots are dropped while the queue is full, trades still wait)"
+    )
+
+    ingest_drain_timeout: float = Field(
+        default=10.0,
+        validation_alias=AliasChoices("INGEST_DRAIN_TIMEOUT", "ingest_drain_timeout"),
+        description="Seconds the consumer may keep draining already-queued events into the sink on shutdown"
+    )
+
+    ingest_stats_interval: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("INGEST_STATS_INTERVAL", "ingest_stats_interval"),
+        description="Seconds between ingest stats log lines (feed lag, queue depth, drops); 0 disables"
+    )
+
+    ingest_lag_warn_ms: float = Field(
+        default=1_000.0,
+        validation_alias=AliasChoices("INGEST_LAG_WARN_MS", "ingest_lag_warn_ms"),
+    )
+
+    ingest_processes: int = Field(
+        default=1,
+        validation_alias=AliasChoices("INGEST_PROCESSES", "ingest_processes"),
+        description="Worker processes for ingest; symbols are split across them, each with its own connections and sink"
+    )
+
     gcs_bucket_name: str = Field(
         default="orderflow-data-lake",
         validation_alias=AliasChoices("GCS_BUCKET_NAME", "gcs_bucket_name"),
@@ -35,6 +87,73 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("BUFFER_SECONDS", "buffer_seconds"),
     )
 
+    raw_format: str = Field(
+        default="csv",
+        validation_alias=AliasChoices("RAW_FORMAT", "raw_format"),
+        description="Encoding of raw chunks: 'csv' (legacy) or 'parquet' (typed, zstd)"
+    )
+
+    local_storage_root: str = Field(
+        default="",
+        validation_alias=AliasChoices("LOCAL_STORAGE_ROOT", "local_storage_root"),
+        description="If set, use this directory as a local stand-in for GCS (offline runs/tests)"
+    )
+
+    spool_dir: str = Field(
+        default="",
+        validation_alias=AliasChoices("SPOOL_DIR", "spool_dir"),
+        description="If set, flushed chunks are spooled to this directory and uploaded asynchronously"
+    )
+
+    spool_segment_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        validation_alias=AliasChoices("SPOOL_SEGMENT_MAX_BYTES", "spool_segment_max_bytes"),
+    )
+
+    spool_upload_concurrency: int = Field(
+        default=4,
+        validation_alias=AliasChoices("SPOOL_UPLOAD_CONCURRENCY", "spool_upload_concurrency"),
+    )
+
+    spool_upload_max_attempts: int = Field(
+        default=5,
+        validation_alias=AliasChoices("SPOOL_UPLOAD_MAX_ATTEMPTS", "spool_upload_max_attempts"),
+    )
+
+    job_download_workers: int = Field(
+        default=16,
+        validation_alias=AliasChoices("JOB_DOWNLOAD_WORKERS", "job_download_workers"),
+        description="Concurrent raw chunk downloads per symbol-day in the daily job"
+    )
+
+    job_processes: int = Field(
+        default=1,
+        validation_alias=AliasChoices("JOB_PROCESSES", "job_processes"),
+        description="Worker processes for the daily job (symbol-days processed in parallel)"
+    )
+
+    live_candles: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("LIVE_CANDLES", "live_candles"),
+        description="Build rolling 1s/1m candles in the recorder and serve them on /live/*"
+    )
+
+    live_history_1s: int = Field(
+        default=3600,
+        validation_alias=AliasChoices("LIVE_HISTORY_1S", "live_history_1s"),
+    )
+
+    live_history_1m: int = Field(
+        default=1440,
+        validation_alias=AliasChoices("LIVE_HISTORY_1M", "live_history_1m"),
+    )
+
+    footprint_ticks: str = Field(
+        default="",
+        validation_alias=AliasChoices("FOOTPRINT_TICKS", "footprint_ticks"),
+        description="Footprint price bin per symbol, e.g. 'BTCUSDT:10,ETHUSDT:0.5' (others: ~1bp power of ten)"
+    )
+
     log_level: str = Field(
         default="INFO",
         validation_alias=AliasChoices("LOG_LEVEL", "log_level"),
@@ -46,6 +165,35 @@ class Settings(BaseSettings):
         description="Secret key to protect the API"
     )
 
+    admin_token: str = Field(
+        default="",
+        validation_alias=AliasChoices("ADMIN_TOKEN", "admin_token"),
+        description="Enables /admin diagnostics (profiling, tracemalloc, tasks) on recorder and API; sent as X-Admin-Token"
+    )
+
+    admin_profile_max_seconds: float = Field(
+        default=120.0,
+        validation_alias=AliasChoices("ADMIN_PROFILE_MAX_SECONDS", "admin_profile_max_seconds"),
+    )
+
+    api_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        validation_alias=AliasChoices("API_CACHE_MAX_BYTES", "api_cache_max_bytes"),
+        description="Memory bound for the API's parsed-candle cache (LRU, revalidated by object generation)"
+    )
+
+    api_max_range_days: int = Field(
+        default=31,
+        validation_alias=AliasChoices("API_MAX_RANGE_DAYS", "api_max_range_days"),
+        description="Longest from/to range (in days) a single candles request may span"
+    )
+
+    api_max_stream_days: int = Field(
+        default=366,
+        validation_alias=AliasChoices("API_MAX_STREAM_DAYS", "api_max_stream_days"),
+        description="Longest range for streamed (stream=true / ndjson) candle requests"
+    )
+
     @field_validator("symbols_futures")
     @classmethod
     def parse_symbols_list(cls, v: Union[str, List[str]]) -> List[str]:
@@ -54,6 +202,30 @@ class Settings(BaseSettings):
             return [s.strip() for s in v.split(",") if s.strip()]
         return v
 
+    @field_validator("ws_decoder")
+    @classmethod
+    def validate_ws_decoder(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("dict", "typed"):
+            raise ValueError("WS_DECODER must be 'dict' or 'typed'")
+        return v
+
+    @field_validator("ingest_overflow")
+    @classmethod
+    def validate_ingest_overflow(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("block", "drop_depth"):
+            raise ValueError("INGEST_OVERFLOW must be 'block' or 'drop_depth'")
+        return v
+
+    @field_validator("raw_format")
+    @classmethod
+    def validate_raw_format(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("csv", "parquet"):
+            raise ValueError("RAW_FORMAT must be 'csv' or 'parquet'")
+        return v
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
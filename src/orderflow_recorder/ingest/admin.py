@@ -0,0 +1,97 @@
+import asyncio
+import hmac
+
+from aiohttp import web
+
+from orderflow_recorder.utils.profiling import MEMORY, PROFILER, SLOW_CALLBACKS, ProfilerBusy, task_summary
+
+
+def _query_number(request: web.Request, name: str, default: float, cast=float, low=None, high=None):
+    raw = request.query.get(name)
+    try:
+        value = cast(raw) if raw is not None else default
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be a number")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise web.HTTPBadRequest(text=f"{name} must be between {low} and {high}")
+    return value
+
+
+def add_admin_routes(app: web.Application, admin_token: str, max_profile_seconds: float = 120.0) -> None:
+    """
+    Diagnostics for a running recorder, only registered when admin_token is set
+    (sent as X-Admin-Token):
+
+    GET  /admin/profile?seconds=10&interval_ms=5&format=top|collapsed  -> sampling CPU profile
+    POST /admin/tracemalloc/start?frames=10                            -> start + baseline
+    GET  /admin/tracemalloc?top=25&key=lineno&rebase=false             -> growth since baseline
+    POST /admin/tracemalloc/stop
+    GET  /admin/tasks                                                  -> asyncio task counts
+    POST /admin/slow-callbacks/start?threshold_ms=50
+    GET  /admin/slow-callbacks
+    POST /admin/slow-callbacks/stop
+    """
+    if not admin_token:
+        return
+
+    @web.middleware
+    async def require_token(request: web.Request, handler):
+        if request.path.startswith("/admin/"):
+            if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), admin_token):
+                raise web.HTTPUnauthorized(text="Invalid admin token")
+            try:
+                return await handler(request)
+            except ProfilerBusy as exc:
+                raise web.HTTPConflict(text=str(exc))
+            except RuntimeError as exc:
+                raise web.HTTPBadRequest(text=str(exc))
+        return await handler(request)
+
+    async def profile(request: web.Request) -> web.Response:
+        seconds = _query_number(request, "seconds", 10.0, low=0.1, high=max_profile_seconds)
+        interval_ms = _query_number(request, "interval_ms", 5.0, low=1.0, high=1000.0)
+        fmt = request.query.get("format", "top")
+        if fmt not in ("top", "collapsed"):
+            raise web.HTTPBadRequest(text="format must be 'top' or 'collapsed'")
+        result = await asyncio.to_thread(PROFILER.run, seconds, interval_ms / 1000)
+        if fmt == "collapsed":
+            return web.Response(text=result.collapsed())
+        return web.json_response(result.top())
+
+    async def tracemalloc_start(request: web.Request) -> web.Response:
+        frames = _query_number(request, "frames", 10, cast=int, low=1, high=100)
+        return web.json_response(MEMORY.start(frames))
+
+    async def tracemalloc_diff(request: web.Request) -> web.Response:
+        top = _query_number(request, "top", 25, cast=int, low=1, high=1000)
+        key = request.query.get("key", "lineno")
+        if key not in ("lineno", "filename", "traceback"):
+            raise web.HTTPBadRequest(text="key must be 'lineno', 'filename' or 'traceback'")
+        rebase = request.query.get("rebase", "false").lower() in ("1", "true", "yes")
+        return web.json_response(await asyncio.to_thread(MEMORY.diff, top, key, rebase))
+
+    async def tracemalloc_stop(request: web.Request) -> web.Response:
+        return web.json_response(MEMORY.stop())
+
+    async def tasks(request: web.Request) -> web.Response:
+        return web.json_response(task_summary())
+
+    async def slow_start(request: web.Request) -> web.Response:
+        threshold_ms = _query_number(request, "threshold_ms", 50.0, low=0.1)
+        return web.json_response(SLOW_CALLBACKS.start(threshold_ms / 1000))
+
+    async def slow_report(request: web.Request) -> web.Response:
+        return web.json_response(SLOW_CALLBACKS.report())
+
+    async def slow_stop(request: web.Request) -> web.Response:
+        return web.json_response(SLOW_CALLBACKS.stop())
+
+    app.middlewares.append(require_token)
+    app.router.add_get("/admin/profile", profile)
+    app.router.add_post("/admin/tracemalloc/start", tracemalloc_start)
+    app.router.add_get("/admin/tracemalloc", tracemalloc_diff)
+    app.router.add_post("/admin/tracemalloc/stop", tracemalloc_stop)
+    app.router.add_get("/admin/tasks", tasks)
+    app.router.add_post("/admin/slow-callbacks/start", slow_start)
+    app.router.add_get("/admin/slow-callbacks", slow_report)
+    app.router.add_post("/admin/slow-callbacks/stop", slow_stop)
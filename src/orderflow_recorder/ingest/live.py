@@ -0,0 +1,253 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple, Union
+
+from aiohttp import WSMsgType, web
+
+from orderflow_recorder.binance.records import TradeRecord
+from orderflow_recorder.utils.logging import get_logger
+
+
+# Same columns as the daily job output (time = bucket start, unix seconds)
+CANDLE_FIELDS = [
+    "time", "open", "high", "low", "close",
+    "vol_total", "vol_buy", "vol_sell", "vol_delta", "trade_count",
+]
+
+RESOLUTIONS = {"1s": 1_000, "1m": 60_000}
+
+# Open candle layout: [start_ms, open, high, low, close, vol_total, vol_buy, vol_sell, trade_count]
+_START, _OPEN, _HIGH, _LOW, _CLOSE, _VOL, _BUY, _SELL, _COUNT = range(9)
+
+
+def _to_row(candle: list) -> tuple:
+    return (
+        candle[_START] // 1000, candle[_OPEN], candle[_HIGH], candle[_LOW], candle[_CLOSE],
+        candle[_VOL], candle[_BUY], candle[_SELL], candle[_BUY] - candle[_SELL], candle[_COUNT],
+    )
+
+
+class _Series:
+    """One symbol at one resolution: the open candle plus a ring of closed ones."""
+
+    __slots__ = ("width_ms", "current", "history", "next_start", "last_close")
+
+    def __init__(self, width_ms: int, history: int) -> None:
+        self.width_ms = width_ms
+        self.current: Optional[list] = None
+        self.history: Deque[tuple] = deque(maxlen=history)
+        # First bucket that may still be opened (everything before it is closed)
+        self.next_start = 0
+        self.last_close: Optional[float] = None
+
+    def add(self, ts_ms: int, price: float, qty: float, seller_aggressor: bool) -> List[tuple]:
+        start = ts_ms - ts_ms % self.width_ms
+        closed = []
+        if self.current is None or start > self.current[_START]:
+            closed = self.close_before(start)
+        candle = self.current
+        if candle is None:
+            # A late trade for an already closed bucket opens the next bucket instead
+            candle = self.current = [max(start, self.next_start), price, price, price, price, 0.0, 0.0, 0.0, 0]
+        # Late trades for older buckets are folded into the open candle
+        if price > candle[_HIGH]:
+            candle[_HIGH] = price
+        if price < candle[_LOW]:
+            candle[_LOW] = price
+        candle[_CLOSE] = price
+        candle[_VOL] += qty
+        if seller_aggressor:
+            candle[_SELL] += qty
+        else:
+            candle[_BUY] += qty
+        candle[_COUNT] += 1
+        return closed
+
+    def close_before(self, start_ms: int) -> List[tuple]:
+        """
+        Close everything before the bucket starting at start_ms: the open candle (if
+        its bucket has ended) and any empty buckets, filled like the daily job does
+        (price carried forward, zero volume).
+        """
+        width_ms = self.width_ms
+        closed = []
+        candle = self.current
+        if candle is not None:
+            if candle[_START] + width_ms > start_ms:
+                return []
+            closed.append(_to_row(candle))
+            self.last_close = candle[_CLOSE]
+            self.current = None
+            fill_from = candle[_START] + width_ms
+        else:
+            if self.last_close is None or self.next_start >= start_ms:
+                return []
+            fill_from = self.next_start
+
+        # No point in generating more filler than the ring can hold
+        fill_from = max(fill_from, start_ms - width_ms * self.history.maxlen)
+        price = self.last_close
+        for bucket in range(fill_from, start_ms, width_ms):
+            closed.append((bucket // 1000, price, price, price, price, 0.0, 0.0, 0.0, 0.0, 0))
+        self.history.extend(closed)
+        self.next_start = max(self.next_start, start_ms)
+        return closed
+
+
+class LiveCandles:
+    """
+    In-process live aggregator: rolling 1s and 1m candles per symbol kept in
+    fixed-size ring buffers, fed from RecorderCallbacks.on_trade. Closed candles
+    are pushed to subscribers (websocket clients) without blocking ingest.
+    """
+
+    def __init__(self, history_1s: int = 3600, history_1m: int = 1440, subscriber_queue: int = 1000) -> None:
+        self._history = {"1s": history_1s, "1m": history_1m}
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._subscriber_queue = subscriber_queue
+        self._log = get_logger()
+
+    def on_trade(self, trade: Union[dict, TradeRecord]) -> None:
+        if isinstance(trade, TradeRecord):
+            symbol, ts_ms, price, qty, maker = (
+                trade.symbol, trade.event_time, trade.price, trade.quantity, trade.is_buyer_maker
+            )
+        else:
+            event_time = trade.get("event_time")
+            symbol = trade["symbol"]
+            ts_ms = int(event_time.timestamp() * 1000) if event_time is not None else int(time.time() * 1000)
+            price, qty, maker = trade["price"], trade["quantity"], bool(trade["is_buyer_maker"])
+
+        for resolution, width_ms in RESOLUTIONS.items():
+            series = self._series.get((symbol, resolution))
+            if series is None:
+                series = self._series[(symbol, resolution)] = _Series(width_ms, self._history[resolution])
+            closed = series.add(ts_ms, price, qty, maker)
+            if closed:
+                self._publish(symbol, resolution, closed)
+
+    def close_stale(self, now_ms: Optional[int] = None) -> None:
+        """Close candles whose bucket has ended even if no new trade arrived."""
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        for (symbol, resolution), series in self._series.items():
+            width_ms = series.width_ms
+            closed = series.close_before(now_ms - now_ms % width_ms)
+            if closed:
+                self._publish(symbol, resolution, closed)
+
+    async def run_ticker(self, interval: float = 0.25) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.close_stale()
+
+    def symbols(self) -> List[str]:
+        return sorted({symbol for symbol, _ in self._series})
+
+    def snapshot(self, symbol: str, resolution: str, limit: Optional[int] = None) -> Dict[str, object]:
+        series = self._series.get((symbol, resolution))
+        if series is None:
+            return {"symbol": symbol, "resolution": resolution, "count": 0, "data": [], "current": None}
+        rows = list(series.history)
+        if limit is not None:
+            rows = rows[-limit:] if limit > 0 else []
+        current = dict(zip(CANDLE_FIELDS, _to_row(series.current))) if series.current else None
+        return {
+            "symbol": symbol,
+            "resolution": resolution,
+            "count": len(rows),
+            "data": [dict(zip(CANDLE_FIELDS, row)) for row in rows],
+            "current": current,
+        }
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._subscriber_queue)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, symbol: str, resolution: str, rows: List[tuple]) -> None:
+        if not self._subscribers:
+            return
+        for row in rows:
+            message = {"symbol": symbol, "resolution": resolution, **dict(zip(CANDLE_FIELDS, row))}
+            for queue in self._subscribers:
+                if queue.full():
+                    # Slow consumer: drop its oldest message rather than stall ingest
+                    queue.get_nowait()
+                queue.put_nowait(message)
+
+
+def add_live_routes(app: web.Application, live: LiveCandles, api_key: str = "") -> None:
+    """
+    GET /live/candles?symbol=BTCUSDT&resolution=1s&limit=300  -> snapshot (JSON)
+    GET /live/stream?symbol=BTCUSDT&resolution=1s             -> websocket push of closed candles
+    If api_key is set, requests must send it as X-API-Key (or ?api_key= for browsers' websockets).
+    """
+
+    def authorized(request: web.Request) -> bool:
+        if not api_key:
+            return True
+        return api_key in (request.headers.get("X-API-Key"), request.query.get("api_key"))
+
+    def parse_filters(request: web.Request) -> Tuple[Optional[str], Optional[str]]:
+        symbol = request.query.get("symbol")
+        resolution = request.query.get("resolution")
+        if resolution is not None and resolution not in RESOLUTIONS:
+            raise web.HTTPBadRequest(text=f"resolution must be one of {sorted(RESOLUTIONS)}")
+        return (symbol.upper() if symbol else None), resolution
+
+    async def candles(request: web.Request) -> web.Response:
+        if not authorized(request):
+            raise web.HTTPUnauthorized(text="Invalid API Key")
+        symbol, resolution = parse_filters(request)
+        if not symbol:
+            return web.json_response({"symbols": live.symbols(), "resolutions": sorted(RESOLUTIONS)})
+        limit = request.query.get("limit")
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be an integer")
+        return web.json_response(live.snapshot(symbol, resolution or "1s", limit))
+
+    async def stream(request: web.Request) -> web.WebSocketResponse:
+        if not authorized(request):
+            raise web.HTTPUnauthorized(text="Invalid API Key")
+        symbol, resolution = parse_filters(request)
+
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        queue = live.subscribe()
+
+        async def drain_incoming() -> None:
+            # Only needed to notice client close frames
+            async for msg in ws:
+                if msg.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                    break
+
+        reader = asyncio.create_task(drain_incoming())
+        try:
+            while not ws.closed:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                message = getter.result()
+                if symbol and message["symbol"] != symbol:
+                    continue
+                if resolution and message["resolution"] != resolution:
+                    continue
+                await ws.send_str(json.dumps(message))
+        finally:
+            live.unsubscribe(queue)
+            reader.cancel()
+            await ws.close()
+        return ws
+
+    app.router.add_get("/live/candles", candles)
+    app.router.add_get("/live/stream", stream)
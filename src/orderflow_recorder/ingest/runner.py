@@ -1,55 +1,182 @@
 import asyncio
+import multiprocessing
 import os
+import signal
 from pathlib import Path
+from typing import List, Optional
 
 from aiohttp import web
-from orderflow_recorder.config.settings import get_settings
+from orderflow_recorder.config.settings import Settings, get_settings
 from orderflow_recorder.storage.gcs_sinks import GcsCsvSink
-from orderflow_recorder.binance.ws_client import FuturesWSClient, RecorderCallbacks
+from orderflow_recorder.binance.ws_client import FuturesWSClient, RecorderCallbacks, shard_symbols
+from orderflow_recorder.ingest.admin import add_admin_routes
+from orderflow_recorder.ingest.live import LiveCandles, add_live_routes
+from orderflow_recorder.utils import metrics
 from orderflow_recorder.utils.logging import setup_logging, get_logger
 
 
 async def health_check(request):
     return web.Response(text="OK")
 
-async def start_dummy_server(port: int = 8080):
+async def metrics_endpoint(request):
+    return web.Response(body=metrics.REGISTRY.render().encode(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+async def start_dummy_server(port: int = 8080, live: LiveCandles = None, api_key: str = "", admin_token: str = ""):
     app = web.Application()
     app.router.add_get("/", health_check)
+    app.router.add_get("/metrics", metrics_endpoint)
+    if live is not None:
+        add_live_routes(app, live, api_key=api_key)
+    add_admin_routes(app, admin_token, max_profile_seconds=get_settings().admin_profile_max_seconds)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, "0.0.0.0", port)
     await site.start()
 
 
-async def run() -> None:
-    setup_logging()
-    log = get_logger()
-    settings = get_settings()
-
-    log.info("Starting ingest runner (GCS Mode)")
-    
+def _load_local_credentials(log) -> None:
     # Ensure google credentials are set if provided locally
     key_path = Path("gcp-key.json")
     if key_path.exists() and not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(key_path.absolute())
         log.info(f"Loaded credentials from {key_path}")
 
-    # Start dummy server for Cloud Run health checks
-    port = int(os.environ.get("PORT", 8080))
-    log.info(f"Starting dummy health check server on port {port}")
-    await start_dummy_server(port)
+
+def worker_settings(settings: Settings, worker: str) -> Settings:
+    """
+    Per-worker settings in process mode: each worker spools to its own
+    SPOOL_DIR/{worker}, so segment numbering, crash recovery and uploads of
+    one process never touch another's files. Worker names are stable across
+    restarts, so a restarted worker recovers its own segments.
+    """
+    if not worker or not settings.spool_dir:
+        return settings
+    return settings.model_copy(update={"spool_dir": str(Path(settings.spool_dir) / worker)})
+
+
+async def run(
+    symbols: Optional[List[str]] = None, serve_http: bool = True, worker: str = "", metrics_port: Optional[int] = None
+) -> None:
+    """
+    Ingest the given symbols (default: all configured) over one or more WS
+    connections (shards), each with its own reconnect/backoff, all feeding the
+    same sink. serve_http=False for worker processes (the parent serves health);
+    those expose only /metrics on metrics_port.
+    """
+    setup_logging()
+    log = get_logger()
+    settings = worker_settings(get_settings(), worker)
+    symbols = symbols if symbols is not None else settings.symbols_futures
+
+    log.info(f"Starting ingest runner (GCS Mode){f' {worker}' if worker else ''}")
+    _load_local_credentials(log)
+
+    live = None
+    ticker = None
+    if settings.live_candles and serve_http:
+        live = LiveCandles(history_1s=settings.live_history_1s, history_1m=settings.live_history_1m)
+        ticker = asyncio.create_task(live.run_ticker())
+        log.info("Live candles enabled (/live/candles, /live/stream)")
+
+    if serve_http:
+        # Start dummy server for Cloud Run health checks
+        port = int(os.environ.get("PORT", 8080))
+        log.info(f"Starting dummy health check server on port {port}")
+        await start_dummy_server(port, live=live, api_key=settings.api_key, admin_token=settings.admin_token)
+    elif metrics_port is not None:
+        await start_dummy_server(metrics_port, admin_token=settings.admin_token)
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
 
     sink = GcsCsvSink(settings)
     await sink.start()
 
-    callbacks = RecorderCallbacks(sink, sink)
-    client = FuturesWSClient(settings, callbacks.on_depth_update, callbacks.on_trade)
+    callbacks = RecorderCallbacks(sink, sink, live=live)
+    shards = shard_symbols(symbols, settings.ws_shards, settings.ws_max_streams_per_connection)
+    prefix = f"{worker}/" if worker else ""
+    clients = [
+        FuturesWSClient(settings, callbacks.on_depth_update, callbacks.on_trade, symbols=shard, name=f"{prefix}shard-{i}")
+        for i, shard in enumerate(shards)
+    ]
+    log.info(f"{len(symbols)} symbols over {len(clients)} WS connection(s)")
 
     try:
-        await client.run_forever()
+        await asyncio.gather(*(client.run_forever() for client in clients))
     finally:
+        if ticker is not None:
+            ticker.cancel()
+        loop_monitor.cancel()
         await sink.stop()
 
 
+async def _run_until_sigterm(coro) -> None:
+    """
+    Run coro as a task that SIGTERM cancels, so its finally blocks (sink flush,
+    worker shutdown) run instead of the process dying with buffered data.
+    """
+    task = asyncio.create_task(coro)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def _worker_main(symbols: List[str], worker: str, metrics_port: int) -> None:
+    asyncio.run(_run_until_sigterm(run(symbols, serve_http=False, worker=worker, metrics_port=metrics_port)))
+
+
+async def supervise(groups: List[List[str]], restart_delay: float = 5.0) -> None:
+    """
+    Parent of process mode: serves the health endpoint and keeps one worker
+    process per symbol group alive (restarted after restart_delay if it dies).
+    Worker i serves its own /metrics (and /admin) on PORT + 1 + i.
+    """
+    setup_logging()
+    log = get_logger()
+    port = int(os.environ.get("PORT", 8080))
+    await start_dummy_server(port, admin_token=get_settings().admin_token)
+    if get_settings().live_candles:
+        log.warning("LIVE_CANDLES is not available with INGEST_PROCESSES > 1; ignoring.")
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = {}
+
+    def spawn(i: int) -> None:
+        proc = ctx.Process(
+            target=_worker_main, args=(groups[i], f"worker-{i}", port + 1 + i), name=f"ingest-worker-{i}", daemon=True
+        )
+        proc.start()
+        procs[i] = proc
+        log.info(f"Started ingest worker-{i} (pid {proc.pid}) for {len(groups[i])} symbols")
+
+    for i in range(len(groups)):
+        spawn(i)
+    try:
+        while True:
+            await asyncio.sleep(restart_delay)
+            for i, proc in list(procs.items()):
+                if not proc.is_alive():
+                    log.error(f"Ingest worker-{i} exited with code {proc.exitcode}; restarting")
+                    spawn(i)
+    finally:
+        # SIGTERM lets each worker flush its sink; kill whatever hangs past the timeout
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            proc.join(timeout=30)
+            if proc.is_alive():
+                log.error(f"{proc.name} did not stop within 30s; killing")
+                proc.kill()
+
+
 def main() -> None:
-    asyncio.run(run())
+    settings = get_settings()
+    processes = min(settings.ingest_processes, len(settings.symbols_futures))
+    if processes > 1:
+        # Exactly `processes` disjoint symbol groups, so raw chunk names never collide;
+        # each worker applies the per-connection stream cap itself in run()
+        symbols = settings.symbols_futures
+        groups = [symbols[i::processes] for i in range(processes)]
+        asyncio.run(_run_until_sigterm(supervise(groups)))
+    else:
+        asyncio.run(_run_until_sigterm(run()))
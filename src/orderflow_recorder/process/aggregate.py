@@ -0,0 +1,361 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Mergeable per-second partial aggregate. first_ts/last_ts (epoch ms) decide which
+# open/close wins when partials of the same second from different chunks are merged.
+# notional (sum of price * qty) makes vwap mergeable.
+PARTIAL_COLUMNS = [
+    "first_ts", "open", "high", "low", "last_ts", "close",
+    "vol_total", "vol_buy", "vol_sell", "trade_count", "notional",
+]
+
+# Per-second sums over depth snapshots; averages are taken only when finalizing.
+DEPTH_PARTIAL_COLUMNS = ["spread_sum", "spread_count", "imbalance_sum", "imbalance_count"]
+
+CANDLE_COLUMNS = [
+    "open", "high", "low", "close", "vwap", "vol_total", "vol_buy", "vol_sell", "trade_count", "vol_delta",
+    "avg_spread", "imbalance_l20",
+]
+
+# Book levels summed per side for imbalance_l20
+IMBALANCE_LEVELS = 20
+
+# Output resolutions (file suffix -> pandas offset), finest first. Each level is
+# resampled from the one before it, never from the 1s base.
+CANDLE_RESOLUTIONS = {
+    "1s": "1s", "5s": "5s", "15s": "15s",
+    "1m": "1min", "5m": "5min", "15m": "15min",
+    "1h": "1h", "1d": "1D",
+}
+
+_RESAMPLE_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "vol_total": "sum",
+    "vol_buy": "sum",
+    "vol_sell": "sum",
+    "vol_delta": "sum",
+    "trade_count": "sum",
+    # avg_spread / imbalance_l20 are re-derived from these at every level, so a
+    # coarse candle weights each snapshot equally instead of each finer candle
+    "spread_sum": "sum",
+    "spread_count": "sum",
+    "imbalance_sum": "sum",
+    "imbalance_count": "sum",
+}
+
+# What partials_to_candles and resample_candles return: the candle columns plus
+# the depth sums/counts the next pyramid level needs. Only CANDLE_COLUMNS are uploaded.
+PYRAMID_COLUMNS = CANDLE_COLUMNS + DEPTH_PARTIAL_COLUMNS
+
+
+def _empty_partials(columns: List[str] = PARTIAL_COLUMNS) -> pd.DataFrame:
+    return pd.DataFrame(columns=columns, index=pd.Index([], dtype="int64", name="second"))
+
+
+def trades_to_partials(df: pd.DataFrame, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> pd.DataFrame:
+    """
+    Fold one chunk of trades (event_time, price, quantity, is_buyer_maker) into
+    per-second partial aggregates, fully vectorized. Trades outside
+    [start_ms, end_ms) are dropped (buffer overlap with adjacent days).
+    """
+    ts_ms = df["event_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    price = df["price"].to_numpy(dtype=np.float64)
+    qty = df["quantity"].to_numpy(dtype=np.float64)
+    seller_aggressor = df["is_buyer_maker"].to_numpy(dtype=bool)
+
+    keep = np.ones(len(ts_ms), dtype=bool)
+    if start_ms is not None:
+        keep &= ts_ms >= start_ms
+    if end_ms is not None:
+        keep &= ts_ms < end_ms
+    if not keep.all():
+        ts_ms, price, qty, seller_aggressor = ts_ms[keep], price[keep], qty[keep], seller_aggressor[keep]
+    if len(ts_ms) == 0:
+        return _empty_partials()
+
+    # Stable sort by time so first/last follow event order
+    order = np.argsort(ts_ms, kind="stable")
+    ts_ms, price, qty, seller_aggressor = ts_ms[order], price[order], qty[order], seller_aggressor[order]
+
+    # is_buyer_maker = True -> Seller Aggressor (Sell Vol)
+    # is_buyer_maker = False -> Buyer Aggressor (Buy Vol)
+    vol_sell = np.where(seller_aggressor, qty, 0.0)
+    vol_buy = qty - vol_sell
+
+    seconds = ts_ms // 1000
+    # Sorted input: group boundaries are where the second changes
+    starts = np.flatnonzero(np.r_[True, seconds[1:] != seconds[:-1]])
+    ends = np.r_[starts[1:], len(seconds)] - 1
+
+    partials = pd.DataFrame({
+        "first_ts": ts_ms[starts],
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "last_ts": ts_ms[ends],
+        "close": price[ends],
+        "vol_total": np.add.reduceat(qty, starts),
+        "vol_buy": np.add.reduceat(vol_buy, starts),
+        "vol_sell": np.add.reduceat(vol_sell, starts),
+        "trade_count": (ends - starts + 1).astype(np.int64),
+        "notional": np.add.reduceat(price * qty, starts),
+    }, index=pd.Index(seconds[starts], name="second"))
+    return partials
+
+
+def merge_partials(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge partial aggregates (possibly overlapping in seconds, in any order).
+    open/close come from the partial with the earliest first_ts / latest last_ts;
+    ties keep the order of `frames`.
+    """
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return _empty_partials()
+    if len(frames) == 1:
+        return frames[0]
+
+    cat = pd.concat(frames).reset_index()
+    by_open = cat.sort_values(["second", "first_ts"], kind="mergesort").groupby("second", sort=True)
+    merged = by_open.agg(
+        first_ts=("first_ts", "first"),
+        open=("open", "first"),
+        high=("high", "max"),
+        low=("low", "min"),
+        vol_total=("vol_total", "sum"),
+        vol_buy=("vol_buy", "sum"),
+        vol_sell=("vol_sell", "sum"),
+        trade_count=("trade_count", "sum"),
+        notional=("notional", "sum"),
+    )
+    by_close = cat.sort_values(["second", "last_ts"], kind="mergesort").groupby("second", sort=True)
+    closes = by_close.agg(last_ts=("last_ts", "last"), close=("close", "last"))
+    return merged.join(closes)[PARTIAL_COLUMNS]
+
+
+class TradeAggregator:
+    """
+    Streaming 1s trade aggregation with bounded memory.
+
+    Chunks are folded into per-second partials as they arrive and compacted
+    periodically, so memory scales with the number of output seconds (<= 86,400
+    per day) rather than with the number of trades.
+    """
+
+    def __init__(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        compact_rows: int = 200_000,
+    ) -> None:
+        self._start_ms = start_ms
+        self._end_ms = end_ms
+        self._compact_rows = compact_rows
+        self._state = _empty_partials()
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self.trades_seen = 0
+
+    def add_trades(self, df: pd.DataFrame) -> None:
+        partials = trades_to_partials(df, self._start_ms, self._end_ms)
+        self.add_partials(partials)
+
+    def add_partials(self, partials: pd.DataFrame) -> None:
+        if not len(partials):
+            return
+        self.trades_seen += int(partials["trade_count"].sum())
+        self._pending.append(partials)
+        self._pending_rows += len(partials)
+        if self._pending_rows >= self._compact_rows:
+            self.compact()
+
+    def compact(self) -> None:
+        if self._pending:
+            self._state = merge_partials([self._state] + self._pending)
+            self._pending = []
+            self._pending_rows = 0
+
+    def partials(self) -> pd.DataFrame:
+        self.compact()
+        return self._state
+
+    def finalize(self, depth_partials: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """1s candles (PYRAMID_COLUMNS, same fill rules as before), or an empty frame."""
+        return partials_to_candles(self.partials(), depth_partials)
+
+
+def depth_to_partials(
+    depth: Dict[str, np.ndarray],
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    levels: int = IMBALANCE_LEVELS,
+) -> pd.DataFrame:
+    """
+    Fold one chunk of depth snapshots (read_depth_chunk arrays: event_time plus
+    (rows, levels) bid/ask matrices) into per-second spread/imbalance sums.
+    Vectorized over the level matrices; snapshots with an empty side are skipped.
+    """
+    ts_ms = np.asarray(depth["event_time"], dtype=np.int64)
+    keep = np.ones(len(ts_ms), dtype=bool)
+    if start_ms is not None:
+        keep &= ts_ms >= start_ms
+    if end_ms is not None:
+        keep &= ts_ms < end_ms
+    if not keep.any():
+        return _empty_partials(DEPTH_PARTIAL_COLUMNS)
+
+    bid_px, ask_px = depth["bid_px"][keep], depth["ask_px"][keep]
+    bid_qty = depth["bid_qty"][keep, :levels]
+    ask_qty = depth["ask_qty"][keep, :levels]
+
+    # Mean of ask[0] - bid[0]
+    spread = ask_px[:, 0] - bid_px[:, 0]
+    spread_ok = np.isfinite(spread)
+
+    # BidQty / (BidQty + AskQty) over the top levels (NaN padding ignored)
+    bid_total = np.nansum(bid_qty, axis=1)
+    ask_total = np.nansum(ask_qty, axis=1)
+    book_total = bid_total + ask_total
+    imbalance_ok = book_total > 0
+    imbalance = np.divide(bid_total, book_total, out=np.zeros_like(book_total), where=imbalance_ok)
+
+    seconds, group = np.unique(ts_ms[keep] // 1000, return_inverse=True)
+    size = len(seconds)
+    return pd.DataFrame({
+        "spread_sum": np.bincount(group, weights=np.where(spread_ok, spread, 0.0), minlength=size),
+        "spread_count": np.bincount(group, weights=spread_ok, minlength=size).astype(np.int64),
+        "imbalance_sum": np.bincount(group, weights=imbalance, minlength=size),
+        "imbalance_count": np.bincount(group, weights=imbalance_ok, minlength=size).astype(np.int64),
+    }, index=pd.Index(seconds, name="second"))
+
+
+def merge_depth_partials(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Depth partials are plain sums, so merging is a groupby-sum."""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return _empty_partials(DEPTH_PARTIAL_COLUMNS)
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames).groupby(level="second", sort=True).sum()[DEPTH_PARTIAL_COLUMNS]
+
+
+class DepthAggregator:
+    """Streaming per-second depth aggregation; counterpart of TradeAggregator for snapshots."""
+
+    def __init__(
+        self,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        compact_rows: int = 200_000,
+    ) -> None:
+        self._start_ms = start_ms
+        self._end_ms = end_ms
+        self._compact_rows = compact_rows
+        self._state = _empty_partials(DEPTH_PARTIAL_COLUMNS)
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self.snapshots_seen = 0
+
+    def add_depth(self, depth: Dict[str, np.ndarray]) -> None:
+        self.add_partials(depth_to_partials(depth, self._start_ms, self._end_ms))
+
+    def add_partials(self, partials: pd.DataFrame) -> None:
+        if not len(partials):
+            return
+        self.snapshots_seen += int(partials["spread_count"].sum())
+        self._pending.append(partials)
+        self._pending_rows += len(partials)
+        if self._pending_rows >= self._compact_rows:
+            self.compact()
+
+    def compact(self) -> None:
+        if self._pending:
+            self._state = merge_depth_partials([self._state] + self._pending)
+            self._pending = []
+            self._pending_rows = 0
+
+    def partials(self) -> pd.DataFrame:
+        self.compact()
+        return self._state
+
+
+def partials_to_candles(partials: pd.DataFrame, depth_partials: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Turn merged per-second partials into gap-filled 1s candles indexed by a UTC
+    'timestamp', spanning the first to the last traded second. vwap, avg_spread
+    and imbalance_l20 stay NaN for seconds without trades / depth snapshots.
+    The depth sums/counts are kept (PYRAMID_COLUMNS) for resample_candles.
+    """
+    if not len(partials):
+        return pd.DataFrame(columns=PYRAMID_COLUMNS, index=pd.DatetimeIndex([], tz="UTC", name="timestamp"))
+
+    seconds = partials.index.to_numpy(dtype=np.int64)
+    full = np.arange(seconds.min(), seconds.max() + 1, dtype=np.int64)
+    df = partials.reindex(full)
+    df.index = pd.DatetimeIndex(pd.to_datetime(full, unit="s", utc=True), name="timestamp", freq="s")
+    vwap = (df["notional"].astype(float) / df["vol_total"].astype(float)).to_numpy()
+    df = df[["open", "high", "low", "close", "vol_total", "vol_buy", "vol_sell", "trade_count"]]
+    df["vwap"] = vwap
+
+    if depth_partials is not None and len(depth_partials):
+        book = depth_partials.reindex(full)
+        for col in DEPTH_PARTIAL_COLUMNS:
+            df[col] = book[col].astype(float).fillna(0).to_numpy()
+    else:
+        for col in DEPTH_PARTIAL_COLUMNS:
+            df[col] = 0.0
+    _depth_averages(df)
+
+    # Calculate Delta
+    df["vol_delta"] = df["vol_buy"] - df["vol_sell"]
+
+    # Forward fill Prices (if no trade, price stays same)
+    df["close"] = df["close"].astype(float).ffill()
+    df["open"] = df["open"].astype(float).fillna(df["close"])
+    df["high"] = df["high"].astype(float).fillna(df["close"])
+    df["low"] = df["low"].astype(float).fillna(df["close"])
+
+    # Zero fill Volumes (if no trade, vol is 0)
+    vol_cols = ["vol_total", "vol_buy", "vol_sell", "vol_delta"]
+    df[vol_cols] = df[vol_cols].astype(float).fillna(0)
+    df["trade_count"] = df["trade_count"].fillna(0).astype(np.int64)
+    return df[PYRAMID_COLUMNS]
+
+
+def _depth_averages(df: pd.DataFrame) -> None:
+    """avg_spread / imbalance_l20 from the depth sums; NaN where no snapshot counted."""
+    df["avg_spread"] = df["spread_sum"] / df["spread_count"].where(df["spread_count"] > 0)
+    df["imbalance_l20"] = df["imbalance_sum"] / df["imbalance_count"].where(df["imbalance_count"] > 0)
+
+
+def resample_candles(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Resample PYRAMID_COLUMNS candles to a coarser resolution. vwap is weighted
+    by volume, avg_spread / imbalance_l20 by depth snapshot count.
+    """
+    notional = (df["vwap"] * df["vol_total"]).resample(rule).sum(min_count=1)
+    out = df.resample(rule).agg(_RESAMPLE_AGG)
+    out["vwap"] = notional / out["vol_total"].where(out["vol_total"] > 0)
+    _depth_averages(out)
+    return out[PYRAMID_COLUMNS]
+
+
+def candle_pyramid(df_1s: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    All CANDLE_RESOLUTIONS from gap-filled 1s candles in one cascading pass
+    (1s -> 5s -> 15s -> 1m -> ...), so each level only scans the rows of the
+    level below it.
+    """
+    levels = {}
+    df = df_1s
+    for resolution, rule in CANDLE_RESOLUTIONS.items():
+        if levels:
+            df = resample_candles(df, rule)
+        levels[resolution] = df
+    return levels
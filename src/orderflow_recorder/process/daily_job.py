@@ -2,30 +2,47 @@ import asyncio
 import io
 import json
 import logging
+import multiprocessing
 import os
+import tempfile
+import time
 import zipfile
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
-from google.cloud import storage
 
 from orderflow_recorder.config.settings import get_settings
+from orderflow_recorder.process.aggregate import CANDLE_COLUMNS, DepthAggregator, TradeAggregator, candle_pyramid
+from orderflow_recorder.process.footprint import FootprintAggregator, parse_tick_overrides
+from orderflow_recorder.process.incremental import delete_partial_state, load_partial_state, save_partial_state
+from orderflow_recorder.storage.clients import get_storage_client
+from orderflow_recorder.storage.raw_format import chunk_format, chunk_kind, read_depth_chunk, read_trades_chunk
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 log = logging.getLogger("daily_processor")
 
+# Archive is built in memory up to this size, then spills to a temp file
+ZIP_SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+
+# Round volumes to 6 decimal places to save space but keep precision
+CANDLE_ROUNDING = {
+    'vol_total': 6, 'vol_buy': 6, 'vol_sell': 6, 'vol_delta': 6,
+    'open': 2, 'high': 2, 'low': 2, 'close': 2,  # Prices usually 2 decimals for USDT pairs (or more for others)
+    'vwap': 4, 'avg_spread': 6, 'imbalance_l20': 4,
+}
+
 def get_gcs_client():
-    # Helper to get client with credentials if local
-    key_path = Path("gcp-key.json")
-    if key_path.exists() and not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(key_path.absolute())
-    return storage.Client()
+    # Helper to get client with credentials if local (or the LOCAL_STORAGE_ROOT stand-in)
+    return get_storage_client(get_settings())
 
 def parse_blob_date(blob_name: str) -> datetime:
-    # Expected format: raw/SYMBOL/YYYY-MM-DD/HH-MM-SS_type.csv
+    # Expected format: raw/SYMBOL/YYYY-MM-DD/HH-MM-SS_type.{csv,parquet}
     try:
         parts = blob_name.split("/")
         date_str = parts[2] # YYYY-MM-DD
@@ -33,10 +50,60 @@ def parse_blob_date(blob_name: str) -> datetime:
     except Exception:
         return None
 
-def process_symbol_day(bucket_name: str, symbol: str, target_date: datetime):
+def iter_blob_contents(blobs: list, max_workers: int) -> Iterator[Tuple[object, bytes]]:
+    """
+    Download blobs concurrently and yield (blob, content) in the original order.
+    At most max_workers downloads are in flight, so memory stays bounded too.
+    """
+    max_workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download") as pool:
+        in_flight = deque()
+        for blob in blobs:
+            in_flight.append((blob, pool.submit(blob.download_as_bytes)))
+            if len(in_flight) >= max_workers:
+                done_blob, future = in_flight.popleft()
+                yield done_blob, future.result()
+        while in_flight:
+            done_blob, future = in_flight.popleft()
+            yield done_blob, future.result()
+
+
+class StageTimer:
+    """Wall time per job stage, accumulated over all chunks (download = time spent waiting for content)."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def iterate(self, items: Iterable, name: str) -> Iterator:
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.seconds.items())
+
+
+def process_symbol_day(
+    bucket_name: str, symbol: str, target_date: datetime, download_workers: int = 16, timer: Optional[StageTimer] = None
+):
     """
-    Process one day of data for one symbol.
+    Process one day of data for one symbol. Pass a StageTimer to get the
+    per-stage breakdown (list, download, parse, aggregate, candles, footprint,
+    archive, delete); it is logged either way.
     """
+    timer = timer or StageTimer()
     client = get_gcs_client()
     bucket = client.bucket(bucket_name)
     
@@ -44,7 +111,8 @@ def process_symbol_day(bucket_name: str, symbol: str, target_date: datetime):
     prefix = f"raw/{symbol}/{date_str}/"
     
     log.info(f"Checking for data: {prefix}")
-    blobs = list(bucket.list_blobs(prefix=prefix))
+    with timer.stage("list"):
+        blobs = list(bucket.list_blobs(prefix=prefix))
     
     if not blobs:
         log.warning(f"No data found for {symbol} on {date_str}. Skipping.")
@@ -52,130 +120,180 @@ def process_symbol_day(bucket_name: str, symbol: str, target_date: datetime):
 
     log.info(f"Found {len(blobs)} chunks. Downloading...")
 
-    trades_list = []
-    
-    # We won't process Orderbook snapshots fully in this V1 as per concept (focus on Trades first for OHLC/Delta).
-    # Reconstructing full book from snapshots for 'Avg Spread' requires complex logic (merging snapshots).
-    # For now, we aggregate TRADES. 
-    # TODO: Add Depth aggregation logic if depth files are needed for 'Avg Spread'.
-    
-    # Download and parse Trades
-    trade_blobs = [b for b in blobs if "_trades.csv" in b.name]
+    window = day_window_ms(target_date)
+    aggregator = TradeAggregator(*window)
+    depth_aggregator = DepthAggregator(*window)
+    tick = parse_tick_overrides(get_settings().footprint_ticks).get(symbol)
+    footprint = FootprintAggregator(tick, *window)
+
+    # If intraday runs already folded some chunks, start from their partials and
+    # only aggregate what they haven't seen. Every chunk is still archived.
+    partials, depth_partials, processed = load_partial_state(bucket, symbol, date_str)
+    if partials is not None:
+        aggregator.add_partials(partials)
+        depth_aggregator.add_partials(depth_partials)
+        log.info(f"Resuming from intraday state ({len(processed)} chunks already aggregated).")
+
+    # Depth snapshots (depth20@100ms) are independent snapshots, not book deltas:
+    # per second we average the top-of-book spread and the top-20 qty imbalance.
+
+    # Download every raw chunk exactly once (bounded thread pool) and use it for both
+    # aggregation and the archive. Trades and depth are folded chunk by chunk (CSV or
+    # Parquet); only per-second partials are kept, never the raw rows of the whole day.
+    zip_buffer = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_MEMORY)
+    zip_file = zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED)
     
-    for blob in trade_blobs:
-        content = blob.download_as_text()
-        if not content.strip():
+    for blob, content in timer.iterate(iter_blob_contents(blobs, max_workers=download_workers), "download"):
+        # Name inside zip: HH-MM-SS_type.csv
+        file_name = blob.name.split("/")[-1]
+        # Parquet chunks are already zstd-compressed, deflating them again only costs CPU
+        compress_type = zipfile.ZIP_STORED if chunk_format(blob.name) == "parquet" else zipfile.ZIP_DEFLATED
+        with timer.stage("archive"):
+            zip_file.writestr(file_name, content, compress_type=compress_type)
+
+        if not content or content.isspace():
             continue
+        kind = chunk_kind(blob.name)
         try:
-            df_chunk = pd.read_csv(io.StringIO(content))
-            trades_list.append(df_chunk)
+            if kind == "trades":
+                with timer.stage("parse"):
+                    trades = read_trades_chunk(blob.name, content)
+                with timer.stage("aggregate"):
+                    # Footprints are not part of the intraday state: always built from every chunk
+                    footprint.add_trades(trades)
+                    if blob.name not in processed:
+                        aggregator.add_trades(trades)
+            elif kind == "depth" and blob.name not in processed:
+                with timer.stage("parse"):
+                    depth = read_depth_chunk(blob.name, content)
+                with timer.stage("aggregate"):
+                    depth_aggregator.add_depth(depth)
         except Exception as e:
             log.error(f"Failed to parse {blob.name}: {e}")
+    
+    with timer.stage("archive"):
+        zip_file.close()
 
-    if not trades_list:
-        log.warning("No valid trade rows found.")
+    if not aggregator.trades_seen:
+        log.warning(f"No valid trade rows found for {date_str} (after date filtering).")
+        zip_buffer.close()
         return
 
-    # Combine
-    df = pd.concat(trades_list, ignore_index=True)
-    
-    # Pre-processing
-    # Use 'mixed' format to handle potential variations (e.g. with/without microseconds)
-    df['timestamp'] = pd.to_datetime(df['event_time'], format='mixed') # event_time is the source of truth
-    df.set_index('timestamp', inplace=True)
-    df.sort_index(inplace=True)
-    
-    # Strict Date Filtering (UTC 00:00:00 to 23:59:59)
-    # Ensure we only keep data for the actual target_date, removing overlap from buffer
-    start_ts = pd.Timestamp(target_date).replace(hour=0, minute=0, second=0, microsecond=0)
-    end_ts = start_ts + pd.Timedelta(days=1)
-    df = df[(df.index >= start_ts) & (df.index < end_ts)]
-    
-    if df.empty:
-        log.warning(f"No data left after date filtering for {date_str}.")
-        return
+    # 1s Resolution (gap-filled: prices forward filled, volumes zero filled) + 1m
+    with timer.stage("candles"):
+        upload_candles(bucket, symbol, date_str, aggregator.finalize(depth_aggregator.partials()))
+    with timer.stage("footprint"):
+        upload_footprint(bucket, symbol, date_str, footprint)
 
-    # Calculate side volumes
-    # is_buyer_maker = True -> Seller Aggressor (Sell Vol)
-    # is_buyer_maker = False -> Buyer Aggressor (Buy Vol)
-    df['vol_buy'] = df.apply(lambda x: x['quantity'] if not x['is_buyer_maker'] else 0, axis=1)
-    df['vol_sell'] = df.apply(lambda x: x['quantity'] if x['is_buyer_maker'] else 0, axis=1)
-
-    # Aggregation Logic
-    # 1s Resolution
-    ohlc_dict = {
-        'price': ['first', 'max', 'min', 'last'],
-        'quantity': 'sum',
-        'vol_buy': 'sum',
-        'vol_sell': 'sum',
-        'source': 'count' # Just to count trades
-    }
-    
-    df_1s = df.resample('1s').agg(ohlc_dict)
-    
-    # Rename columns
-    df_1s.columns = ['open', 'high', 'low', 'close', 'vol_total', 'vol_buy', 'vol_sell', 'trade_count']
-    
-    # Calculate Delta
-    df_1s['vol_delta'] = df_1s['vol_buy'] - df_1s['vol_sell']
-    
-    # Forward fill Prices (if no trade, price stays same)
-    df_1s['close'] = df_1s['close'].ffill()
-    df_1s['open'] = df_1s['open'].fillna(df_1s['close'])
-    df_1s['high'] = df_1s['high'].fillna(df_1s['close'])
-    df_1s['low'] = df_1s['low'].fillna(df_1s['close'])
-    
-    # Zero fill Volumes (if no trade, vol is 0)
-    vol_cols = ['vol_total', 'vol_buy', 'vol_sell', 'vol_delta', 'trade_count']
-    df_1s[vol_cols] = df_1s[vol_cols].fillna(0)
-    
-    # Round volumes to 6 decimal places to save space but keep precision
-    df_1s = df_1s.round({
-        'vol_total': 6, 'vol_buy': 6, 'vol_sell': 6, 'vol_delta': 6,
-        'open': 2, 'high': 2, 'low': 2, 'close': 2  # Prices usually 2 decimals for USDT pairs (or more for others)
-    })
-
-    # 1m Resolution (Resample from 1s to be accurate)
-    df_1m = df_1s.resample('1min').agg({
-        'open': 'first',
-        'high': 'max',
-        'low': 'min',
-        'close': 'last',
-        'vol_total': 'sum',
-        'vol_buy': 'sum',
-        'vol_sell': 'sum',
-        'vol_delta': 'sum',
-        'trade_count': 'sum'
-    })
-    
-    # Upload Aggregated Files
-    upload_df(bucket, df_1s, f"aggregated/{symbol}/{date_str}_1s.csv")
-    upload_df(bucket, df_1m, f"aggregated/{symbol}/{date_str}_1m.csv")
-    
-    log.info(f"Aggregation complete. 1s: {len(df_1s)} rows, 1m: {len(df_1m)} rows.")
-
-    # Archiving (Zip Raw Files)
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for blob in blobs:
-            # Name inside zip: HH-MM-SS_type.csv
-            file_name = blob.name.split("/")[-1] 
-            zip_file.writestr(file_name, blob.download_as_bytes())
-    
+    # Archiving (Zip Raw Files, built while downloading)
     zip_blob_name = f"archive/{symbol}/{date_str}_raw.zip"
     zip_blob = bucket.blob(zip_blob_name)
-    zip_blob.upload_from_file(zip_buffer, content_type="application/zip", rewind=True)
+    with timer.stage("archive"):
+        zip_blob.upload_from_file(zip_buffer, content_type="application/zip", rewind=True)
+    zip_buffer.close()
     log.info(f"Archived raw files to {zip_blob_name}")
 
     # Delete Raw Files
     # Safety check: Ensure Zip exists before deleting?
-    if zip_blob.exists():
-        batch = client.batch()
-        for blob in blobs:
-            blob.delete()
-        log.info(f"Deleted {len(blobs)} raw files.")
-    else:
-        log.error("Archive upload failed? Skipping deletion for safety.")
+    with timer.stage("delete"):
+        if zip_blob.exists():
+            batch = client.batch()
+            for blob in blobs:
+                blob.delete()
+            log.info(f"Deleted {len(blobs)} raw files.")
+            delete_partial_state(bucket, symbol, date_str)
+        else:
+            log.error("Archive upload failed? Skipping deletion for safety.")
+    log.info(f"{symbol} {date_str} stage timings: {timer.summary()}")
+
+
+def process_symbol_intraday(bucket_name: str, symbol: str, target_date: datetime, download_workers: int = 16):
+    """
+    Incremental (intraday) run for one symbol-day: fold only raw chunks not
+    seen by previous runs into the persisted partial state, then rewrite the day's
+    1s/1m candle files so the API can serve the current day. Raw chunks are left
+    in place for the nightly run to finalize and archive.
+    """
+    client = get_gcs_client()
+    bucket = client.bucket(bucket_name)
+
+    date_str = target_date.strftime("%Y-%m-%d")
+    prefix = f"raw/{symbol}/{date_str}/"
+
+    partials, depth_partials, processed = load_partial_state(bucket, symbol, date_str)
+    new_blobs = [
+        b for b in bucket.list_blobs(prefix=prefix)
+        if chunk_kind(b.name) is not None and b.name not in processed
+    ]
+    if not new_blobs:
+        log.info(f"No new chunks for {symbol} on {date_str} ({len(processed)} already aggregated).")
+        return
+
+    log.info(f"Folding {len(new_blobs)} new chunks into {symbol} {date_str}...")
+
+    window = day_window_ms(target_date)
+    aggregator = TradeAggregator(*window)
+    depth_aggregator = DepthAggregator(*window)
+    if partials is not None:
+        aggregator.add_partials(partials)
+        depth_aggregator.add_partials(depth_partials)
+
+    for blob, content in iter_blob_contents(new_blobs, max_workers=download_workers):
+        if content and not content.isspace():
+            try:
+                fold_chunk(aggregator, depth_aggregator, blob.name, content)
+            except Exception as e:
+                # Not marked as processed: retried on the next run
+                log.error(f"Failed to parse {blob.name}: {e}")
+                continue
+        processed.add(blob.name)
+
+    if not aggregator.trades_seen:
+        log.warning(f"No valid trade rows found for {date_str} (after date filtering).")
+        return
+
+    # State + manifest first (one object), then the servable candle files
+    save_partial_state(bucket, symbol, date_str, aggregator.partials(), processed, depth_aggregator.partials())
+    upload_candles(bucket, symbol, date_str, aggregator.finalize(depth_aggregator.partials()))
+
+
+def fold_chunk(aggregator: TradeAggregator, depth_aggregator: DepthAggregator, blob_name: str, content: bytes) -> None:
+    kind = chunk_kind(blob_name)
+    if kind == "trades":
+        aggregator.add_trades(read_trades_chunk(blob_name, content))
+    elif kind == "depth":
+        depth_aggregator.add_depth(read_depth_chunk(blob_name, content))
+
+
+def day_window_ms(target_date: datetime) -> Tuple[int, int]:
+    """
+    Strict Date Filtering (UTC 00:00:00 to 23:59:59): [start, end) in epoch ms.
+    Ensures we only keep data for the actual target_date, removing overlap from buffer.
+    """
+    start_ts = pd.Timestamp(target_date).replace(hour=0, minute=0, second=0, microsecond=0)
+    end_ts = start_ts + pd.Timedelta(days=1)
+    return start_ts.value // 10**6, end_ts.value // 10**6
+
+
+def upload_candles(bucket, symbol: str, date_str: str, df_1s: pd.DataFrame) -> None:
+    """
+    Derive every coarser resolution from the 1s candles (cascading 1s -> 5s ->
+    ... -> 1d, each level resampled from the one below, before rounding), then
+    round and upload the CANDLE_COLUMNS of each resolution as one CSV.
+    """
+    pyramid = candle_pyramid(df_1s)
+    for resolution, df in pyramid.items():
+        upload_df(bucket, df[CANDLE_COLUMNS].round(CANDLE_ROUNDING), f"aggregated/{symbol}/{date_str}_{resolution}.csv")
+
+    log.info(f"Aggregation complete. {', '.join(f'{res}: {len(df)}' for res, df in pyramid.items())} rows.")
+
+
+def upload_footprint(bucket, symbol: str, date_str: str, footprint: FootprintAggregator) -> None:
+    """Sparse 1m volume-at-price rows (only traded price bins)."""
+    df = footprint.finalize().round({'vol_buy': 6, 'vol_sell': 6})
+    if len(df):
+        upload_df(bucket, df, f"aggregated/{symbol}/{date_str}_footprint_1m.csv")
+        log.info(f"Footprint: {len(df)} price levels at tick {footprint.tick}.")
 
 
 def upload_df(bucket, df: pd.DataFrame, path: str):
@@ -189,22 +307,45 @@ def main():
     bucket_name = settings.gcs_bucket_name
     symbols = settings.symbols_futures
     
-    # Default: Process Yesterday
+    # JOB_MODE=incremental: run every few minutes on the current day (partial candles),
+    # anything else: nightly finalize + archive of the previous day.
+    incremental = os.environ.get("JOB_MODE", "daily").lower() == "incremental"
+    job = process_symbol_intraday if incremental else process_symbol_day
+
+    # Default: Process Yesterday (or today in incremental mode)
     # If run at 01:00 UTC on 20th, we process 19th.
-    target_date = datetime.now(timezone.utc) - timedelta(days=1)
+    target_date = datetime.now(timezone.utc) - timedelta(days=0 if incremental else 1)
     
     # Allow manual override via env var for testing (DATE=2024-05-20)
     if os.environ.get("FORCE_DATE"):
         target_date = datetime.strptime(os.environ["FORCE_DATE"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
 
-    log.info(f"Starting Daily Job for {target_date.strftime('%Y-%m-%d')}")
+    log.info(f"Starting {'Incremental' if incremental else 'Daily'} Job for {target_date.strftime('%Y-%m-%d')}")
     log.info(f"Symbols: {symbols}")
 
-    for symbol in symbols:
-        try:
-            process_symbol_day(bucket_name, symbol.upper(), target_date)
-        except Exception as e:
-            log.error(f"Error processing {symbol}: {e}", exc_info=True)
+    download_workers = settings.job_download_workers
+    processes = min(settings.job_processes, len(symbols))
+
+    if processes <= 1:
+        for symbol in symbols:
+            try:
+                job(bucket_name, symbol.upper(), target_date, download_workers)
+            except Exception as e:
+                log.error(f"Error processing {symbol}: {e}", exc_info=True)
+    else:
+        # One symbol-day per worker process: parsing/aggregation is CPU-bound.
+        # spawn: workers rebuild settings/clients from the environment, no forked threads or sockets
+        log.info(f"Processing {len(symbols)} symbols across {processes} processes")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(job, bucket_name, symbol.upper(), target_date, download_workers): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    log.error(f"Error processing {futures[future]}: {e}", exc_info=True)
 
     log.info("Job Finished.")
 
@@ -0,0 +1,135 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Footprint (volume-at-price) per 1m candle, stored sparse: one row per
+# (minute, price bin) that actually traded.
+FOOTPRINT_COLUMNS = ["vol_buy", "vol_sell", "trade_count"]
+FOOTPRINT_BUCKET_MS = 60_000
+
+
+def parse_tick_overrides(spec: str) -> Dict[str, float]:
+    """'BTCUSDT:10,ETHUSDT:0.5' -> {'BTCUSDT': 10.0, 'ETHUSDT': 0.5}"""
+    ticks = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        symbol, _, tick = item.partition(":")
+        ticks[symbol.strip().upper()] = float(tick)
+    return ticks
+
+
+def auto_tick(price: float) -> float:
+    """Power-of-ten bin of at most ~1 bp of price (BTC ~97k -> 1, ETH ~3.5k -> 0.1)."""
+    if not price > 0:
+        return 1.0
+    return 10.0 ** math.floor(math.log10(price * 1e-4))
+
+
+def trades_to_footprint(
+    df: pd.DataFrame, tick: float, start_ms: Optional[int] = None, end_ms: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Bin one chunk of trades into (minute, price bin) buy/sell volumes, fully
+    vectorized. Bins are floor(price / tick); the index holds (minute, bin).
+    """
+    ts_ms = df["event_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    price = df["price"].to_numpy(dtype=np.float64)
+    qty = df["quantity"].to_numpy(dtype=np.float64)
+    seller_aggressor = df["is_buyer_maker"].to_numpy(dtype=bool)
+
+    keep = np.ones(len(ts_ms), dtype=bool)
+    if start_ms is not None:
+        keep &= ts_ms >= start_ms
+    if end_ms is not None:
+        keep &= ts_ms < end_ms
+    if not keep.any():
+        return _empty_footprint()
+    ts_ms, price, qty, seller_aggressor = ts_ms[keep], price[keep], qty[keep], seller_aggressor[keep]
+
+    minute = ts_ms // FOOTPRINT_BUCKET_MS
+    # Small epsilon so prices sitting exactly on a bin edge don't fall one bin low
+    price_bin = np.floor(price / tick + 1e-9).astype(np.int64)
+    keys = np.stack([minute, price_bin], axis=1)
+    unique, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.ravel()
+    size = len(unique)
+
+    return pd.DataFrame({
+        "vol_buy": np.bincount(group, weights=np.where(seller_aggressor, 0.0, qty), minlength=size),
+        "vol_sell": np.bincount(group, weights=np.where(seller_aggressor, qty, 0.0), minlength=size),
+        "trade_count": np.bincount(group, minlength=size).astype(np.int64),
+    }, index=pd.MultiIndex.from_arrays([unique[:, 0], unique[:, 1]], names=["minute", "bin"]))
+
+
+def _empty_footprint() -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays([np.empty(0, np.int64), np.empty(0, np.int64)], names=["minute", "bin"])
+    return pd.DataFrame(columns=FOOTPRINT_COLUMNS, index=index)
+
+
+class FootprintAggregator:
+    """
+    Streaming footprint aggregation with bounded memory: chunk partials are
+    summed per (minute, bin) and compacted periodically, so memory scales with
+    the number of traded price levels per minute, not with trades.
+    """
+
+    def __init__(
+        self,
+        tick: Optional[float] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        compact_rows: int = 500_000,
+    ) -> None:
+        # None: derived from the first chunk's price (auto_tick)
+        self.tick = tick
+        self._start_ms = start_ms
+        self._end_ms = end_ms
+        self._compact_rows = compact_rows
+        self._state = _empty_footprint()
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+
+    def add_trades(self, df: pd.DataFrame) -> None:
+        if not len(df):
+            return
+        if self.tick is None:
+            self.tick = auto_tick(float(df["price"].median()))
+        partials = trades_to_footprint(df, self.tick, self._start_ms, self._end_ms)
+        if not len(partials):
+            return
+        self._pending.append(partials)
+        self._pending_rows += len(partials)
+        if self._pending_rows >= self._compact_rows:
+            self.compact()
+
+    def compact(self) -> None:
+        if self._pending:
+            frames = [f for f in [self._state] + self._pending if len(f)]
+            self._state = pd.concat(frames).groupby(level=["minute", "bin"], sort=True).sum()
+            self._pending = []
+            self._pending_rows = 0
+
+    def finalize(self) -> pd.DataFrame:
+        """
+        Sparse footprint indexed by the minute's UTC 'timestamp': price (bin
+        lower edge), tick, vol_buy, vol_sell, trade_count; sorted by time, price.
+        """
+        self.compact()
+        state = self._state
+        minutes = state.index.get_level_values("minute").to_numpy(dtype=np.int64)
+        bins = state.index.get_level_values("bin").to_numpy(dtype=np.int64)
+        tick = self.tick or 1.0
+        # Round away float noise from bin * tick (e.g. 0.1 * 3)
+        decimals = max(0, -math.floor(math.log10(tick))) + 2
+        out = pd.DataFrame({
+            "price": np.round(bins * tick, decimals),
+            "tick": tick,
+            "vol_buy": state["vol_buy"].to_numpy(dtype=np.float64),
+            "vol_sell": state["vol_sell"].to_numpy(dtype=np.float64),
+            "trade_count": state["trade_count"].to_numpy(dtype=np.int64),
+        }, index=pd.DatetimeIndex(pd.to_datetime(minutes * FOOTPRINT_BUCKET_MS, unit="ms", utc=True), name="timestamp"))
+        return out
@@ -0,0 +1,75 @@
+import json
+from typing import Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from orderflow_recorder.process.aggregate import DEPTH_PARTIAL_COLUMNS, PARTIAL_COLUMNS
+
+
+# The set of raw chunks already folded in is stored in the partial file's own
+# schema metadata, so state and manifest are updated in one atomic object write.
+# Trade and depth partials share that one table (outer-joined on the second).
+MANIFEST_KEY = b"orderflow.processed_chunks"
+
+
+def partial_state_path(symbol: str, date_str: str) -> str:
+    return f"aggregated/{symbol}/{date_str}_1s.partial.parquet"
+
+
+def load_partial_state(
+    bucket, symbol: str, date_str: str
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Set[str]]:
+    """
+    Load the intraday per-second trade and depth partials and the manifest of
+    processed raw chunks. Returns (None, None, empty set) if no incremental run
+    has happened for that day.
+    """
+    blob = bucket.blob(partial_state_path(symbol, date_str))
+    if not blob.exists():
+        return None, None, set()
+
+    table = pq.read_table(pa.BufferReader(blob.download_as_bytes()))
+    metadata = table.schema.metadata or {}
+    processed = set(json.loads(metadata.get(MANIFEST_KEY, b"[]")))
+    state = table.to_pandas()
+    state.index = state.index.astype("int64")
+    state.index.name = "second"
+
+    # State written before a column existed: missing values stay NaN
+    state = state.reindex(columns=PARTIAL_COLUMNS + DEPTH_PARTIAL_COLUMNS)
+    trades = state[PARTIAL_COLUMNS].dropna(subset=["trade_count"])
+    trades = trades.astype({"first_ts": "int64", "last_ts": "int64", "trade_count": "int64"})
+    depth = state[DEPTH_PARTIAL_COLUMNS].dropna(subset=["spread_count"])
+    depth = depth.astype({"spread_count": "int64", "imbalance_count": "int64"})
+    return trades, depth, processed
+
+
+def save_partial_state(
+    bucket,
+    symbol: str,
+    date_str: str,
+    partials: pd.DataFrame,
+    processed: Set[str],
+    depth_partials: Optional[pd.DataFrame] = None,
+) -> None:
+    state = partials[PARTIAL_COLUMNS]
+    if depth_partials is not None:
+        state = state.join(depth_partials[DEPTH_PARTIAL_COLUMNS], how="outer")
+    table = pa.Table.from_pandas(state, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[MANIFEST_KEY] = json.dumps(sorted(processed)).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd")
+    bucket.blob(partial_state_path(symbol, date_str)).upload_from_string(
+        sink.getvalue().to_pybytes(), content_type="application/vnd.apache.parquet"
+    )
+
+
+def delete_partial_state(bucket, symbol: str, date_str: str) -> None:
+    blob = bucket.blob(partial_state_path(symbol, date_str))
+    if blob.exists():
+        blob.delete()
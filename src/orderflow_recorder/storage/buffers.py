@@ -0,0 +1,157 @@
+import re
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+
+
+# Sentinel for missing integer fields (ids/timestamps); written as null
+MISSING = -1
+
+_NAN = float("nan")
+
+DEFAULT_DEPTH_LEVELS = 20
+
+
+def depth_levels_for_stream(depth_stream: str) -> int:
+    """
+    Number of book levels per snapshot for a depth stream suffix,
+    e.g. 'depth20@100ms' -> 20. Diff-depth streams ('depth@100ms') fall back to 20.
+    """
+    match = re.match(r"depth(\d+)", depth_stream)
+    return int(match.group(1)) if match else DEFAULT_DEPTH_LEVELS
+
+
+def _ms(value: Union[None, int, datetime]) -> int:
+    if value is None:
+        return MISSING
+    if isinstance(value, datetime):
+        return int(round(value.timestamp() * 1000))
+    return int(value)
+
+
+class TradeColumns:
+    """
+    Growable typed arrays for one symbol's trades. One machine word per field per
+    trade instead of a dict (plus datetime/float objects) per trade.
+    """
+
+    __slots__ = ("event_time", "trade_time", "price", "quantity", "is_buyer_maker", "agg_trade_id")
+
+    def __init__(self) -> None:
+        self.event_time = array("q")
+        self.trade_time = array("q")
+        self.price = array("d")
+        self.quantity = array("d")
+        self.is_buyer_maker = array("b")
+        self.agg_trade_id = array("q")
+
+    def __len__(self) -> int:
+        return len(self.event_time)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in self.__slots__)
+
+    def append_record(self, trade: TradeRecord) -> None:
+        self.event_time.append(MISSING if trade.event_time is None else trade.event_time)
+        self.trade_time.append(MISSING if trade.trade_time is None else trade.trade_time)
+        self.price.append(trade.price)
+        self.quantity.append(trade.quantity)
+        self.is_buyer_maker.append(1 if trade.is_buyer_maker else 0)
+        self.agg_trade_id.append(MISSING if trade.agg_trade_id is None else trade.agg_trade_id)
+
+    def append_dict(self, trade: Dict[str, Any]) -> None:
+        self.event_time.append(_ms(trade.get("event_time")))
+        self.trade_time.append(_ms(trade.get("trade_time")))
+        self.price.append(float(trade.get("price") or 0))
+        self.quantity.append(float(trade.get("quantity") or 0))
+        self.is_buyer_maker.append(1 if trade.get("is_buyer_maker") else 0)
+        agg_trade_id = trade.get("agg_trade_id")
+        self.agg_trade_id.append(MISSING if agg_trade_id is None else int(agg_trade_id))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Zero-copy numpy views of the buffered columns."""
+        return {
+            "event_time": np.frombuffer(self.event_time, dtype=np.int64),
+            "trade_time": np.frombuffer(self.trade_time, dtype=np.int64),
+            "price": np.frombuffer(self.price, dtype=np.float64),
+            "quantity": np.frombuffer(self.quantity, dtype=np.float64),
+            "is_buyer_maker": np.frombuffer(self.is_buyer_maker, dtype=np.int8).astype(bool),
+            "agg_trade_id": np.frombuffer(self.agg_trade_id, dtype=np.int64),
+        }
+
+
+class DepthColumns:
+    """
+    Growable typed arrays for one symbol's depth snapshots. Level arrays have a
+    fixed width per row (NaN-padded), so they reshape to (rows, levels) matrices.
+    """
+
+    __slots__ = (
+        "levels", "event_time", "first_update_id", "final_update_id",
+        "bid_px", "bid_qty", "ask_px", "ask_qty",
+    )
+
+    def __init__(self, levels: int = DEFAULT_DEPTH_LEVELS) -> None:
+        self.levels = levels
+        self.event_time = array("q")
+        self.first_update_id = array("q")
+        self.final_update_id = array("q")
+        self.bid_px = array("d")
+        self.bid_qty = array("d")
+        self.ask_px = array("d")
+        self.ask_qty = array("d")
+
+    def __len__(self) -> int:
+        return len(self.event_time)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in self.__slots__[1:])
+
+    def append_record(self, depth: DepthRecord) -> None:
+        self._append(depth.event_time, depth.first_update_id, depth.final_update_id, depth.bids, depth.asks)
+
+    def append_dict(self, depth: Dict[str, Any]) -> None:
+        self._append(
+            _ms(depth.get("event_time")),
+            depth.get("first_update_id"),
+            depth.get("final_update_id"),
+            depth.get("bids") or [],
+            depth.get("asks") or [],
+        )
+
+    def _append(self, event_time: Optional[int], first_id: Optional[int], final_id: Optional[int], bids, asks) -> None:
+        self.event_time.append(MISSING if event_time is None else event_time)
+        self.first_update_id.append(MISSING if first_id is None else int(first_id))
+        self.final_update_id.append(MISSING if final_id is None else int(final_id))
+        self._append_side(bids, self.bid_px, self.bid_qty)
+        self._append_side(asks, self.ask_px, self.ask_qty)
+
+    def _append_side(self, levels_in, px: array, qty: array) -> None:
+        width = self.levels
+        levels_in = levels_in[:width]
+        for level in levels_in:
+            px.append(float(level[0]))
+            qty.append(float(level[1]))
+        missing = width - len(levels_in)
+        if missing:
+            pad = [_NAN] * missing
+            px.extend(pad)
+            qty.extend(pad)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Zero-copy numpy views; level columns as (rows, levels) matrices."""
+        width = self.levels
+        out = {
+            "event_time": np.frombuffer(self.event_time, dtype=np.int64),
+            "first_update_id": np.frombuffer(self.first_update_id, dtype=np.int64),
+            "final_update_id": np.frombuffer(self.final_update_id, dtype=np.int64),
+        }
+        for name in ("bid_px", "bid_qty", "ask_px", "ask_qty"):
+            out[name] = np.frombuffer(getattr(self, name), dtype=np.float64).reshape(-1, width)
+        return out
@@ -0,0 +1,25 @@
+import os
+from pathlib import Path
+
+from orderflow_recorder.config.settings import Settings
+
+
+def get_storage_client(settings: Settings):
+    """
+    Return a storage client for the configured backend.
+
+    LOCAL_STORAGE_ROOT switches every component to the filesystem stand-in
+    (offline runs, tests, benchmarks). Otherwise a GCS client is created; a local
+    gcp-key.json is picked up if GOOGLE_APPLICATION_CREDENTIALS is not set.
+    """
+    if settings.local_storage_root:
+        from orderflow_recorder.storage.local_bucket import LocalStorageClient
+
+        return LocalStorageClient(settings.local_storage_root)
+
+    from google.cloud import storage
+
+    key_path = Path("gcp-key.json")
+    if key_path.exists() and not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(key_path.absolute())
+    return storage.Client()
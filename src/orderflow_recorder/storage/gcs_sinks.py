@@ -1,14 +1,22 @@
 import asyncio
-import csv
-import io
-import json
 import os
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Any
+from typing import Dict, List, Union
 
-from google.cloud import storage
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
 from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.storage.buffers import DepthColumns, TradeColumns, depth_levels_for_stream
+from orderflow_recorder.storage.clients import get_storage_client
+from orderflow_recorder.storage.raw_format import (
+    CONTENT_TYPES,
+    chunk_blob_name,
+    encode_depth_columns,
+    encode_trade_columns,
+)
 from orderflow_recorder.storage.sinks import OrderbookSink, TradeSink
+from orderflow_recorder.storage.spool import DiskSpool, SpoolRecord, SpoolUploader
+from orderflow_recorder.utils import metrics
 from orderflow_recorder.utils.logging import get_logger
 
 
@@ -18,19 +26,24 @@ class GcsCsvSink(TradeSink, OrderbookSink):
         self._log = get_logger()
         self._bucket_name = settings.gcs_bucket_name
         self._buffer_seconds = settings.buffer_seconds
+        self._raw_format = settings.raw_format
 
-        # Buffers: symbol -> list of dicts
-        self._trade_buffer: Dict[str, List[Dict[str, Any]]] = {}
-        self._depth_buffer: Dict[str, List[Dict[str, Any]]] = {}
+        self._depth_levels = depth_levels_for_stream(settings.futures_streams_depth)
+
+        # Buffers: symbol -> columnar typed arrays (no per-event dicts kept alive).
+        # Single writer: write_* and _flush all run on the event loop and never await
+        # between reading and replacing these dicts, so no lock is needed. _flush swaps
+        # in fresh dicts (double buffering) and encodes the old ones in a thread.
+        self._trade_buffer: Dict[str, TradeColumns] = {}
+        self._depth_buffer: Dict[str, DepthColumns] = {}
         
-        self._lock = asyncio.Lock()
         self._running = False
         self._bg_task = None
 
-        # Initialize GCS Client
+        # Initialize GCS Client (or the local stand-in if LOCAL_STORAGE_ROOT is set)
         # GOOGLE_APPLICATION_CREDENTIALS should be set in env
         try:
-            self._client = storage.Client()
+            self._client = get_storage_client(settings)
             self._bucket = self._client.bucket(self._bucket_name)
             self._log.info(f"Initialized GCS Sink for bucket: {self._bucket_name}")
         except Exception as e:
@@ -38,11 +51,36 @@ class GcsCsvSink(TradeSink, OrderbookSink):
             self._client = None
             self._bucket = None
 
+        # Optional write-ahead spool: flushes go to local disk, uploads happen independently
+        self._spool = None
+        self._uploader = None
+        if settings.spool_dir:
+            self._spool = DiskSpool(
+                settings.spool_dir,
+                segment_max_bytes=settings.spool_segment_max_bytes,
+                segment_max_age=self._buffer_seconds,
+            )
+            if self._bucket is not None:
+                self._uploader = SpoolUploader(
+                    self._spool,
+                    self._bucket,
+                    concurrency=settings.spool_upload_concurrency,
+                    max_attempts=settings.spool_upload_max_attempts,
+                )
+
     async def start(self) -> None:
         """Start the periodic flush loop."""
         self._running = True
         self._bg_task = asyncio.create_task(self._flush_loop())
-        self._log.info(f"GCS Sink started. Buffer flush every {self._buffer_seconds}s.")
+        metrics.BUFFER_ROWS.add_source(self._buffer_rows_samples)
+        metrics.BUFFER_BYTES.add_source(self._buffer_bytes_samples)
+        if self._uploader:
+            await self._uploader.start()
+        elif self._spool:
+            self._log.warning("No GCS client available, chunks stay in the spool until restart.")
+        self._log.info(
+            f"GCS Sink started. Buffer flush every {self._buffer_seconds}s ({self._raw_format} chunks)."
+        )
 
     async def stop(self) -> None:
         """Stop the loop and flush remaining data."""
@@ -54,21 +92,59 @@ class GcsCsvSink(TradeSink, OrderbookSink):
             except asyncio.CancelledError:
                 pass
         await self._flush()
+        metrics.BUFFER_ROWS.remove_source(self._buffer_rows_samples)
+        metrics.BUFFER_BYTES.remove_source(self._buffer_bytes_samples)
+        if self._uploader:
+            await self._uploader.stop(drain=True)
+        elif self._spool:
+            await asyncio.to_thread(self._spool.seal)
         self._log.info("GCS Sink stopped.")
 
-    async def write_trade(self, trade: dict) -> None:
-        symbol = trade["symbol"]
-        async with self._lock:
-            if symbol not in self._trade_buffer:
-                self._trade_buffer[symbol] = []
-            self._trade_buffer[symbol].append(trade)
-
-    async def write_orderbook(self, depth: dict) -> None:
-        symbol = depth["symbol"]
-        async with self._lock:
-            if symbol not in self._depth_buffer:
-                self._depth_buffer[symbol] = []
-            self._depth_buffer[symbol].append(depth)
+    async def write_trade(self, trade: Union[dict, TradeRecord]) -> None:
+        typed = isinstance(trade, TradeRecord)
+        symbol = trade.symbol if typed else trade["symbol"]
+        buffer = self._trade_buffer.get(symbol)
+        if buffer is None:
+            buffer = self._trade_buffer[symbol] = TradeColumns()
+        if typed:
+            buffer.append_record(trade)
+        else:
+            buffer.append_dict(trade)
+
+    async def write_orderbook(self, depth: Union[dict, DepthRecord]) -> None:
+        typed = isinstance(depth, DepthRecord)
+        symbol = depth.symbol if typed else depth["symbol"]
+        buffer = self._depth_buffer.get(symbol)
+        if buffer is None:
+            buffer = self._depth_buffer[symbol] = DepthColumns(self._depth_levels)
+        if typed:
+            buffer.append_record(depth)
+        else:
+            buffer.append_dict(depth)
+
+    def buffer_stats(self) -> Dict[str, Dict[str, int]]:
+        """Buffered rows/bytes per symbol and type (for logging/metrics)."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for kind, buffers in (("trades", self._trade_buffer), ("depth", self._depth_buffer)):
+            for symbol, buffer in list(buffers.items()):
+                entry = stats.setdefault(symbol, {})
+                entry[f"{kind}_rows"] = len(buffer)
+                entry[f"{kind}_bytes"] = buffer.nbytes
+        return stats
+
+    def _buffer_rows_samples(self):
+        return [
+            ({"symbol": symbol, "type": key[:-5]}, value)
+            for symbol, entry in self.buffer_stats().items()
+            for key, value in entry.items() if key.endswith("_rows")
+        ]
+
+    def _buffer_bytes_samples(self):
+        return [
+            ({"symbol": symbol, "type": key[:-6]}, value)
+            for symbol, entry in self.buffer_stats().items()
+            for key, value in entry.items() if key.endswith("_bytes")
+        ]
 
     async def _flush_loop(self) -> None:
         while self._running:
@@ -79,80 +155,63 @@ class GcsCsvSink(TradeSink, OrderbookSink):
                 self._log.error(f"Error flushing to GCS: {exc!r}")
 
     async def _flush(self) -> None:
-        async with self._lock:
-            if not self._trade_buffer and not self._depth_buffer:
-                return
-            
-            # Swap buffers
-            trades_snapshot = self._trade_buffer
-            depth_snapshot = self._depth_buffer
-            self._trade_buffer = {}
-            self._depth_buffer = {}
-
-        if not self._client:
-            self._log.warning("No GCS client available, skipping upload (data lost).")
+        if not self._trade_buffer and not self._depth_buffer:
             return
 
-        # Upload in thread to avoid blocking event loop
-        await asyncio.to_thread(self._upload_batch, trades_snapshot, depth_snapshot)
+        # Swap buffers (atomic w.r.t. writers: no await until the swap is done)
+        trades_snapshot, self._trade_buffer = self._trade_buffer, {}
+        depth_snapshot, self._depth_buffer = self._depth_buffer, {}
+
+        started = time.perf_counter()
+        if self._spool:
+            # Encode + append to local disk in thread; the uploader drains it
+            await asyncio.to_thread(self._spool_batch, trades_snapshot, depth_snapshot)
+        elif not self._client:
+            self._log.warning("No GCS client available, skipping upload (data lost).")
+            return
+        else:
+            # Upload in thread to avoid blocking event loop
+            await asyncio.to_thread(self._upload_batch, trades_snapshot, depth_snapshot)
+        metrics.FLUSH_SECONDS.observe(time.perf_counter() - started)
 
-    def _upload_batch(self, trades_map: Dict[str, List[dict]], depth_map: Dict[str, List[dict]]) -> None:
+    def _encode_batch(self, trades_map: Dict[str, TradeColumns], depth_map: Dict[str, DepthColumns]) -> List[SpoolRecord]:
         now = datetime.now(timezone.utc)
         date_str = now.strftime("%Y-%m-%d")
         time_str = now.strftime("%H-%M-%S")
+        fmt = self._raw_format
+        content_type = CONTENT_TYPES[fmt]
+        chunks: List[SpoolRecord] = []
 
-        # Upload trades
+        # Trades
         for symbol, trades in trades_map.items():
             if not trades:
                 continue
-            
-            # CSV content
-            output = io.StringIO()
-            # Define CSV headers based on keys of the first element, or fixed schema
-            # Fixed schema is safer:
-            fieldnames = [
-                "source", "type", "symbol", "event_time", "trade_time", 
-                "price", "quantity", "is_buyer_maker", "agg_trade_id"
-            ]
-            writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
-            # writer.writeheader() # Maybe no header for raw chunks to save space? 
-            # Or yes header? Standard CSVs usually have headers. 
-            # The user wants to aggregate later. Headers make it safer for pandas.
-            writer.writeheader()
-            writer.writerows(trades)
-            
-            blob_name = f"raw/{symbol}/{date_str}/{time_str}_trades.csv"
-            self._upload_string_content(output.getvalue(), blob_name)
-
-        # Upload depth
+            blob_name = chunk_blob_name(symbol, date_str, time_str, "trades", fmt)
+            chunks.append(SpoolRecord(blob_name, content_type, encode_trade_columns(trades, symbol, fmt)))
+
+        # Depth
         for symbol, updates in depth_map.items():
             if not updates:
                 continue
+            blob_name = chunk_blob_name(symbol, date_str, time_str, "depth", fmt)
+            chunks.append(SpoolRecord(blob_name, content_type, encode_depth_columns(updates, symbol, fmt)))
+        return chunks
+
+    def _spool_batch(self, trades_map: Dict[str, TradeColumns], depth_map: Dict[str, DepthColumns]) -> None:
+        self._spool.append_batch(self._encode_batch(trades_map, depth_map))
 
-            output = io.StringIO()
-            fieldnames = [
-                "source", "type", "symbol", "event_time", 
-                "first_update_id", "final_update_id", "bids", "asks"
-            ]
-            writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            
-            # Need to JSON-serialize bids/asks lists for CSV
-            for row in updates:
-                row_copy = row.copy()
-                row_copy["bids"] = json.dumps(row_copy["bids"])
-                row_copy["asks"] = json.dumps(row_copy["asks"])
-                writer.writerow(row_copy)
-            
-            blob_name = f"raw/{symbol}/{date_str}/{time_str}_depth.csv"
-            self._upload_string_content(output.getvalue(), blob_name)
-
-    def _upload_string_content(self, content: str, blob_name: str) -> None:
+    def _upload_batch(self, trades_map: Dict[str, TradeColumns], depth_map: Dict[str, DepthColumns]) -> None:
+        for chunk in self._encode_batch(trades_map, depth_map):
+            self._upload_content(chunk.payload, chunk.blob_name, chunk.content_type)
+
+    def _upload_content(self, content: bytes, blob_name: str, content_type: str) -> None:
         try:
+            started = time.perf_counter()
             blob = self._bucket.blob(blob_name)
-            blob.upload_from_string(content, content_type="text/csv")
+            blob.upload_from_string(content, content_type=content_type)
+            metrics.UPLOAD_SECONDS.observe(time.perf_counter() - started)
+            metrics.UPLOAD_BYTES.inc(amount=len(content))
             self._log.debug(f"Uploaded {blob_name}")
         except Exception as e:
+            metrics.UPLOAD_FAILURES.inc()
             self._log.error(f"Failed to upload {blob_name}: {e}")
-
-
@@ -0,0 +1,141 @@
+import io
+import os
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+
+class LocalBlob:
+    """
+    Filesystem stand-in for google.cloud.storage.Blob.
+    Implements the subset of the Blob API the recorder, daily job and API use.
+    """
+
+    def __init__(self, bucket: "LocalBucket", name: str) -> None:
+        self.bucket = bucket
+        self.name = name
+        self.content_type: Optional[str] = None
+
+    @property
+    def _path(self) -> Path:
+        return self.bucket.root / self.name
+
+    @property
+    def size(self) -> Optional[int]:
+        try:
+            return self._path.stat().st_size
+        except FileNotFoundError:
+            return None
+
+    @property
+    def generation(self) -> Optional[int]:
+        # mtime in ns changes on every overwrite, like a GCS object generation
+        try:
+            return self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def updated(self) -> Optional[datetime]:
+        generation = self.generation
+        if generation is None:
+            return None
+        return datetime.fromtimestamp(generation / 1e9, tz=timezone.utc)
+
+    def exists(self) -> bool:
+        return self._path.is_file()
+
+    def reload(self) -> None:
+        if not self.exists():
+            raise FileNotFoundError(f"No such object: {self.bucket.name}/{self.name}")
+
+    def upload_from_string(self, data: Union[str, bytes], content_type: Optional[str] = None) -> None:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.content_type = content_type
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a partial object
+        tmp_path = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def upload_from_file(self, file_obj: IO[bytes], content_type: Optional[str] = None, rewind: bool = False) -> None:
+        if rewind:
+            file_obj.seek(0)
+        self.upload_from_string(file_obj.read(), content_type=content_type)
+
+    def upload_from_filename(self, filename: str, content_type: Optional[str] = None) -> None:
+        with open(filename, "rb") as f:
+            self.upload_from_file(f, content_type=content_type)
+
+    def download_as_bytes(self) -> bytes:
+        return self._path.read_bytes()
+
+    def download_as_text(self, encoding: str = "utf-8") -> str:
+        return self.download_as_bytes().decode(encoding)
+
+    def download_to_file(self, file_obj: IO[bytes]) -> None:
+        file_obj.write(self.download_as_bytes())
+
+    def open(self, mode: str = "rb"):
+        if "r" not in mode:
+            raise ValueError("LocalBlob.open only supports reading")
+        return io.BytesIO(self.download_as_bytes()) if "b" in mode else io.StringIO(self.download_as_text())
+
+    def delete(self) -> None:
+        self._path.unlink()
+
+    def __repr__(self) -> str:
+        return f"<LocalBlob: {self.bucket.name}, {self.name}>"
+
+
+class LocalBucket:
+    def __init__(self, client: "LocalStorageClient", name: str) -> None:
+        self.client = client
+        self.name = name
+        self.root = client.root / name
+
+    def blob(self, blob_name: str) -> LocalBlob:
+        return LocalBlob(self, blob_name)
+
+    def get_blob(self, blob_name: str) -> Optional[LocalBlob]:
+        blob = self.blob(blob_name)
+        return blob if blob.exists() else None
+
+    def list_blobs(self, prefix: str = "") -> Iterator[LocalBlob]:
+        """Yield blobs under prefix in lexicographic name order (like GCS)."""
+        if not self.root.exists():
+            return iter(())
+        names = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for file_name in filenames:
+                if file_name.startswith("."):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, file_name), self.root).replace(os.sep, "/")
+                if rel.startswith(prefix):
+                    names.append(rel)
+        return iter([self.blob(n) for n in sorted(names)])
+
+
+class LocalStorageClient:
+    """
+    Drop-in replacement for google.cloud.storage.Client backed by a local directory.
+    Bucket 'b' lives at {root}/b and object 'raw/X/y.csv' at {root}/b/raw/X/y.csv.
+    """
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def bucket(self, bucket_name: str) -> LocalBucket:
+        return LocalBucket(self, bucket_name)
+
+    def list_blobs(self, bucket_or_name: Union[str, LocalBucket], prefix: str = "") -> Iterator[LocalBlob]:
+        bucket = bucket_or_name if isinstance(bucket_or_name, LocalBucket) else self.bucket(bucket_or_name)
+        return bucket.list_blobs(prefix=prefix)
+
+    def batch(self):
+        return nullcontext()
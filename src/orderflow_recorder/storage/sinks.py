@@ -1,11 +1,11 @@
-from typing import Protocol
+from typing import Protocol, Union
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
 
 
 class TradeSink(Protocol):
-	async def write_trade(self, trade: dict) -> None: ...
+	async def write_trade(self, trade: Union[dict, TradeRecord]) -> None: ...
 
 
 class OrderbookSink(Protocol):
-	async def write_orderbook(self, depth: dict) -> None: ...
-
-
+	async def write_orderbook(self, depth: Union[dict, DepthRecord]) -> None: ...
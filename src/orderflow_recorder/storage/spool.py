@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from orderflow_recorder.utils import metrics
+from orderflow_recorder.utils.logging import get_logger
+
+
+# Record framing: magic, meta length, payload length, payload crc32
+_HEADER = struct.Struct(">4sIII")
+_MAGIC = b"OFS1"
+
+_OPEN_SUFFIX = ".open"
+_SEALED_SUFFIX = ".seg"
+
+
+class SpoolRecord(NamedTuple):
+    blob_name: str
+    content_type: str
+    payload: bytes
+
+
+class DiskSpool:
+    """
+    Write-ahead spool for encoded chunks.
+
+    Batches are appended to the currently open segment file and fsynced once per
+    batch. A segment is sealed (renamed *.open -> *.seg) once it exceeds
+    segment_max_bytes or is older than segment_max_age; only sealed segments are
+    handed to the uploader. Segments left open by a crash are sealed on startup and
+    read up to the last complete record.
+
+    All methods are blocking and thread-safe; call them via asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int, segment_max_age: float) -> None:
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._segment_max_bytes = segment_max_bytes
+        self._segment_max_age = segment_max_age
+        self._lock = threading.Lock()
+        self._log = get_logger()
+
+        self._file = None
+        self._path: Optional[Path] = None
+        self._opened_at = 0.0
+        self._size = 0
+        self._seq = self._recover()
+
+    def _recover(self) -> int:
+        last_seq = 0
+        for path in self._dir.iterdir():
+            if path.suffix not in (_OPEN_SUFFIX, _SEALED_SUFFIX):
+                continue
+            try:
+                last_seq = max(last_seq, int(path.stem))
+            except ValueError:
+                continue
+            if path.suffix == _OPEN_SUFFIX:
+                os.replace(path, path.with_suffix(_SEALED_SUFFIX))
+                self._log.warning(f"Recovered unsealed spool segment {path.name}")
+        return last_seq
+
+    def append_batch(self, records: List[SpoolRecord]) -> None:
+        if not records:
+            return
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            for record in records:
+                meta = json.dumps(
+                    {"blob_name": record.blob_name, "content_type": record.content_type}
+                ).encode("utf-8")
+                header = _HEADER.pack(_MAGIC, len(meta), len(record.payload), zlib.crc32(record.payload))
+                self._file.write(header)
+                self._file.write(meta)
+                self._file.write(record.payload)
+                self._size += _HEADER.size + len(meta) + len(record.payload)
+            # One fsync per batch, not per record
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if self._size >= self._segment_max_bytes:
+                self._seal_locked()
+
+    def roll_if_stale(self) -> None:
+        """Seal the open segment if it has been open longer than segment_max_age."""
+        with self._lock:
+            if self._file is not None and time.monotonic() - self._opened_at >= self._segment_max_age:
+                self._seal_locked()
+
+    def seal(self) -> None:
+        with self._lock:
+            self._seal_locked()
+
+    def sealed_segments(self) -> List[Path]:
+        return sorted(self._dir.glob(f"*{_SEALED_SUFFIX}"))
+
+    def pending_bytes(self) -> int:
+        total = 0
+        for path in self._dir.iterdir():
+            if path.suffix in (_OPEN_SUFFIX, _SEALED_SUFFIX):
+                total += path.stat().st_size
+        return total
+
+    def remove(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+
+    def _open_segment(self) -> None:
+        self._seq += 1
+        self._path = self._dir / f"{self._seq:012d}{_OPEN_SUFFIX}"
+        self._file = open(self._path, "ab")
+        self._opened_at = time.monotonic()
+        self._size = 0
+
+    def _seal_locked(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path, self._path.with_suffix(_SEALED_SUFFIX))
+        self._file = None
+        self._path = None
+        self._size = 0
+
+
+def read_segment(path: Path) -> List[SpoolRecord]:
+    """
+    Read all complete records of a segment. A torn or corrupt tail (crash while
+    appending) ends the read; everything before it is returned.
+    """
+    log = get_logger()
+    records: List[SpoolRecord] = []
+    data = path.read_bytes()
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        magic, meta_len, payload_len, crc = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        end = start + meta_len + payload_len
+        if magic != _MAGIC or end > len(data):
+            log.warning(f"Truncated spool segment {path.name} at offset {offset}")
+            break
+        payload = data[start + meta_len:end]
+        if zlib.crc32(payload) != crc:
+            log.warning(f"Corrupt record in spool segment {path.name} at offset {offset}")
+            break
+        meta = json.loads(data[start:start + meta_len])
+        records.append(SpoolRecord(meta["blob_name"], meta["content_type"], payload))
+        offset = end
+    return records
+
+
+class SpoolUploader:
+    """
+    Drains sealed spool segments into the bucket, independently of ingest.
+
+    Records of a segment are uploaded with bounded concurrency and per-record
+    exponential backoff. A segment is deleted only after all of its records are
+    uploaded; otherwise it stays on disk and is retried on the next pass.
+    """
+
+    def __init__(
+        self,
+        spool: DiskSpool,
+        bucket,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        poll_interval: float = 1.0,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        self._spool = spool
+        self._bucket = bucket
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._max_attempts = max(1, max_attempts)
+        self._poll_interval = poll_interval
+        self._retry_backoff = retry_backoff
+        self._log = get_logger()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        # segment name -> indexes of records already uploaded (survives failed passes)
+        self._done: Dict[str, Set[int]] = {}
+
+    async def start(self) -> None:
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the background loop; optionally make one final pass over all segments."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if drain:
+            await asyncio.to_thread(self._spool.seal)
+            await self.drain_once()
+
+    async def _run(self) -> None:
+        while self._running:
+            try:
+                await asyncio.to_thread(self._spool.roll_if_stale)
+                uploaded = await self.drain_once()
+            except Exception as exc:
+                self._log.error(f"Spool uploader error: {exc!r}")
+                uploaded = 0
+            if not uploaded:
+                await asyncio.sleep(self._poll_interval)
+
+    async def drain_once(self) -> int:
+        """Upload every sealed segment once. Returns the number of segments completed."""
+        completed = 0
+        for path in self._spool.sealed_segments():
+            if await self._drain_segment(path):
+                completed += 1
+            else:
+                # Keep ordering: don't skip ahead while the store is failing
+                break
+        return completed
+
+    async def _drain_segment(self, path: Path) -> bool:
+        records = await asyncio.to_thread(read_segment, path)
+        done = self._done.setdefault(path.name, set())
+        pending = [i for i in range(len(records)) if i not in done]
+
+        results = await asyncio.gather(*(self._upload_with_retry(records[i]) for i in pending))
+        for i, ok in zip(pending, results):
+            if ok:
+                done.add(i)
+
+        if len(done) < len(records):
+            self._log.warning(
+                f"Spool segment {path.name}: {len(records) - len(done)} record(s) not uploaded, will retry."
+            )
+            return False
+
+        await asyncio.to_thread(self._spool.remove, path)
+        self._done.pop(path.name, None)
+        self._log.debug(f"Spool segment {path.name} drained ({len(records)} records)")
+        return True
+
+    async def _upload_with_retry(self, record: SpoolRecord) -> bool:
+        delay = self._retry_backoff
+        for attempt in range(1, self._max_attempts + 1):
+            async with self._semaphore:
+                try:
+                    await asyncio.to_thread(self._upload, record)
+                    return True
+                except Exception as exc:
+                    metrics.UPLOAD_FAILURES.inc()
+                    self._log.error(
+                        f"Failed to upload {record.blob_name} (attempt {attempt}/{self._max_attempts}): {exc}"
+                    )
+            if attempt < self._max_attempts:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        return False
+
+    def _upload(self, record: SpoolRecord) -> None:
+        started = time.perf_counter()
+        blob = self._bucket.blob(record.blob_name)
+        blob.upload_from_string(record.payload, content_type=record.content_type)
+        metrics.UPLOAD_SECONDS.observe(time.perf_counter() - started)
+        metrics.UPLOAD_BYTES.inc(amount=len(record.payload))
@@ -0,0 +1,204 @@
+"""
+Minimal Prometheus text-format metrics (no client library dependency).
+
+Counters, gauges and histograms are plain Python objects; the per-message ingest
+path does not touch them at all. High-frequency values (message counts, reconnects,
+buffer sizes) live in their owners' own counters and are read at scrape time
+through callback metrics. Only low-frequency events (flushes, uploads, sampled
+timings) are observed directly.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; wide enough for sub-ms parsing up to multi-second uploads
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+	parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+	if value == int(value) and abs(value) < 1e15:
+		return str(int(value))
+	return repr(float(value))
+
+
+class _Metric:
+	kind = ""
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self._lock = threading.Lock()
+
+	def _header(self) -> List[str]:
+		return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+	def render(self) -> List[str]:
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	kind = "counter"
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+		super().__init__(name, help, labelnames)
+		self._values: Dict[Labels, float] = {}
+
+	def inc(self, *labels: str, amount: float = 1.0) -> None:
+		with self._lock:
+			self._values[labels] = self._values.get(labels, 0.0) + amount
+
+	def value(self, *labels: str) -> float:
+		return self._values.get(labels, 0.0)
+
+	def render(self) -> List[str]:
+		lines = self._header()
+		for labels, value in sorted(self._values.items()):
+			lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+		return lines
+
+
+class Gauge(Counter):
+	kind = "gauge"
+
+	def set(self, value: float, *labels: str) -> None:
+		with self._lock:
+			self._values[labels] = value
+
+
+class Histogram(_Metric):
+	kind = "histogram"
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+		super().__init__(name, help, labelnames)
+		self.buckets = tuple(sorted(buckets))
+		# labels -> [per-bucket counts (+Inf last), sum]
+		self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+	def observe(self, value: float, *labels: str) -> None:
+		index = bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(labels)
+			if series is None:
+				series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+			series[0][index] += 1
+			series[1][0] += value
+
+	def count(self, *labels: str) -> int:
+		series = self._series.get(labels)
+		return sum(series[0]) if series else 0
+
+	def render(self) -> List[str]:
+		lines = self._header()
+		for labels, (counts, total) in sorted(self._series.items()):
+			cumulative = 0
+			for bound, count in zip(self.buckets + (float("inf"),), counts):
+				cumulative += count
+				le = "+Inf" if bound == float("inf") else repr(bound)
+				le_label = f'le="{le}"'
+				lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}")
+			lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total[0])}")
+			lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+		return lines
+
+
+class CallbackMetric(_Metric):
+	"""Counter or gauge whose samples are pulled at scrape time from registered sources."""
+
+	def __init__(self, name: str, help: str, kind: str = "gauge") -> None:
+		super().__init__(name, help)
+		self.kind = kind
+		self._sources: List[Callable[[], Iterable[Sample]]] = []
+
+	def add_source(self, source: Callable[[], Iterable[Sample]]) -> None:
+		self._sources.append(source)
+
+	def remove_source(self, source: Callable[[], Iterable[Sample]]) -> None:
+		if source in self._sources:
+			self._sources.remove(source)
+
+	def render(self) -> List[str]:
+		lines = self._header()
+		for source in list(self._sources):
+			for labels, value in source():
+				lines.append(f"{self.name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+		return lines
+
+
+class Registry:
+	def __init__(self) -> None:
+		self._metrics: Dict[str, _Metric] = {}
+
+	def register(self, metric: _Metric) -> _Metric:
+		self._metrics[metric.name] = metric
+		return metric
+
+	def get(self, name: str) -> Optional[_Metric]:
+		return self._metrics.get(name)
+
+	def render(self) -> str:
+		lines: List[str] = []
+		for metric in self._metrics.values():
+			lines.extend(metric.render())
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- Ingest (samples pulled from IngestStats of each WS connection) ---
+WS_MESSAGES = REGISTRY.register(CallbackMetric("orderflow_ws_messages_total", "Messages received per connection and stream kind", "counter"))
+WS_DROPPED = REGISTRY.register(CallbackMetric("orderflow_ws_dropped_depth_total", "Depth snapshots dropped on a full ingest queue", "counter"))
+WS_RECONNECTS = REGISTRY.register(CallbackMetric("orderflow_ws_reconnects_total", "WS reconnects after connection errors", "counter"))
+WS_QUEUE = REGISTRY.register(CallbackMetric("orderflow_ws_queue_size", "Events waiting between socket reader and sink"))
+WS_PARSE = REGISTRY.register(Histogram("orderflow_ws_parse_seconds", "JSON decode time per frame (sampled)"))
+WS_DISPATCH = REGISTRY.register(Histogram("orderflow_ws_dispatch_seconds", "Record decode + sink write per event (sampled)", ["kind"]))
+
+# --- Sink ---
+BUFFER_ROWS = REGISTRY.register(CallbackMetric("orderflow_buffer_rows", "Rows buffered until the next flush"))
+BUFFER_BYTES = REGISTRY.register(CallbackMetric("orderflow_buffer_bytes", "Bytes buffered until the next flush"))
+FLUSH_SECONDS = REGISTRY.register(Histogram("orderflow_flush_seconds", "Buffer flush (encode + spool or upload)"))
+UPLOAD_SECONDS = REGISTRY.register(Histogram("orderflow_upload_seconds", "Chunk upload latency"))
+UPLOAD_BYTES = REGISTRY.register(Counter("orderflow_upload_bytes_total", "Bytes uploaded to the bucket"))
+UPLOAD_FAILURES = REGISTRY.register(Counter("orderflow_upload_failures_total", "Failed chunk uploads (attempts)"))
+
+# --- Process ---
+LOOP_LAG = REGISTRY.register(Histogram("orderflow_event_loop_lag_seconds", "Event loop scheduling delay"))
+LOOP_LAG_MAX = REGISTRY.register(Gauge("orderflow_event_loop_lag_max_seconds", "Largest event loop delay in the last monitor window"))
+
+
+async def monitor_event_loop(interval: float = 0.25, window: float = 10.0) -> None:
+	"""
+	Measure how late the loop wakes up a sleeping task. Anything above a few ms
+	means callbacks (decoding, buffering) are hogging the loop.
+	"""
+	clock = time.perf_counter
+	window_max = 0.0
+	window_start = clock()
+	while True:
+		start = clock()
+		await asyncio.sleep(interval)
+		lag = max(0.0, clock() - start - interval)
+		LOOP_LAG.observe(lag)
+		window_max = max(window_max, lag)
+		if clock() - window_start >= window:
+			LOOP_LAG_MAX.set(window_max)
+			window_max = 0.0
+			window_start = clock()
@@ -0,0 +1,250 @@
+"""
+On-demand diagnostics for a running process (recorder or API).
+
+Nothing here costs anything until it is switched on: the sampling profiler is a
+thread that exists only for the duration of a profile, tracemalloc is started
+and stopped explicitly, and the slow-callback tracker only patches asyncio's
+Handle._run while it is active.
+"""
+import asyncio
+import heapq
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+
+class ProfilerBusy(RuntimeError):
+	"""A profile (or tracker) is already running in this process."""
+
+
+def _frame_label(frame) -> str:
+	code = frame.f_code
+	# Last two path components keep package context without full site-packages paths
+	filename = "/".join(code.co_filename.rsplit("/", 2)[-2:])
+	return f"{filename}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+	"""
+	Wall-clock sampling profiler over all threads via sys._current_frames().
+	Stacks are aggregated in collapsed ("folded") form, ready for flamegraph.pl
+	or speedscope; top() gives self/total sample counts per function.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+
+	def run(self, seconds: float, interval: float = 0.005, max_depth: int = 64) -> "ProfileResult":
+		"""Blocking; call from a worker thread (asyncio.to_thread) so the loop keeps running."""
+		if not self._lock.acquire(blocking=False):
+			raise ProfilerBusy("A CPU profile is already running")
+		try:
+			me = threading.get_ident()
+			names = {t.ident: t.name for t in threading.enumerate()}
+			stacks: Counter = Counter()
+			samples = 0
+			deadline = time.perf_counter() + seconds
+			while time.perf_counter() < deadline:
+				for ident, frame in sys._current_frames().items():
+					if ident == me:
+						continue
+					labels = []
+					while frame is not None and len(labels) < max_depth:
+						labels.append(_frame_label(frame))
+						frame = frame.f_back
+					labels.append(names.get(ident, f"thread-{ident}"))
+					stacks[";".join(reversed(labels))] += 1
+				samples += 1
+				time.sleep(interval)
+			return ProfileResult(stacks, samples, seconds, interval)
+		finally:
+			self._lock.release()
+
+
+class ProfileResult:
+	def __init__(self, stacks: Counter, samples: int, seconds: float, interval: float) -> None:
+		self.stacks = stacks
+		self.samples = samples
+		self.seconds = seconds
+		self.interval = interval
+
+	def collapsed(self) -> str:
+		return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+	def top(self, limit: int = 30) -> Dict[str, Any]:
+		self_counts: Counter = Counter()
+		total_counts: Counter = Counter()
+		for stack, count in self.stacks.items():
+			# First element is the thread name
+			frames = stack.split(";")[1:]
+			if frames:
+				self_counts[frames[-1]] += count
+			for label in set(frames):
+				total_counts[label] += count
+		return {
+			"samples": self.samples,
+			"seconds": self.seconds,
+			"interval_ms": self.interval * 1000,
+			"self": [{"function": f, "samples": n} for f, n in self_counts.most_common(limit)],
+			"total": [{"function": f, "samples": n} for f, n in total_counts.most_common(limit)],
+		}
+
+
+class MemoryTracker:
+	"""tracemalloc with a baseline snapshot; diff() reports the top growth since the baseline."""
+
+	_IGNORE = (
+		tracemalloc.Filter(False, tracemalloc.__file__),
+		tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+		tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+		tracemalloc.Filter(False, "<unknown>"),
+	)
+
+	def __init__(self) -> None:
+		self._baseline: Optional[tracemalloc.Snapshot] = None
+
+	@property
+	def active(self) -> bool:
+		return tracemalloc.is_tracing()
+
+	def start(self, frames: int = 10) -> Dict[str, Any]:
+		if tracemalloc.is_tracing():
+			raise ProfilerBusy("tracemalloc is already running")
+		tracemalloc.start(frames)
+		self._baseline = tracemalloc.take_snapshot().filter_traces(self._IGNORE)
+		return self.status()
+
+	def stop(self) -> Dict[str, Any]:
+		status = self.status()
+		tracemalloc.stop()
+		self._baseline = None
+		return status
+
+	def status(self) -> Dict[str, Any]:
+		current, peak = tracemalloc.get_traced_memory()
+		return {"tracing": tracemalloc.is_tracing(), "traced_bytes": current, "peak_bytes": peak}
+
+	def diff(self, top: int = 25, key: str = "lineno", rebase: bool = False) -> Dict[str, Any]:
+		"""Top allocation growth since the baseline, grouped by 'lineno', 'filename' or 'traceback'."""
+		if not tracemalloc.is_tracing() or self._baseline is None:
+			raise RuntimeError("tracemalloc is not running; start it first")
+		snapshot = tracemalloc.take_snapshot().filter_traces(self._IGNORE)
+		stats = snapshot.compare_to(self._baseline, key)
+		entries = []
+		for stat in stats[:top]:
+			entries.append({
+				"location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+				"size_diff": stat.size_diff,
+				"size": stat.size,
+				"count_diff": stat.count_diff,
+				"count": stat.count,
+			})
+		if rebase:
+			self._baseline = snapshot
+		return {**self.status(), "key": key, "top": entries}
+
+
+def _describe_callback(handle: asyncio.Handle) -> str:
+	callback = getattr(handle, "_callback", None)
+	owner = getattr(callback, "__self__", None)
+	if isinstance(owner, asyncio.Task):
+		coro = owner.get_coro()
+		return f"Task {owner.get_name()} ({getattr(coro, '__qualname__', coro)})"
+	return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class SlowCallbackTracker:
+	"""
+	Times every event-loop callback while active (by wrapping asyncio.Handle._run)
+	and keeps the slowest ones above a threshold. A stalled loop shows up here as
+	the task or callback that blocked it.
+	"""
+
+	def __init__(self) -> None:
+		self._original = None
+		self._slowest: List = []
+		self._counts: Counter = Counter()
+		self._threshold = 0.0
+		self._keep = 50
+		self._started = 0.0
+		self._seq = 0
+
+	@property
+	def active(self) -> bool:
+		return self._original is not None
+
+	def start(self, threshold: float = 0.05, keep: int = 50) -> Dict[str, Any]:
+		if self.active:
+			raise ProfilerBusy("Slow-callback tracking is already running")
+		self._slowest = []
+		self._counts = Counter()
+		self._threshold = threshold
+		self._keep = keep
+		self._started = time.time()
+		original = self._original = asyncio.Handle._run
+		clock = time.perf_counter
+		tracker = self
+
+		def _run(handle):
+			start = clock()
+			try:
+				return original(handle)
+			finally:
+				elapsed = clock() - start
+				if elapsed >= tracker._threshold:
+					tracker._record(elapsed, handle)
+
+		asyncio.Handle._run = _run
+		return self.report()
+
+	def stop(self) -> Dict[str, Any]:
+		report = self.report()
+		if self._original is not None:
+			asyncio.Handle._run = self._original
+			self._original = None
+		return report
+
+	def _record(self, elapsed: float, handle) -> None:
+		name = _describe_callback(handle)
+		self._counts[name] += 1
+		self._seq += 1
+		entry = (elapsed, self._seq, name, time.time())
+		if len(self._slowest) < self._keep:
+			heapq.heappush(self._slowest, entry)
+		elif elapsed > self._slowest[0][0]:
+			heapq.heapreplace(self._slowest, entry)
+
+	def report(self) -> Dict[str, Any]:
+		return {
+			"active": self.active,
+			"threshold_ms": self._threshold * 1000,
+			"since": self._started or None,
+			"slowest": [
+				{"callback": name, "ms": round(elapsed * 1000, 3), "at": at}
+				for elapsed, _, name, at in sorted(self._slowest, reverse=True)
+			],
+			"counts": dict(self._counts.most_common(self._keep)),
+		}
+
+
+def task_summary(top: int = 30) -> Dict[str, Any]:
+	"""asyncio tasks of the running loop, grouped by coroutine."""
+	tasks = asyncio.all_tasks()
+	by_coro: Counter = Counter()
+	for task in tasks:
+		coro = task.get_coro()
+		by_coro[getattr(coro, "__qualname__", type(coro).__name__)] += 1
+	return {
+		"tasks": len(tasks),
+		"threads": threading.active_count(),
+		"by_coroutine": dict(by_coro.most_common(top)),
+	}
+
+
+# One of each per process
+PROFILER = SamplingProfiler()
+MEMORY = MemoryTracker()
+SLOW_CALLBACKS = SlowCallbackTracker()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient as AiohttpClient, TestServer
+from fastapi.testclient import TestClient
+
+from orderflow_api import main
+from orderflow_recorder.config.settings import Settings, get_settings
+from orderflow_recorder.ingest.admin import add_admin_routes
+from orderflow_recorder.utils.profiling import SlowCallbackTracker
+
+
+@pytest.fixture
+def api():
+	main.app.dependency_overrides[get_settings] = lambda: Settings(admin_token="secret", admin_profile_max_seconds=5)
+	yield TestClient(main.app)
+	main.app.dependency_overrides.clear()
+
+
+def test_api_admin_requires_token_and_is_hidden_without_one(api):
+	assert api.get("/admin/tasks").status_code == 401
+	assert api.get("/admin/tasks", headers={"X-Admin-Token": "wrong"}).status_code == 401
+	main.app.dependency_overrides[get_settings] = lambda: Settings(admin_token="")
+	assert api.get("/admin/tasks", headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_api_admin_profile_tracemalloc_and_slow_callbacks(api):
+	headers = {"X-Admin-Token": "secret"}
+
+	body = api.get("/admin/profile", params={"seconds": 0.2, "interval_ms": 2}, headers=headers).json()
+	assert body["samples"] > 10 and body["total"]
+	collapsed = api.get("/admin/profile", params={"seconds": 0.1, "format": "collapsed"}, headers=headers).text
+	assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+	assert api.get("/admin/profile", params={"seconds": 60}, headers=headers).status_code == 400
+
+	assert api.get("/admin/tracemalloc", headers=headers).status_code == 400
+	assert api.post("/admin/tracemalloc/start", headers=headers).json()["tracing"] is True
+	assert api.post("/admin/tracemalloc/start", headers=headers).status_code == 409
+	hold = [bytearray(1024) for _ in range(2000)]
+	diff = api.get("/admin/tracemalloc", params={"top": 5}, headers=headers).json()
+	assert diff["top"] and diff["top"][0]["size_diff"] >= 1024 * 1000
+	assert api.post("/admin/tracemalloc/stop", headers=headers).json()["tracing"] is True
+	del hold
+
+	assert api.post("/admin/slow-callbacks/start", params={"threshold_ms": 1}, headers=headers).json()["active"]
+	assert api.get("/admin/tasks", headers=headers).json()["tasks"] >= 1
+	assert api.post("/admin/slow-callbacks/stop", headers=headers).json()["active"] is True
+	assert api.get("/admin/slow-callbacks", headers=headers).json()["active"] is False
+
+
+@pytest.mark.asyncio
+async def test_slow_callback_tracker_names_the_blocking_task():
+	tracker = SlowCallbackTracker()
+
+	async def hog():
+		time.sleep(0.03)
+
+	tracker.start(threshold=0.02)
+	try:
+		await asyncio.create_task(hog(), name="hog-task")
+	finally:
+		report = tracker.stop()
+	assert report["slowest"][0]["callback"].startswith("Task hog-task")
+	assert report["slowest"][0]["ms"] >= 30
+	assert not tracker.active
+
+
+@pytest.mark.asyncio
+async def test_recorder_admin_routes():
+	app = web.Application()
+	add_admin_routes(app, "secret")
+	async with AiohttpClient(TestServer(app)) as client:
+		assert (await client.get("/admin/tasks")).status == 401
+		resp = await client.get("/admin/tasks", headers={"X-Admin-Token": "secret"})
+		assert (await resp.json())["tasks"] >= 1
+		resp = await client.get("/admin/profile", params={"seconds": "0.1"}, headers={"X-Admin-Token": "secret"})
+		assert (await resp.json())["samples"] > 0
+		resp = await client.get("/admin/profile", params={"seconds": "500"}, headers={"X-Admin-Token": "secret"})
+		assert resp.status == 400
+
+	# No token configured: no admin routes at all
+	bare = web.Application()
+	add_admin_routes(bare, "")
+	async with AiohttpClient(TestServer(bare)) as client:
+		assert (await client.get("/admin/tasks", headers={"X-Admin-Token": ""})).status == 404
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from orderflow_recorder.process.aggregate import (
+	DepthAggregator,
+	TradeAggregator,
+	candle_pyramid,
+	depth_to_partials,
+	merge_partials,
+	trades_to_partials,
+)
+
+
+def _random_trades(n: int, seed: int = 7) -> pd.DataFrame:
+	rng = np.random.default_rng(seed)
+	ts_ms = 1700000000000 + np.sort(rng.integers(0, 120_000, size=n))
+	return pd.DataFrame({
+		"event_time": pd.to_datetime(ts_ms, unit="ms", utc=True),
+		"price": np.round(35000 + rng.normal(0, 5, size=n).cumsum(), 1),
+		"quantity": np.round(rng.random(n), 3),
+		"is_buyer_maker": rng.random(n) < 0.5,
+	})
+
+
+def _reference_1s(df: pd.DataFrame) -> pd.DataFrame:
+	ref = df.set_index("event_time").sort_index(kind="stable")
+	ref["vol_buy"] = ref["quantity"].where(~ref["is_buyer_maker"], 0.0)
+	ref["vol_sell"] = ref["quantity"].where(ref["is_buyer_maker"], 0.0)
+	out = ref.resample("1s").agg({
+		"price": ["first", "max", "min", "last", "count"],
+		"quantity": "sum",
+		"vol_buy": "sum",
+		"vol_sell": "sum",
+	})
+	out.columns = ["open", "high", "low", "close", "trade_count", "vol_total", "vol_buy", "vol_sell"]
+	out["close"] = out["close"].ffill()
+	for col in ("open", "high", "low"):
+		out[col] = out[col].fillna(out["close"])
+	return out
+
+
+def test_streaming_matches_whole_day_resample():
+	df = _random_trades(5000)
+	aggregator = TradeAggregator(compact_rows=50)
+	# Uneven chunks that split seconds, fed out of order
+	bounds = [0, 700, 1501, 2222, 4000, 5000]
+	chunks = [df.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+	for chunk in [chunks[2], chunks[0], chunks[4], chunks[1], chunks[3]]:
+		aggregator.add_trades(chunk)
+
+	result = aggregator.finalize()
+	expected = _reference_1s(df)
+
+	assert aggregator.trades_seen == len(df)
+	assert list(result.index) == list(expected.index)
+	for col in ("open", "high", "low", "close", "trade_count"):
+		assert np.array_equal(result[col].to_numpy(), expected[col].to_numpy()), col
+	for col in ("vol_total", "vol_buy", "vol_sell"):
+		assert np.allclose(result[col].to_numpy(), expected[col].to_numpy()), col
+	assert np.allclose(result["vol_delta"], result["vol_buy"] - result["vol_sell"])
+
+
+def test_window_filter_and_merge_of_same_second():
+	df = _random_trades(10)
+	first = int(df["event_time"].iloc[0].value // 10**6)
+
+	assert len(trades_to_partials(df, start_ms=first + 10**9)) == 0
+
+	merged = merge_partials([trades_to_partials(df.iloc[5:]), trades_to_partials(df.iloc[:5])])
+	direct = trades_to_partials(df)
+	assert merged["open"].tolist() == direct["open"].tolist()
+	assert merged["close"].tolist() == direct["close"].tolist()
+	assert merged["trade_count"].sum() == 10
+
+
+def test_vwap_matches_notional_over_volume():
+	df = _random_trades(3000)
+	result = TradeAggregator().finalize()
+	assert len(result) == 0
+
+	aggregator = TradeAggregator()
+	aggregator.add_trades(df.iloc[:1200])
+	aggregator.add_trades(df.iloc[1200:])
+	result = aggregator.finalize()
+
+	ref = df.assign(notional=df["price"] * df["quantity"]).set_index("event_time").resample("1s")
+	expected = (ref["notional"].sum() / ref["quantity"].sum()).reindex(result.index)
+	assert np.allclose(result["vwap"], expected, equal_nan=True)
+	assert result["avg_spread"].isna().all()
+
+
+def test_depth_partials_spread_and_imbalance():
+	nan = np.nan
+	depth = {
+		"event_time": np.array([1000, 1500, 2100, 2200], dtype=np.int64),
+		"bid_px": np.array([[10.0, 9.9], [10.0, 9.9], [10.1, 10.0], [nan, nan]]),
+		"bid_qty": np.array([[1.0, 1.0], [3.0, nan], [2.0, 2.0], [nan, nan]]),
+		"ask_px": np.array([[10.2, 10.3], [10.1, 10.2], [10.2, 10.3], [10.2, 10.3]]),
+		"ask_qty": np.array([[2.0, 0.0], [1.0, nan], [4.0, 4.0], [1.0, 1.0]]),
+	}
+	partials = depth_to_partials(depth)
+	assert partials.index.tolist() == [1, 2]
+	# Empty bid side: no spread, but imbalance 0 still counts
+	assert partials["spread_count"].tolist() == [2, 1]
+	assert partials["imbalance_count"].tolist() == [2, 2]
+
+	aggregator = DepthAggregator(compact_rows=1)
+	aggregator.add_depth({k: v[2:] for k, v in depth.items()})
+	aggregator.add_depth({k: v[:2] for k, v in depth.items()})
+
+	trades = pd.DataFrame({
+		"event_time": pd.to_datetime([1000, 2000], unit="ms", utc=True),
+		"price": [10.1, 10.2],
+		"quantity": [1.0, 1.0],
+		"is_buyer_maker": [False, True],
+	})
+	trade_aggregator = TradeAggregator()
+	trade_aggregator.add_trades(trades)
+	candles = trade_aggregator.finalize(aggregator.partials())
+	assert np.allclose(candles["avg_spread"], [0.15, 0.1])
+	assert np.allclose(candles["imbalance_l20"], [(0.5 + 0.75) / 2, (1 / 3 + 0) / 2])
+
+
+def test_cascading_pyramid_matches_direct_resample():
+	df = _random_trades(20_000)
+	aggregator = TradeAggregator()
+	aggregator.add_trades(df)
+	base = aggregator.finalize()
+	pyramid = candle_pyramid(base)
+
+	assert list(pyramid) == ["1s", "5s", "15s", "1m", "5m", "15m", "1h", "1d"]
+	assert pyramid["1s"] is base
+	for resolution, rule in (("15s", "15s"), ("1m", "1min"), ("1d", "1D")):
+		direct = base.resample(rule).agg({"open": "first", "high": "max", "low": "min", "close": "last", "trade_count": "sum"})
+		level = pyramid[resolution]
+		for col in direct.columns:
+			assert np.array_equal(level[col].to_numpy(), direct[col].to_numpy()), (resolution, col)
+		notional = (base["vwap"] * base["vol_total"]).resample(rule).sum()
+		assert np.allclose(level["vwap"], notional / level["vol_total"])
+	assert pyramid["1d"]["trade_count"].iloc[0] == len(df)
+
+
+def test_pyramid_depth_averages_match_direct_aggregation():
+	rng = np.random.default_rng(3)
+	start = 1700000000000
+	hours = 3 * 3_600_000
+	# Bursty book: dense, wide-spread snapshots early on, sparse and tight later
+	ts_ms = np.sort(np.concatenate([
+		start + rng.integers(0, hours // 6, size=40_000),
+		start + rng.integers(hours // 6, hours, size=5_000),
+	]))
+	dense = ts_ms < start + hours // 6
+	bid_px = np.round(35000 + rng.normal(0, 5, size=len(ts_ms)), 1)
+	spread = np.where(dense, 0.5, 0.1) * rng.integers(1, 4, size=len(ts_ms))
+	depth = {
+		"event_time": ts_ms,
+		"bid_px": np.column_stack([bid_px, bid_px - 0.1]),
+		"bid_qty": rng.random((len(ts_ms), 2)) * np.where(dense, 3.0, 1.0)[:, None],
+		"ask_px": np.column_stack([bid_px + spread, bid_px + spread + 0.1]),
+		"ask_qty": rng.random((len(ts_ms), 2)),
+	}
+	depth_aggregator = DepthAggregator(compact_rows=10_000)
+	for chunk in np.array_split(np.arange(len(ts_ms)), 7):
+		depth_aggregator.add_depth({k: v[chunk] for k, v in depth.items()})
+
+	trades = pd.DataFrame({
+		"event_time": pd.to_datetime(np.arange(start, start + hours, 1_000), unit="ms", utc=True),
+		"price": 35000.0,
+		"quantity": 1.0,
+		"is_buyer_maker": False,
+	})
+	aggregator = TradeAggregator()
+	aggregator.add_trades(trades)
+	pyramid = candle_pyramid(aggregator.finalize(depth_aggregator.partials()))
+
+	bid_total = depth["bid_qty"].sum(axis=1)
+	raw = pd.DataFrame({
+		"avg_spread": depth["ask_px"][:, 0] - depth["bid_px"][:, 0],
+		"imbalance_l20": bid_total / (bid_total + depth["ask_qty"].sum(axis=1)),
+	}, index=pd.to_datetime(ts_ms, unit="ms", utc=True))
+	for resolution, rule in (("1m", "1min"), ("1h", "1h"), ("1d", "1D")):
+		direct = raw.resample(rule).mean().reindex(pyramid[resolution].index)
+		for col in ("avg_spread", "imbalance_l20"):
+			assert np.allclose(pyramid[resolution][col], direct[col], equal_nan=True), (resolution, col)
@@ -0,0 +1,155 @@
+import msgpack
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from orderflow_api import main, service
+from orderflow_recorder.config.settings import Settings, get_settings
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+
+
+def _write_day(bucket, date: str) -> None:
+	index = pd.date_range(date, periods=1440, freq="1min", tz="UTC", name="timestamp")
+	df = pd.DataFrame({
+		"open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5,
+		"vol_total": 3.0, "vol_buy": 2.0, "vol_sell": 1.0, "vol_delta": 1.0, "trade_count": 4,
+	}, index=index)
+	bucket.blob(f"aggregated/BTCUSDT/{date}_1m.csv").upload_from_string(df.to_csv())
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+	storage = LocalStorageClient(tmp_path)
+	bucket = storage.bucket("lake")
+	for date in ("2025-01-01", "2025-01-02", "2025-01-03"):
+		_write_day(bucket, date)
+	monkeypatch.setattr(service, "get_gcs_client", lambda: storage)
+	monkeypatch.setattr(service, "_cache", service.CandleCache(max_bytes=10**8))
+	main.app.dependency_overrides[get_settings] = lambda: Settings(gcs_bucket_name="lake", api_key="k")
+	yield TestClient(main.app, headers={"X-API-Key": "k"})
+	main.app.dependency_overrides.clear()
+
+
+def test_single_day(client):
+	body = client.get("/api/v1/candles", params={"symbol": "btcusdt", "date": "2025-01-02"}).json()
+	assert body["count"] == 1440
+	assert body["date"] == "2025-01-02"
+	assert body["data"][0]["time"] == body["start"]
+
+
+def test_range_spans_days_and_slices_edges(client):
+	params = {"symbol": "btcusdt", "from": "2025-01-01T23:30:00Z", "to": "2025-01-03T00:15:00Z"}
+	body = client.get("/api/v1/candles", params=params).json()
+	times = [row["time"] for row in body["data"]]
+	assert body["count"] == 30 + 1440 + 15
+	assert times[0] == int(pd.Timestamp("2025-01-01T23:30:00Z").timestamp())
+	assert times[-1] == int(pd.Timestamp("2025-01-03T00:14:00Z").timestamp())
+	assert times == sorted(times)
+
+	# Unix seconds work too; a missing day inside the range is simply skipped
+	start = int(pd.Timestamp("2025-01-03T23:00:00Z").timestamp())
+	body = client.get("/api/v1/candles", params={"symbol": "btcusdt", "from": start, "to": start + 7200}).json()
+	assert body["count"] == 60
+
+
+def test_range_validation(client):
+	assert client.get("/api/v1/candles", params={"symbol": "btcusdt"}).status_code == 400
+	params = {"symbol": "btcusdt", "from": "2025-01-02", "to": "2025-01-01"}
+	assert client.get("/api/v1/candles", params=params).status_code == 400
+	params = {"symbol": "btcusdt", "from": "2024-01-01", "to": "2025-01-01"}
+	assert client.get("/api/v1/candles", params=params).status_code == 400
+	params = {"symbol": "btcusdt", "date": "2025-02-01"}
+	assert client.get("/api/v1/candles", params=params).status_code == 404
+
+
+def test_encodings_share_the_same_columns(client):
+	import pyarrow as pa
+
+	params = {"symbol": "btcusdt", "date": "2025-01-02", "resolution": "1m"}
+	rows = client.get("/api/v1/candles", params=params).json()["data"]
+
+	resp = client.get("/api/v1/candles", params=params, headers={"Accept": "application/vnd.orderflow.columns+json"})
+	assert resp.headers["content-type"].startswith("application/vnd.orderflow.columns+json")
+	columns = resp.json()["columns"]
+	assert columns["time"] == [row["time"] for row in rows]
+	assert columns["vwap"] == [None] * 1440
+
+	resp = client.get("/api/v1/candles", params={**params, "format": "arrow"})
+	table = pa.ipc.open_stream(resp.content).read_all()
+	assert table.column("close").to_pylist() == [row["close"] for row in rows]
+	assert table.schema.metadata[b"orderflow.symbol"] == b"BTCUSDT"
+
+	resp = client.get("/api/v1/candles", params={**params, "format": "msgpack"})
+	assert resp.headers["content-type"] == "application/msgpack"
+	assert msgpack.unpackb(resp.content)["columns"]["time"] == columns["time"]
+
+
+def test_accept_negotiation():
+	from fastapi import HTTPException
+
+	from orderflow_api.encoding import MEDIA_ARROW, MEDIA_JSON, negotiate
+
+	assert negotiate(None) == MEDIA_JSON
+	assert negotiate("text/html, */*;q=0.1") == MEDIA_JSON
+	assert negotiate("application/json;q=0.5, application/vnd.apache.arrow.stream") == MEDIA_ARROW
+	with pytest.raises(HTTPException) as err:
+		negotiate("text/csv")
+	assert err.value.status_code == 406
+	# Only the IPC stream format is produced; the file format would not be readable by open_file
+	with pytest.raises(HTTPException) as err:
+		negotiate("application/vnd.apache.arrow.file")
+	assert err.value.status_code == 406
+
+
+def test_streaming_ndjson_and_arrow_batches(client, monkeypatch):
+	import json
+
+	import pyarrow as pa
+
+	params = {"symbol": "btcusdt", "from": "2025-01-01T12:00:00Z", "to": "2025-01-04T00:00:00Z", "resolution": "1m"}
+	buffered = client.get("/api/v1/candles", params=params).json()["data"]
+
+	resp = client.get("/api/v1/candles", params={**params, "format": "ndjson"})
+	assert resp.headers["content-type"].startswith("application/x-ndjson")
+	assert [json.loads(line) for line in resp.text.splitlines()] == buffered
+
+	original = service.iter_candle_blocks
+	monkeypatch.setattr(main, "iter_candle_blocks", lambda *args: original(*args, block_rows=500))
+	resp = client.get("/api/v1/candles", params={**params, "format": "arrow", "stream": "true"})
+	reader = pa.ipc.open_stream(resp.content)
+	batches = list(reader)
+	assert [b.num_rows for b in batches] == [500, 220] + [500, 500, 440] * 2
+	assert pa.Table.from_batches(batches).column("time").to_pylist() == [row["time"] for row in buffered]
+	assert reader.schema.metadata[b"orderflow.resolution"] == b"1m"
+
+	params = {"symbol": "btcusdt", "date": "2024-06-01", "stream": "true"}
+	assert client.get("/api/v1/candles", params=params).status_code == 404
+	assert client.get("/api/v1/candles", params={**params, "format": "columns"}).status_code == 400
+
+
+def test_max_points(client):
+	params = {"symbol": "btcusdt", "date": "2025-01-02", "max_points": 100}
+	body = client.get("/api/v1/candles", params=params).json()
+	assert body["count"] == 96
+	assert sum(row["trade_count"] for row in body["data"]) == 1440 * 4
+
+	body = client.get("/api/v1/candles", params={**params, "method": "lttb"}).json()
+	assert body["count"] == 100
+	assert client.get("/api/v1/candles", params={**params, "method": "nope"}).status_code == 400
+
+
+def test_footprint_endpoint(client, tmp_path):
+	bucket = service.get_gcs_client().bucket("lake")
+	rows = "timestamp,price,tick,vol_buy,vol_sell,trade_count\n"
+	rows += "2025-01-02 00:01:00+00:00,100.0,0.5,1.0,2.0,3\n"
+	rows += "2025-01-02 00:00:00+00:00,100.5,0.5,4.0,0.0,1\n"
+	rows += "2025-01-02 00:00:00+00:00,100.0,0.5,0.5,0.5,2\n"
+	bucket.blob("aggregated/BTCUSDT/2025-01-02_footprint_1m.csv").upload_from_string(rows)
+
+	body = client.get("/api/v1/footprint", params={"symbol": "btcusdt", "date": "2025-01-02"}).json()
+	assert body["count"] == 3
+	assert [(row["time"] % 3600, row["price"]) for row in body["data"]] == [(0, 100.0), (0, 100.5), (60, 100.0)]
+
+	params = {"symbol": "btcusdt", "from": "2025-01-02T00:01:00Z", "to": "2025-01-02T00:02:00Z", "format": "columns"}
+	assert client.get("/api/v1/footprint", params=params).json()["columns"]["vol_sell"] == [2.0]
+	assert client.get("/api/v1/footprint", params={"symbol": "btcusdt", "date": "2025-01-01"}).status_code == 404
@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+
+from orderflow_api import service
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+
+
+CSV = "timestamp,open,high,low,close,vol_total,vol_buy,vol_sell,vol_delta,trade_count\n"
+
+
+def _day(rows: int, price: float = 100.0) -> str:
+	lines = [f"2025-01-02 00:00:{i:02d}+00:00,{price},{price},{price},{price},1.0,0.5,0.5,0.0,2" for i in range(rows)]
+	return CSV + "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+	client = LocalStorageClient(tmp_path)
+	monkeypatch.setattr(service, "get_gcs_client", lambda: client)
+	monkeypatch.setattr(service, "_cache", service.CandleCache(max_bytes=10**6))
+	return client.bucket("lake")
+
+
+def _fetch(date: str = "2025-01-02"):
+	return asyncio.run(service.get_candle_frame("lake", "BTCUSDT", date, "1m"))
+
+
+def test_cache_hits_until_generation_changes(bucket, monkeypatch):
+	blob = bucket.blob("aggregated/BTCUSDT/2025-01-02_1m.csv")
+	blob.upload_from_string(_day(3))
+	first = _fetch()
+	assert len(first) == 3
+	assert service.frame_to_records(first)[0]["vwap"] is None
+
+	parses = []
+	monkeypatch.setattr(service, "_parse_candles", lambda content: parses.append(content) or service._empty_frame())
+	assert _fetch() is first
+	assert parses == []
+
+	blob.upload_from_string(_day(5, price=101.0))
+	# Local generation is the mtime; make sure it moves even on coarse clocks
+	os.utime(blob._path, ns=(blob.generation + 1, blob.generation + 1))
+	_fetch()
+	assert len(parses) == 1
+
+	blob.delete()
+	assert _fetch() is None
+	assert len(service.get_candle_cache()) == 0
+
+
+def test_lru_eviction_by_size(bucket):
+	for day in ("2025-01-01", "2025-01-02", "2025-01-03"):
+		bucket.blob(f"aggregated/BTCUSDT/{day}_1m.csv").upload_from_string(_day(50))
+	cache = service.get_candle_cache()
+	_fetch("2025-01-01")
+	cache.max_bytes = cache.nbytes * 2
+	_fetch("2025-01-02")
+	_fetch("2025-01-01")  # refresh: 01-02 is now least recently used
+	_fetch("2025-01-03")
+	assert [key[2] for key in cache._entries] == ["2025-01-01", "2025-01-03"]
+	assert cache.nbytes <= cache.max_bytes
+
+
+def test_concurrent_misses_share_one_fetch(bucket, monkeypatch):
+	bucket.blob("aggregated/BTCUSDT/2025-01-02_1m.csv").upload_from_string(_day(3))
+	calls = []
+	original = service._fetch_and_parse
+
+	def counting(*args):
+		calls.append(args)
+		return original(*args)
+
+	monkeypatch.setattr(service, "_fetch_and_parse", counting)
+
+	async def many():
+		return await asyncio.gather(*[service.get_candle_frame("lake", "BTCUSDT", "2025-01-02", "1m") for _ in range(10)])
+
+	results = asyncio.run(many())
+	assert len(calls) == 1
+	assert all(r is results[0] for r in results)
+
+
+def test_streaming_reads_through_cache_without_filling_it(bucket, monkeypatch):
+	for day in ("2025-01-01", "2025-01-02", "2025-01-03"):
+		bucket.blob(f"aggregated/BTCUSDT/{day}_1m.csv").upload_from_string(_day(3).replace("2025-01-02", day))
+	hot = _fetch("2025-01-02")
+	cache = service.get_candle_cache()
+	parses = []
+	original = service._parse_candles
+	monkeypatch.setattr(service, "_parse_candles", lambda content: parses.append(content) or original(content))
+
+	async def stream():
+		start = int(pd.Timestamp("2025-01-01", tz="UTC").timestamp())
+		return [block async for block in service.iter_candle_blocks("lake", "BTCUSDT", "1m", start, start + 3 * 86_400)]
+
+	blocks = asyncio.run(stream())
+	assert sum(len(b) for b in blocks) == 9
+	# The cached day is served from the cache, the other two are parsed but not inserted
+	assert len(parses) == 2
+	assert blocks[1]["time"].tolist() == hot["time"].tolist()
+	assert [key[2] for key in cache._entries] == ["2025-01-02"]
@@ -1,6 +1,14 @@
 from datetime import datetime
 
-from orderflow_recorder.binance.ws_client import parse_depth_message, parse_trade_message
+from orderflow_recorder.binance.ws_client import (
+	FuturesWSClient,
+	decode_depth_record,
+	decode_trade_record,
+	parse_depth_message,
+	parse_trade_message,
+	shard_symbols,
+)
+from orderflow_recorder.config.settings import Settings
 
 
 def test_parse_depth_message_normalizes_fields():
@@ -51,3 +59,41 @@ def test_parse_trade_message_normalizes_fields():
 	assert normalized["agg_trade_id"] == 12345678
 
 
+
+
+def test_typed_decoders_match_dict_parsers():
+	trade_raw = {"e": "aggTrade", "E": 1700000001000, "a": 7, "s": "BTCUSDT", "p": "35000.5", "q": "0.1", "T": 1700000000999, "m": False}
+	depth_raw = {"E": 1700000000100, "U": 1, "u": 2, "b": [["1.0", "2.0"]], "a": [["1.5", "3.0"]]}
+
+	trade = decode_trade_record(trade_raw, "BTCUSDT")
+	depth = decode_depth_record(depth_raw, "BTCUSDT")
+
+	assert trade.event_time == 1700000001000
+	assert trade.price == 35000.5
+	assert trade.is_buyer_maker is False
+	assert trade.to_dict() == parse_trade_message(trade_raw)
+	assert depth.to_dict() == parse_depth_message({**depth_raw, "s": "BTCUSDT"})
+
+
+def test_stream_routes_resolved_once():
+	settings = Settings(symbols_futures="btcusdt,ethusdt", ws_decoder="typed")
+	client = FuturesWSClient(settings, on_depth_update=None, on_trade=None)
+
+	query = client._build_streams_query()
+
+	assert query == "btcusdt@depth20@100ms/btcusdt@aggTrade/ethusdt@depth20@100ms/ethusdt@aggTrade"
+	assert client._routes["ethusdt@aggTrade"] == (1, "ETHUSDT")
+	assert client._routes["btcusdt@depth20@100ms"] == (0, "BTCUSDT")
+
+
+def test_shard_symbols_respects_stream_cap_and_subset_client():
+	symbols = [f"sym{i}usdt" for i in range(250)]
+
+	groups = shard_symbols(symbols, shards=1, max_streams=200)
+	assert len(groups) == 3
+	assert all(len(g) * 2 <= 200 for g in groups)
+	assert sorted(s for g in groups for s in g) == sorted(symbols)
+	assert shard_symbols(["a", "b"], shards=4) == [["a"], ["b"]]
+
+	client = FuturesWSClient(Settings(symbols_futures="btcusdt,ethusdt"), None, None, symbols=["ETHUSDT"])
+	assert client._build_streams_query() == "ethusdt@depth20@100ms/ethusdt@aggTrade"
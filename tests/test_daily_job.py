@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from orderflow_recorder.binance.records import TradeRecord
+from orderflow_recorder.config.settings import get_settings
+from orderflow_recorder.process import daily_job
+from orderflow_recorder.storage.buffers import TradeColumns
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+from orderflow_recorder.storage.raw_format import chunk_blob_name, encode_trade_columns
+
+
+BASE_MS = int(datetime(2025, 1, 2, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class _Blob:
+	def __init__(self, name: str, delay: float, tracker: dict) -> None:
+		self.name = name
+		self._delay = delay
+		self._tracker = tracker
+
+	def download_as_bytes(self) -> bytes:
+		with self._tracker["lock"]:
+			self._tracker["running"] += 1
+			self._tracker["max_running"] = max(self._tracker["max_running"], self._tracker["running"])
+		time.sleep(self._delay)
+		with self._tracker["lock"]:
+			self._tracker["running"] -= 1
+		return self.name.encode()
+
+
+def test_iter_blob_contents_keeps_order_and_bounds_in_flight():
+	tracker = {"lock": threading.Lock(), "running": 0, "max_running": 0}
+	# Later blobs finish first, so any completion-order leak would show
+	blobs = [_Blob(f"chunk-{i}", 0.02 if i % 3 == 0 else 0.001, tracker) for i in range(30)]
+	pulled = []
+
+	def source():
+		for blob in blobs:
+			pulled.append(blob)
+			yield blob
+
+	names = []
+	for blob, content in daily_job.iter_blob_contents(source(), max_workers=4):
+		assert content == blob.name.encode()
+		names.append(blob.name)
+		# Submitted but not yet yielded: never more than max_workers
+		assert len(pulled) - len(names) < 4
+	assert names == [b.name for b in blobs]
+	assert tracker["max_running"] <= 4
+
+
+def _write_trades(bucket, symbol: str, minute: int) -> None:
+	buffer = TradeColumns()
+	for i in range(120):
+		ts = BASE_MS + minute * 60_000 + i * 500
+		buffer.append_record(TradeRecord(symbol, ts, ts, 100.0 + minute, 0.5, i % 2 == 0, i))
+	name = chunk_blob_name(symbol, "2025-01-02", f"00-{minute + 1:02d}-00", "trades", "parquet")
+	bucket.blob(name).upload_from_string(encode_trade_columns(buffer, symbol, "parquet"))
+
+
+@pytest.fixture
+def job_env(tmp_path, monkeypatch):
+	# Worker processes build their own settings and storage client from the environment
+	monkeypatch.setenv("LOCAL_STORAGE_ROOT", str(tmp_path))
+	monkeypatch.setenv("GCS_BUCKET_NAME", "lake")
+	monkeypatch.setenv("SYMBOLS_FUTURES", "btcusdt,ethusdt")
+	monkeypatch.setenv("FORCE_DATE", "2025-01-02")
+	monkeypatch.delenv("JOB_MODE", raising=False)
+	get_settings.cache_clear()
+	yield LocalStorageClient(tmp_path).bucket("lake")
+	get_settings.cache_clear()
+
+
+def test_process_pool_runs_each_symbol_day(job_env, monkeypatch):
+	for symbol in ("BTCUSDT", "ETHUSDT"):
+		for minute in range(3):
+			_write_trades(job_env, symbol, minute)
+	monkeypatch.setenv("JOB_PROCESSES", "2")
+	get_settings.cache_clear()
+
+	daily_job.main()
+
+	for symbol in ("BTCUSDT", "ETHUSDT"):
+		candles = pd.read_csv(job_env.blob(f"aggregated/{symbol}/2025-01-02_1m.csv").open("r"))
+		assert candles["trade_count"].tolist() == [120, 120, 120]
+		assert candles["close"].tolist() == [100.0, 101.0, 102.0]
+		assert job_env.blob(f"archive/{symbol}/2025-01-02_raw.zip").exists()
+		assert list(job_env.list_blobs(prefix=f"raw/{symbol}/")) == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from orderflow_api.downsample import downsample, lttb_indices, ohlc_buckets
+
+
+def _candles(n: int) -> pd.DataFrame:
+	rng = np.random.default_rng(3)
+	close = 100 + rng.normal(0, 1, n).cumsum()
+	vol = rng.random(n)
+	vwap = close + 0.01
+	vwap[::7] = np.nan
+	return pd.DataFrame({
+		"time": np.arange(n, dtype=np.int64),
+		"open": close - 0.5, "high": close + 1, "low": close - 1, "close": close,
+		"vol_total": vol, "vol_buy": vol / 2, "vol_sell": vol / 2, "vol_delta": np.zeros(n),
+		"trade_count": np.ones(n, dtype=np.int64),
+		"vwap": vwap, "avg_spread": np.full(n, np.nan), "imbalance_l20": np.full(n, 0.5),
+	})
+
+
+def test_ohlc_buckets_preserve_extremes_and_totals():
+	df = _candles(10_001)
+	out = ohlc_buckets(df, 1000)
+	assert len(out) <= 1000
+	assert list(out.columns) == list(df.columns)
+	assert out["high"].max() == df["high"].max()
+	assert out["low"].min() == df["low"].min()
+	assert out["open"].iloc[0] == df["open"].iloc[0]
+	assert out["close"].iloc[-1] == df["close"].iloc[-1]
+	assert out["trade_count"].sum() == len(df)
+	assert np.isclose(out["vol_total"].sum(), df["vol_total"].sum())
+	assert out["avg_spread"].isna().all()
+	assert np.allclose(out["imbalance_l20"], 0.5)
+
+	first = df.iloc[:11]
+	present = first["vwap"].notna()
+	expected = (first["vwap"][present] * first["vol_total"][present]).sum() / first["vol_total"][present].sum()
+	assert np.isclose(out["vwap"].iloc[0], expected)
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+	y = np.zeros(5000)
+	y[1234] = 50.0
+	idx = lttb_indices(np.arange(5000), y, 100)
+	assert len(idx) == 100
+	assert idx[0] == 0 and idx[-1] == 4999
+	assert 1234 in idx
+	assert np.all(np.diff(idx) > 0)
+
+
+def test_downsample_is_noop_below_limit():
+	df = _candles(50)
+	assert downsample(df, 100) is df
+	assert len(downsample(df, 10, "lttb")) == 10
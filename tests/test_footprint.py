@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from orderflow_recorder.process.footprint import FootprintAggregator, auto_tick, parse_tick_overrides
+
+
+def _trades(prices, qtys, makers, offsets_ms):
+	return pd.DataFrame({
+		"event_time": pd.to_datetime(1700000040000 + np.asarray(offsets_ms), unit="ms", utc=True),
+		"price": prices,
+		"quantity": qtys,
+		"is_buyer_maker": makers,
+	})
+
+
+def test_bins_split_buy_and_sell_per_minute():
+	aggregator = FootprintAggregator(tick=0.5, compact_rows=1)
+	aggregator.add_trades(_trades([100.0, 100.4, 100.5], [1.0, 2.0, 3.0], [False, True, False], [0, 10, 20]))
+	aggregator.add_trades(_trades([100.2, 100.7], [4.0, 5.0], [True, False], [30, 60_000]))
+
+	out = aggregator.finalize()
+	assert out.index.is_monotonic_increasing
+	assert out["price"].tolist() == [100.0, 100.5, 100.5]
+	assert out["vol_buy"].tolist() == [1.0, 3.0, 5.0]
+	assert out["vol_sell"].tolist() == [6.0, 0.0, 0.0]
+	assert out["trade_count"].tolist() == [3, 1, 1]
+	assert (out["tick"] == 0.5).all()
+
+
+def test_tick_configuration():
+	assert parse_tick_overrides("btcusdt:10, ETHUSDT:0.5,") == {"BTCUSDT": 10.0, "ETHUSDT": 0.5}
+	assert auto_tick(97_000) == 1.0
+	assert auto_tick(3_500) == 0.1
+
+	aggregator = FootprintAggregator()
+	aggregator.add_trades(_trades([3500.05, 3500.12], [1.0, 1.0], [False, False], [0, 1]))
+	assert aggregator.tick == 0.1
+	assert aggregator.finalize()["price"].tolist() == [3500.0, 3500.1]
@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.process import daily_job
+from orderflow_recorder.process.incremental import load_partial_state, partial_state_path
+from orderflow_recorder.storage.buffers import DepthColumns, TradeColumns
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+from orderflow_recorder.storage.raw_format import chunk_blob_name, encode_depth_columns, encode_trade_columns
+
+
+DAY = datetime(2025, 1, 2, tzinfo=timezone.utc)
+BASE_MS = int(DAY.timestamp() * 1000)
+
+
+def _write_chunk(bucket, minute: int, fmt: str = "parquet") -> None:
+	rng = np.random.default_rng(minute)
+	buffer = TradeColumns()
+	for i in range(300):
+		ts = BASE_MS + minute * 60_000 + i * 200
+		buffer.append_record(TradeRecord("BTCUSDT", ts, ts, 100 + float(rng.normal()), float(rng.random()), bool(i % 3 == 0), i))
+	name = chunk_blob_name("BTCUSDT", "2025-01-02", f"00-{minute + 1:02d}-00", "trades", fmt)
+	bucket.blob(name).upload_from_string(encode_trade_columns(buffer, "BTCUSDT", fmt))
+
+	depth = DepthColumns(levels=5)
+	for i in range(600):
+		ts = BASE_MS + minute * 60_000 + i * 100
+		mid = 100 + float(rng.normal())
+		bids = [[mid - 0.1 * (k + 1), float(rng.random())] for k in range(5)]
+		asks = [[mid + 0.1 * (k + 1), float(rng.random())] for k in range(5)]
+		depth.append_record(DepthRecord("BTCUSDT", ts, i, i + 1, bids, asks))
+	name = chunk_blob_name("BTCUSDT", "2025-01-02", f"00-{minute + 1:02d}-00", "depth", fmt)
+	bucket.blob(name).upload_from_string(encode_depth_columns(depth, "BTCUSDT", fmt))
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+	client = LocalStorageClient(tmp_path)
+	monkeypatch.setattr(daily_job, "get_gcs_client", lambda: client)
+	return client.bucket("lake")
+
+
+def _read_1s(bucket) -> pd.DataFrame:
+	return pd.read_csv(bucket.blob("aggregated/BTCUSDT/2025-01-02_1s.csv").open("r"))
+
+
+def test_intraday_runs_fold_only_new_chunks_and_nightly_matches_full_run(bucket, tmp_path, monkeypatch):
+	for minute in range(3):
+		_write_chunk(bucket, minute, fmt="csv" if minute == 1 else "parquet")
+	daily_job.process_symbol_intraday("lake", "BTCUSDT", DAY)
+	assert len(_read_1s(bucket)) == 3 * 60
+
+	for minute in range(3, 5):
+		_write_chunk(bucket, minute)
+	daily_job.process_symbol_intraday("lake", "BTCUSDT", DAY)
+	_, depth_partials, processed = load_partial_state(bucket, "BTCUSDT", "2025-01-02")
+	assert len(processed) == 10
+	assert depth_partials["spread_count"].sum() == 5 * 600
+	intraday = _read_1s(bucket)
+	assert intraday["avg_spread"].notna().all()
+	assert np.allclose(intraday["avg_spread"], 0.2)
+
+	daily_job.process_symbol_day("lake", "BTCUSDT", DAY)
+	nightly = _read_1s(bucket)
+	# Footprint covers chunks the intraday runs already folded
+	footprint = pd.read_csv(bucket.blob("aggregated/BTCUSDT/2025-01-02_footprint_1m.csv").open("r"))
+	assert footprint["trade_count"].sum() == 5 * 300
+	assert footprint["timestamp"].nunique() == 5
+	assert not bucket.blob(partial_state_path("BTCUSDT", "2025-01-02")).exists()
+	assert list(bucket.list_blobs(prefix="raw/")) == []
+
+	# Same day computed from scratch, without any intraday state
+	fresh = LocalStorageClient(tmp_path / "fresh").bucket("lake")
+	for minute in range(5):
+		_write_chunk(fresh, minute, fmt="csv" if minute == 1 else "parquet")
+	monkeypatch.setattr(daily_job, "get_gcs_client", lambda: fresh.client)
+	daily_job.process_symbol_day("lake", "BTCUSDT", DAY)
+
+	pd.testing.assert_frame_equal(nightly, _read_1s(fresh))
+	pd.testing.assert_frame_equal(intraday, nightly)
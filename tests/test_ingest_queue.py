@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from orderflow_recorder.binance.ws_client import FuturesWSClient
+from orderflow_recorder.config.settings import Settings
+
+
+def _frames(kinds):
+	now_ms = int(time.time() * 1000)
+	frames = []
+	for i, kind in enumerate(kinds):
+		if kind == "trade":
+			data = {"E": now_ms - 250, "T": now_ms - 250, "s": "BTCUSDT", "p": "100", "q": "1", "m": False, "a": i}
+			frames.append(json.dumps({"stream": "btcusdt@aggTrade", "data": data}))
+		else:
+			data = {"E": now_ms - 250, "s": "BTCUSDT", "U": i, "u": i, "b": [["99", "1"]], "a": [["101", "1"]]}
+			frames.append(json.dumps({"stream": "btcusdt@depth20@100ms", "data": data}))
+	return frames
+
+
+class _FakeWS:
+	def __init__(self, frames):
+		self._frames = frames
+
+	def __aiter__(self):
+		return self._iter()
+
+	async def _iter(self):
+		for frame in self._frames:
+			yield frame
+
+
+def _client(received, **overrides):
+	async def on_event(event):
+		received.append(event)
+
+	settings = Settings(symbols_futures="btcusdt", ws_decoder="typed", **overrides)
+	client = FuturesWSClient(settings, on_event, on_event)
+	client._build_streams_query()
+	return client
+
+
+@pytest.mark.asyncio
+async def test_drop_depth_policy_keeps_trades_and_measures_lag():
+	received = []
+	client = _client(received, ingest_queue_size=3, ingest_overflow="drop_depth")
+	frames = _frames(["trade", "trade", "depth", "depth", "depth", "trade", "trade"])
+
+	# Nothing consumes yet: the queue fills, depth overflow is dropped, the 2nd overflowing trade waits
+	reader = asyncio.create_task(client._read_loop(_FakeWS(frames)))
+	await asyncio.sleep(0.05)
+	assert not reader.done()
+	assert client.stats.dropped_depth == 2
+	assert client._queue.qsize() == 3
+
+	consumer = asyncio.create_task(client._consume_loop())
+	await reader
+	await client._queue.join()
+	consumer.cancel()
+
+	assert [type(e).__name__ for e in received] == ["TradeRecord", "TradeRecord", "DepthRecord", "TradeRecord", "TradeRecord"]
+	window = client.stats.take_window()
+	assert window["received"] == 7 and window["processed"] == 5
+	assert 200 <= window["lag_avg_ms"] < 5_000
+	assert window["queue_max"] == 3
+	assert client.stats.take_window()["lag_max_ms"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_block_policy_and_inline_mode_deliver_everything():
+	for overrides in ({"ingest_queue_size": 2}, {"ingest_queue_size": 0}):
+		received = []
+		client = _client(received, **overrides)
+		consumer = asyncio.create_task(client._consume_loop()) if client._queue is not None else None
+		await client._read_loop(_FakeWS(_frames(["depth", "trade"] * 5)))
+		if consumer is not None:
+			await client._queue.join()
+			consumer.cancel()
+		assert len(received) == 10
+		assert client.stats.dropped_depth == 0
+
+
+class _HangingConnect:
+	"""websockets.connect stand-in: delivers the frames, then the socket stays open and idle."""
+
+	def __init__(self, frames):
+		self._frames = frames
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *exc):
+		return False
+
+	def __aiter__(self):
+		return self._iter()
+
+	async def _iter(self):
+		for frame in self._frames:
+			yield frame
+		await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_queued_events_into_the_sink(monkeypatch):
+	from orderflow_recorder.binance import ws_client
+
+	received = []
+
+	async def slow_sink(event):
+		await asyncio.sleep(0.001)
+		received.append(event)
+
+	settings = Settings(symbols_futures="btcusdt", ws_decoder="typed", ingest_stats_interval=0)
+	client = FuturesWSClient(settings, slow_sink, slow_sink)
+	monkeypatch.setattr(ws_client.websockets, "connect", lambda *a, **kw: _HangingConnect(_frames(["depth", "trade"] * 25)))
+
+	task = asyncio.create_task(client.run_forever())
+	await asyncio.sleep(0.01)
+	assert client._queue.qsize() > 0
+	task.cancel()
+	with pytest.raises(asyncio.CancelledError):
+		await task
+
+	assert len(received) == 50
+	assert client._queue.qsize() == 0
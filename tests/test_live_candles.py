@@ -0,0 +1,55 @@
+from orderflow_recorder.binance.records import TradeRecord
+from orderflow_recorder.ingest.live import LiveCandles
+
+T0 = 1700000040000  # minute boundary
+
+
+def _trade(ts_ms: int, price: float, qty: float = 1.0, maker: bool = False) -> TradeRecord:
+	return TradeRecord("BTCUSDT", ts_ms, ts_ms, price, qty, maker, None)
+
+
+def test_1s_candles_close_and_gap_fill():
+	live = LiveCandles()
+	live.on_trade(_trade(T0 + 100, 100.0, 1.0, False))
+	live.on_trade(_trade(T0 + 900, 102.0, 2.0, True))
+	live.on_trade(_trade(T0 + 3500, 99.0, 0.5, False))
+
+	snap = live.snapshot("BTCUSDT", "1s")
+	assert [row["time"] for row in snap["data"]] == [T0 // 1000, T0 // 1000 + 1, T0 // 1000 + 2]
+	first, gap, _ = snap["data"]
+	assert (first["open"], first["high"], first["low"], first["close"]) == (100.0, 102.0, 100.0, 102.0)
+	assert (first["vol_buy"], first["vol_sell"], first["vol_delta"], first["trade_count"]) == (1.0, 2.0, -1.0, 2)
+	assert gap["open"] == gap["close"] == 102.0 and gap["vol_total"] == 0.0 and gap["trade_count"] == 0
+	assert snap["current"]["open"] == 99.0
+
+
+def test_close_stale_and_1m_rollover():
+	live = LiveCandles()
+	live.on_trade(_trade(T0 + 10, 100.0))
+	live.on_trade(_trade(T0 + 59_000, 101.0))
+	live.close_stale(now_ms=T0 + 60_500)
+
+	one_minute = live.snapshot("BTCUSDT", "1m")
+	assert one_minute["count"] == 1 and one_minute["current"] is None
+	assert one_minute["data"][0]["close"] == 101.0
+	assert one_minute["data"][0]["trade_count"] == 2
+
+	seconds = live.snapshot("BTCUSDT", "1s", limit=2)
+	assert seconds["count"] == 2
+	assert seconds["data"][-1]["time"] == T0 // 1000 + 59
+
+	# A late trade for a closed bucket never reopens history
+	live.on_trade(_trade(T0 + 30_000, 50.0))
+	assert live.snapshot("BTCUSDT", "1m")["current"]["time"] == (T0 + 60_000) // 1000
+
+
+def test_subscribers_receive_closed_candles():
+	live = LiveCandles(subscriber_queue=2)
+	queue = live.subscribe()
+	live.on_trade(_trade(T0, 100.0))
+	live.close_stale(now_ms=T0 + 5_000)
+	# Bounded queue keeps only the newest messages
+	assert queue.qsize() == 2
+	assert queue.get_nowait()["time"] == T0 // 1000 + 3
+	live.unsubscribe(queue)
+	assert live.symbols() == ["BTCUSDT"]
@@ -0,0 +1,47 @@
+import pytest
+
+from orderflow_recorder.binance.ws_client import FuturesWSClient
+from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.utils import metrics
+
+
+def test_prometheus_text_format():
+	registry = metrics.Registry()
+	counter = registry.register(metrics.Counter("test_events_total", "Events", ["kind"]))
+	histogram = registry.register(metrics.Histogram("test_seconds", "Durations", buckets=(0.1, 1.0)))
+	callback = registry.register(metrics.CallbackMetric("test_rows", "Rows"))
+
+	counter.inc("trade")
+	counter.inc("trade", amount=2)
+	for value in (0.05, 0.5, 3.0):
+		histogram.observe(value)
+	callback.add_source(lambda: [({"symbol": 'A"B'}, 7)])
+
+	text = registry.render()
+	assert "# TYPE test_events_total counter" in text
+	assert 'test_events_total{kind="trade"} 3' in text
+	assert 'test_seconds_bucket{le="0.1"} 1' in text
+	assert 'test_seconds_bucket{le="1.0"} 2' in text
+	assert 'test_seconds_bucket{le="+Inf"} 3' in text
+	assert "test_seconds_sum 3.55" in text
+	assert "test_seconds_count 3" in text
+	assert 'test_rows{symbol="A\\"B"} 7' in text
+
+
+@pytest.mark.asyncio
+async def test_ws_client_stats_exposed_while_running():
+	settings = Settings(symbols_futures="btcusdt", ingest_queue_size=0, ingest_stats_interval=0)
+	client = FuturesWSClient(settings, None, None, name="shard-test")
+	client.stats.received_by_kind[1] = 5
+	client.stats.reconnects = 2
+
+	for metric, source in client._metric_sources:
+		metric.add_source(source)
+	try:
+		text = metrics.REGISTRY.render()
+		assert 'orderflow_ws_messages_total{shard="shard-test",kind="trade"} 5' in text
+		assert 'orderflow_ws_reconnects_total{shard="shard-test"} 2' in text
+	finally:
+		for metric, source in client._metric_sources:
+			metric.remove_source(source)
+	assert "shard-test" not in metrics.REGISTRY.render()
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.storage.buffers import DepthColumns, TradeColumns
+from orderflow_recorder.storage.raw_format import (
+	chunk_blob_name,
+	chunk_kind,
+	encode_depth_columns,
+	encode_trade_columns,
+	read_depth_chunk,
+	read_trades_chunk,
+)
+
+
+def _trades(*records: TradeRecord) -> TradeColumns:
+	columns = TradeColumns()
+	for record in records:
+		columns.append_record(record)
+	return columns
+
+
+def _depth(levels: int, *records: DepthRecord) -> DepthColumns:
+	columns = DepthColumns(levels=levels)
+	for record in records:
+		columns.append_record(record)
+	return columns
+
+
+def test_chunk_kind_recognizes_both_formats():
+	assert chunk_kind(chunk_blob_name("BTCUSDT", "2025-01-01", "00-01-00", "trades", "csv")) == "trades"
+	assert chunk_kind(chunk_blob_name("BTCUSDT", "2025-01-01", "00-01-00", "depth", "parquet")) == "depth"
+	assert chunk_kind("archive/BTCUSDT/2025-01-01_raw.zip") is None
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_trades_round_trip(fmt):
+	trades = _trades(
+		TradeRecord("BTCUSDT", 1700000000123, 1700000000123, 35000.5, 0.1, False, 1),
+		TradeRecord("BTCUSDT", 1700000000999, 1700000000999, 35001.0, 0.2, True, 2),
+	)
+	name = chunk_blob_name("BTCUSDT", "2023-11-14", "22-13-20", "trades", fmt)
+
+	df = read_trades_chunk(name, encode_trade_columns(trades, "BTCUSDT", fmt))
+
+	assert list(df["price"]) == [35000.5, 35001.0]
+	assert list(df["quantity"]) == [0.1, 0.2]
+	assert list(df["is_buyer_maker"]) == [False, True]
+	assert df["event_time"].dt.tz is not None
+	assert (df["event_time"].astype("int64") // 10**6).tolist() == [1700000000123, 1700000000999]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_depth_round_trip_pads_levels(fmt):
+	updates = _depth(
+		2,
+		DepthRecord("BTCUSDT", 1700000000100, 1, 2, [["100.0", "1.0"], ["99.5", "2.0"]], [["100.5", "3.0"]]),
+		DepthRecord("BTCUSDT", 1700000000200, 1, 2, [["100.1", "1.5"]], [["100.4", "0.5"], ["101.0", "4.0"]]),
+	)
+	name = chunk_blob_name("BTCUSDT", "2023-11-14", "22-13-20", "depth", fmt)
+
+	out = read_depth_chunk(name, encode_depth_columns(updates, "BTCUSDT", fmt))
+
+	assert out["event_time"].tolist() == [1700000000100, 1700000000200]
+	assert out["bid_px"].shape == (2, 2)
+	assert out["bid_px"][0].tolist() == [100.0, 99.5]
+	assert out["ask_qty"][1].tolist() == [0.5, 4.0]
+	assert np.isnan(out["bid_qty"][1, 1])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_missing_fields_and_empty_sides_round_trip(fmt):
+	trades = _trades(TradeRecord("BTCUSDT", 1700000000456, None, 35001.0, 0.2, False, None))
+	depth = _depth(3, DepthRecord("BTCUSDT", 1700000000200, None, 4, [["100.1", "1.5"]] * 5, []))
+
+	df = read_trades_chunk(chunk_blob_name("BTCUSDT", "2023-11-14", "22-13-20", "trades", fmt), encode_trade_columns(trades, "BTCUSDT", fmt))
+	out = read_depth_chunk(chunk_blob_name("BTCUSDT", "2023-11-14", "22-13-20", "depth", fmt), encode_depth_columns(depth, "BTCUSDT", fmt))
+
+	assert (df["event_time"].astype("int64") // 10**6).tolist() == [1700000000456]
+	assert df["price"].tolist() == [35001.0]
+	assert out["event_time"].tolist() == [1700000000200]
+	assert out["bid_qty"][0].tolist() == [1.5, 1.5, 1.5]
+	assert np.isnan(out["ask_px"][0]).all()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_dict_and_record_appends_encode_identically(fmt):
+	record = TradeRecord("BTCUSDT", 1700000000123, 1700000000120, 35000.5, 0.1, True, 9)
+	from_dict = TradeColumns()
+	from_dict.append_dict(record.to_dict())
+
+	assert encode_trade_columns(from_dict, "BTCUSDT", fmt) == encode_trade_columns(_trades(record), "BTCUSDT", fmt)
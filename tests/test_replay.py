@@ -0,0 +1,112 @@
+import asyncio
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from orderflow_recorder.analysis.replay import Replay
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.storage.buffers import DepthColumns, TradeColumns
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+from orderflow_recorder.storage.raw_format import chunk_blob_name, encode_depth_columns, encode_trade_columns
+
+
+DAY = datetime(2025, 1, 2, tzinfo=timezone.utc)
+BASE_MS = int(DAY.timestamp() * 1000)
+
+
+def _write_minute(bucket, symbol: str, minute: int, offset_ms: int, fmt: str = "parquet") -> None:
+	"""One flush per minute: 6 trades and 3 depth snapshots, written in slightly shuffled order."""
+	start = BASE_MS + minute * 60_000
+	trades = TradeColumns()
+	for i in (1, 0, 2, 4, 3, 5):
+		ts = start + offset_ms + i * 10_000
+		trades.append_record(TradeRecord(symbol, ts, ts, 100.0 + i, 0.5, i % 2 == 0, minute * 100 + i))
+	depth = DepthColumns(levels=3)
+	for i in range(3):
+		ts = start + offset_ms + 5_000 + i * 20_000
+		depth.append_record(DepthRecord(symbol, ts, i, i + 1, [[99.9, 1.0], [99.8, 2.0]], [[100.1, 1.0], [100.2, 2.0], [100.3, 3.0]]))
+	time_str = (DAY + timedelta(minutes=minute + 1)).strftime("%H-%M-%S")
+	bucket.blob(chunk_blob_name(symbol, "2025-01-02", time_str, "trades", fmt)).upload_from_string(encode_trade_columns(trades, symbol, fmt))
+	bucket.blob(chunk_blob_name(symbol, "2025-01-02", time_str, "depth", fmt)).upload_from_string(encode_depth_columns(depth, symbol, fmt))
+
+
+@pytest.fixture
+def bucket(tmp_path):
+	bucket = LocalStorageClient(tmp_path).bucket("test-bucket")
+	for minute in range(3):
+		_write_minute(bucket, "BTCUSDT", minute, 0)
+		_write_minute(bucket, "ETHUSDT", minute, 1_000, fmt="csv")
+	return bucket
+
+
+def _archive(bucket, symbol: str) -> None:
+	"""What the daily job leaves behind: the day's chunks zipped, raw chunks deleted."""
+	path = bucket.blob(f"archive/{symbol}/2025-01-02_raw.zip")._path
+	path.parent.mkdir(parents=True, exist_ok=True)
+	with zipfile.ZipFile(path, "w") as zf:
+		for blob in list(bucket.list_blobs(prefix=f"raw/{symbol}/2025-01-02/")):
+			zf.writestr(blob.name.rsplit("/", 1)[-1], blob.download_as_bytes())
+			blob.delete()
+
+
+def test_replay_merges_symbols_and_kinds_in_event_order(bucket):
+	with Replay(bucket, ["BTCUSDT", "ETHUSDT"], DAY, DAY + timedelta(days=1), prefetch=1, workers=2) as replay:
+		records = list(replay)
+
+	assert len(records) == 2 * 3 * (6 + 3)
+	times = [r.event_time for r in records]
+	assert times == sorted(times)
+	assert {type(r) for r in records} == {TradeRecord, DepthRecord}
+	assert {r.symbol for r in records} == {"BTCUSDT", "ETHUSDT"}
+
+	first = records[0]
+	assert first == TradeRecord("BTCUSDT", BASE_MS, BASE_MS, 100.0, 0.5, True, 0)
+	depth = next(r for r in records if isinstance(r, DepthRecord) and r.symbol == "ETHUSDT")
+	assert depth.first_update_id == 0 and depth.final_update_id == 1
+	# Padding levels are dropped again
+	assert depth.bids == [[99.9, 1.0], [99.8, 2.0]]
+	assert depth.asks == [[100.1, 1.0], [100.2, 2.0], [100.3, 3.0]]
+
+
+def test_replay_window_kinds_and_levels(bucket):
+	start = DAY + timedelta(minutes=1)
+	with Replay(bucket, ["BTCUSDT"], start, start + timedelta(seconds=30), kinds=["depth"], levels=1) as replay:
+		records = list(replay)
+
+	assert [r.event_time - BASE_MS for r in records] == [65_000, 85_000]
+	assert all(len(r.bids) == 1 and len(r.asks) == 1 for r in records)
+
+
+def test_replay_reads_archive_when_raw_chunks_are_gone(bucket):
+	with Replay(bucket, ["BTCUSDT", "ETHUSDT"], DAY, DAY + timedelta(days=1)) as replay:
+		expected = list(replay)
+
+	_archive(bucket, "BTCUSDT")
+	with Replay(bucket, ["BTCUSDT", "ETHUSDT"], DAY, DAY + timedelta(days=1)) as replay:
+		assert list(replay) == expected
+	with Replay(bucket, ["BTCUSDT"], DAY, DAY + timedelta(days=1), source="raw") as replay:
+		assert list(replay) == []
+
+
+def test_replay_feeds_callbacks_async(bucket):
+	class Collect:
+		def __init__(self):
+			self.trades = []
+			self.depth = []
+
+		async def on_trade(self, trade):
+			self.trades.append(trade)
+
+		async def on_depth_update(self, depth):
+			self.depth.append(depth)
+
+	callbacks = Collect()
+	with Replay(bucket, ["ETHUSDT"], DAY, DAY + timedelta(days=1), as_dicts=True, batch_size=4) as replay:
+		count = asyncio.run(replay.feed(callbacks))
+
+	assert count == 3 * (6 + 3)
+	assert len(callbacks.trades) == 18 and len(callbacks.depth) == 9
+	assert callbacks.trades[0]["type"] == "trade"
+	assert callbacks.trades[0]["event_time"] == DAY + timedelta(seconds=1)
+	assert callbacks.depth[0]["type"] == "orderbook"
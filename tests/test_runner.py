@@ -0,0 +1,67 @@
+import asyncio
+import os
+import signal
+
+from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.ingest import runner
+from orderflow_recorder.ingest.runner import _run_until_sigterm, worker_settings
+from orderflow_recorder.storage.spool import DiskSpool, SpoolRecord, read_segment
+
+
+def _spool(settings: Settings) -> DiskSpool:
+	return DiskSpool(settings.spool_dir, segment_max_bytes=1 << 20, segment_max_age=60)
+
+
+def test_workers_spool_to_their_own_directories(tmp_path):
+	settings = Settings(spool_dir=str(tmp_path), gcs_bucket_name="lake")
+	assert worker_settings(settings, "") is settings
+
+	first = _spool(worker_settings(settings, "worker-0"))
+	first.append_batch([SpoolRecord("raw/BTCUSDT/2025-01-01/00-00-01_trades.csv", "text/csv", b"btc")])
+
+	# A (re)starting peer on the same SPOOL_DIR must not recover or reuse worker-0's open segment
+	second = _spool(worker_settings(settings, "worker-1"))
+	second.append_batch([SpoolRecord("raw/ETHUSDT/2025-01-01/00-00-01_trades.csv", "text/csv", b"eth")])
+	assert second.sealed_segments() == []
+
+	first.seal()
+	second.seal()
+	(first_segment,) = first.sealed_segments()
+	(second_segment,) = second.sealed_segments()
+	assert first_segment.parent == tmp_path / "worker-0"
+	assert second_segment.parent == tmp_path / "worker-1"
+	assert [r.payload for r in read_segment(first_segment)] == [b"btc"]
+	assert [r.payload for r in read_segment(second_segment)] == [b"eth"]
+
+
+def test_sigterm_cancels_run_so_finally_blocks_flush():
+	flushed = []
+
+	async def worker():
+		asyncio.get_running_loop().call_later(0.05, os.kill, os.getpid(), signal.SIGTERM)
+		try:
+			await asyncio.sleep(30)
+		finally:
+			await asyncio.sleep(0)  # e.g. sink.stop()
+			flushed.append(True)
+
+	asyncio.run(_run_until_sigterm(worker()))
+	assert flushed == [True]
+
+
+def test_main_starts_exactly_ingest_processes_workers(monkeypatch):
+	symbols = [f"sym{i}usdt" for i in range(400)]
+	settings = Settings(symbols_futures=symbols, ingest_processes=2, ws_max_streams_per_connection=200)
+	started = []
+
+	async def supervise(groups):
+		started.append(groups)
+
+	monkeypatch.setattr(runner, "get_settings", lambda: settings)
+	monkeypatch.setattr(runner, "supervise", supervise)
+	runner.main()
+
+	# 400 symbols need 4 connections at 200 streams, but each of the 2 workers opens its own 2
+	(groups,) = started
+	assert [len(g) for g in groups] == [200, 200]
+	assert sorted(groups[0] + groups[1]) == sorted(symbols)
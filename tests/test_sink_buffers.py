@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from orderflow_recorder.binance.records import DepthRecord, TradeRecord
+from orderflow_recorder.config.settings import Settings
+from orderflow_recorder.storage.buffers import MISSING, DepthColumns, TradeColumns, depth_levels_for_stream
+from orderflow_recorder.storage.gcs_sinks import GcsCsvSink
+
+
+def _trade(i: int, symbol: str = "BTCUSDT") -> TradeRecord:
+	return TradeRecord(symbol, 1700000000000 + i, 1700000000000 + i, 35000.0 + i, 0.1, i % 2 == 0, i)
+
+
+def test_depth_levels_for_stream():
+	assert depth_levels_for_stream("depth20@100ms") == 20
+	assert depth_levels_for_stream("depth5@100ms") == 5
+	assert depth_levels_for_stream("depth@100ms") == 20
+
+
+def test_trade_columns_grow_and_mark_missing_fields():
+	buffer = TradeColumns()
+	for i in range(1000):
+		buffer.append_record(_trade(i))
+	buffer.append_dict({
+		"symbol": "BTCUSDT",
+		"event_time": datetime.fromtimestamp(1700000001.456, tz=timezone.utc),
+		"trade_time": None,
+		"price": 35001.0,
+		"quantity": 0.2,
+		"is_buyer_maker": False,
+		"agg_trade_id": None,
+	})
+
+	assert len(buffer) == 1001
+	assert buffer.nbytes == 1001 * (8 * 5 + 1)
+	arrays = buffer.arrays()
+	assert arrays["price"][:3].tolist() == [35000.0, 35001.0, 35002.0]
+	assert arrays["is_buyer_maker"].dtype == bool and arrays["is_buyer_maker"][:2].tolist() == [True, False]
+	assert arrays["event_time"][-1] == 1700000001456
+	assert arrays["trade_time"][-1] == MISSING and arrays["agg_trade_id"][-1] == MISSING
+
+
+def test_depth_columns_pad_and_truncate_to_fixed_width():
+	buffer = DepthColumns(levels=3)
+	buffer.append_record(DepthRecord("BTCUSDT", 1700000000100, 1, 2, [["100.0", "1.0"], ["99.5", "2.0"]], [["100.5", "3.0"]]))
+	buffer.append_dict({
+		"symbol": "BTCUSDT",
+		"event_time": datetime.fromtimestamp(1700000000.2, tz=timezone.utc),
+		"first_update_id": None,
+		"final_update_id": 4,
+		"bids": [["100.1", "1.5"]] * 5,
+		"asks": [],
+	})
+
+	arrays = buffer.arrays()
+	assert len(buffer) == 2
+	assert buffer.nbytes == 2 * (3 * 8 + 4 * 3 * 8)
+	assert arrays["bid_px"].shape == (2, 3)
+	assert arrays["bid_px"][0, :2].tolist() == [100.0, 99.5] and np.isnan(arrays["bid_px"][0, 2])
+	assert arrays["bid_qty"][1].tolist() == [1.5, 1.5, 1.5]
+	assert np.isnan(arrays["ask_px"][1]).all()
+	assert arrays["first_update_id"].tolist() == [1, MISSING]
+
+
+def test_arrays_are_zero_copy_views():
+	trades = TradeColumns()
+	trades.append_record(_trade(0))
+	depth = DepthColumns(levels=2)
+	depth.append_record(DepthRecord("BTCUSDT", 1, 1, 2, [["1.0", "1.0"]], [["2.0", "1.0"]]))
+
+	price = trades.arrays()["price"]
+	bid_px = depth.arrays()["bid_px"]
+	trades.price[0] = 1.5
+	depth.bid_px[0] = 0.5
+	assert price[0] == 1.5
+	assert bid_px[0, 0] == 0.5
+	# A live view pins the buffer: it must be dropped before the buffer grows again
+	with pytest.raises(BufferError):
+		trades.append_record(_trade(1))
+
+
+@pytest.mark.asyncio
+async def test_flush_swaps_buffers_so_writes_during_upload_land_in_the_next_chunk(tmp_path):
+	sink = GcsCsvSink(Settings(local_storage_root=str(tmp_path), gcs_bucket_name="lake"))
+	uploading = threading.Event()
+	release = threading.Event()
+	uploaded = []
+
+	def upload_batch(trades_map, depth_map):
+		uploading.set()
+		release.wait(5)
+		uploaded.append({symbol: len(buffer) for symbol, buffer in trades_map.items()})
+
+	sink._upload_batch = upload_batch
+	await sink.write_trade(_trade(0))
+	await sink.write_trade(_trade(1))
+	first = sink._trade_buffer["BTCUSDT"]
+
+	flush = asyncio.create_task(sink._flush())
+	await asyncio.to_thread(uploading.wait, 5)
+	await sink.write_trade(_trade(2))
+	await sink.write_trade(_trade(3, "ETHUSDT"))
+	release.set()
+	await flush
+
+	assert uploaded == [{"BTCUSDT": 2}]
+	assert len(first) == 2
+	assert sink._trade_buffer["BTCUSDT"] is not first
+	assert {symbol: len(buffer) for symbol, buffer in sink._trade_buffer.items()} == {"BTCUSDT": 1, "ETHUSDT": 1}
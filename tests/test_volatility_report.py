@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from orderflow_recorder.analysis import volatility_report as vr
+from orderflow_recorder.storage.local_bucket import LocalStorageClient
+
+
+def _write_day(bucket, symbol: str, date_str: str, close: np.ndarray) -> None:
+	index = pd.date_range(date_str, periods=len(close), freq="1min", tz="UTC", name="timestamp")
+	df = pd.DataFrame({"open": close, "high": close, "low": close, "close": close}, index=index)
+	bucket.blob(f"aggregated/{symbol}/{date_str}_1m.csv").upload_from_string(df.to_csv())
+
+
+def _flat_day() -> np.ndarray:
+	return np.full(1440, 100.0)
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+	client = LocalStorageClient(tmp_path)
+	monkeypatch.setattr(vr, "get_gcs_client", lambda: client)
+	bucket = client.bucket("lake")
+
+	# Day 1: +1.2% over 3 minutes at 10:00, back down at 10:30 (a dump of ~-1.2%)
+	btc = _flat_day()
+	btc[600:603] = [100.4, 100.8, 101.2]
+	btc[603:630] = 101.2
+	_write_day(bucket, "BTCUSDT", "2025-01-01", btc)
+	# Day 2 missing, day 3: a 2.5% pump
+	btc = _flat_day()
+	btc[100:] = 102.5
+	_write_day(bucket, "BTCUSDT", "2025-01-03", btc)
+
+	eth = _flat_day()
+	eth[720:] = 99.3
+	_write_day(bucket, "ETHUSDT", "2025-01-01", eth)
+	return bucket
+
+
+def test_rolling_returns_matches_shift_for_all_windows():
+	close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, 500)))
+	close[200] = np.nan
+	returns = vr.rolling_returns(close, [1, 5, 15])
+	series = pd.Series(close)
+	for row, n in zip(returns, [1, 5, 15]):
+		np.testing.assert_allclose(row, (series / series.shift(n) - 1).to_numpy(), equal_nan=True)
+
+
+def test_find_events_collapses_runs_to_their_peak():
+	returns = np.array([[0.0, 0.006, 0.009, 0.007, 0.0, -0.008, -0.006, 0.006, np.nan, 0.01]])
+	events = vr.find_events(returns, 0.005)[0]
+	assert events.tolist() == [[1, 2, 3, 1], [5, 5, 6, -1], [7, 7, 7, 1], [9, 9, 9, 1]]
+
+
+def test_scan_buckets_pumps_and_dumps_per_window(bucket):
+	dates = vr.date_range(date(2025, 1, 1), date(2025, 1, 3))
+	result = vr.scan("lake", ["BTCUSDT", "ethusdt"], dates, windows=[5, 15])
+
+	btc = result.events[(result.events["symbol"] == "BTCUSDT") & (result.events["window"] == 5)]
+	assert btc["direction"].tolist() == ["pump", "dump", "pump"]
+	assert btc["peak_return"].round(4).tolist() == [0.012, round(100 / 101.2 - 1, 4), 0.025]
+	assert btc["peak_time"].iloc[0] == pd.Timestamp("2025-01-01 10:02", tz="UTC")
+	# The missing day breaks the series: no return spans 2025-01-02
+	assert btc["start"].iloc[2] == pd.Timestamp("2025-01-03 01:40", tz="UTC")
+
+	hist = result.histogram.set_index(["symbol", "window", "direction", "bucket"])["events"]
+	assert hist[("BTCUSDT", 5, "pump", "1.2% - 1.3%")] == 1
+	assert hist[("BTCUSDT", 5, "pump", "> 2.0%")] == 1
+	assert hist[("BTCUSDT", 5, "dump", "1.1% - 1.2%")] == 1
+	assert hist[("ETHUSDT", 15, "dump", "0.7% - 0.8%")] == 1
+	assert hist.sum() == len(result.events)
+	assert "=== 15m returns ===" in vr.format_report(result)
+
+
+def test_scan_in_processes_matches_inline(bucket):
+	dates = vr.date_range(date(2025, 1, 1), date(2025, 1, 3))
+	inline = vr.scan("lake", ["BTCUSDT", "ETHUSDT"], dates)
+	parallel = vr.scan("lake", ["BTCUSDT", "ETHUSDT"], dates, processes=2, load_workers=2)
+	pd.testing.assert_frame_equal(inline.events, parallel.events)
+	pd.testing.assert_frame_equal(inline.histogram, parallel.histogram)